@@ -1,32 +1,33 @@
 # satya ai/flask_app/app.py
 import os
-import uuid
 import json
 import pathlib
 
 from dotenv import load_dotenv
 load_dotenv()  # ✅ Load environment variables first
 
+from utils.logging_config import configure_logging, logging_stats
+configure_logging()  # ✅ One logging setup, before the modules below start logging
+
 from flask import (
     Flask, render_template, request, redirect,
-    url_for, send_from_directory, flash
+    url_for, send_from_directory, flash, jsonify, Response
 )
-from werkzeug.utils import secure_filename
 from flask_login import (
     LoginManager, login_user, logout_user,
     login_required, current_user
 )
 
 # Local imports
-from config import SECRET_KEY, UPLOAD_FOLDER, ALLOWED_EXTENSIONS, OPENAI_API_KEY
-from models import db, User, Check, CacheEntry
-from utils.ocr_utils import ocr_from_path
-from utils.video_utils import process_video_file
-from utils.ai_utils import (
-    search_wikipedia_snippet, ask_llm_for_verdict,
-    transcribe_audio_path
-)
-from utils.trusted_sources import collect_trusted_sources
+from config import SECRET_KEY, UPLOAD_FOLDER, ALLOWED_EXTENSIONS, OPENAI_API_KEY, METRICS_ENABLED, METRICS_TOKEN
+from models import db, User, Check, CacheEntry, Job
+from utils.pipeline import run_check, run_check_async, verdict_cache_stats, verdict_flights
+from utils import http_client, cache_utils, jobs, async_runtime, metrics
+from utils.classifier_service import preload_classifier
+from utils.upload_utils import UploadRequest, accept_upload
+from utils.image_index import image_index_stats
+from utils.semantic_index import semantic_index_stats, build_index
+from utils.trusted_sources import source_stats, source_flights
 
 
 # ----------------------------
@@ -37,6 +38,7 @@ TEMPLATES = os.path.join(BASE, "templates")
 STATIC = os.path.join(BASE, "static")
 
 app = Flask(__name__, template_folder=TEMPLATES, static_folder=STATIC)
+app.request_class = UploadRequest  # spool /analyze uploads once, hashing as they arrive
 
 # ----------------------------
 # ✅ Flask Configuration
@@ -53,6 +55,9 @@ os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 # ✅ DB + Login Init
 # ----------------------------
 db.init_app(app)
+cache_utils.init_app(app)
+jobs.init_app(app)
+cache_utils.add_sweep(jobs.sweep_jobs)
 
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -73,6 +78,45 @@ def load_user(user_id):
 # ✅ Create tables if not exist
 with app.app_context():
     db.create_all()
+    cache_utils.ensure_cache_schema()
+    jobs.ensure_jobs_schema()
+    # with gunicorn's preload_app this ran in the master: don't let forked
+    # workers inherit its pooled SQLite connection
+    db.engine.dispose()
+
+# ✅ Load the zero-shot model up front only when asked (CLASSIFIER_MODE=preload)
+preload_classifier()
+
+
+# ----------------------------
+# ✅ CLI
+# ----------------------------
+@app.cli.command("cache-migrate-keys")
+def cache_migrate_keys():
+    """Rewrite legacy raw-text cache keys to the hashed key scheme."""
+    rewritten, merged = cache_utils.migrate_cache_keys()
+    print(f"Rewrote {rewritten} cache keys, merged {merged} duplicates")
+
+
+@app.cli.command("cache-sweep")
+def cache_sweep():
+    """Delete expired source-cache rows in batches."""
+    deleted = cache_utils.sweep_expired()
+    print(f"Deleted {deleted} expired cache entries")
+
+
+@app.cli.command("jobs-sweep")
+def jobs_sweep():
+    """Delete job rows older than JOB_RETENTION in batches."""
+    deleted = jobs.sweep_jobs()
+    print(f"Deleted {deleted} old jobs")
+
+
+@app.cli.command("semantic-index-build")
+def semantic_index_build():
+    """Embed past checks into the semantic claim index and write a snapshot."""
+    embedded = build_index()
+    print(f"Embedded {embedded} past checks")
 
 
 # ----------------------------
@@ -82,6 +126,10 @@ def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def _wants_json():
+    return request.accept_mimetypes.best_match(["text/html", "application/json"]) == "application/json"
+
+
 # ----------------------------
 # ✅ Routes
 # ----------------------------
@@ -172,7 +220,9 @@ def verify():
     return render_template("verify.html")
 
 
-# ✅ Analyze input
+# ✅ Analyze input (queued; the page polls /jobs/<id> until it is done).
+# Text and URL checks run on the asyncio pipeline when it is available;
+# uploads need OCR/speech-to-text and stay on the job threads.
 @app.route("/analyze", methods=["POST"])
 @login_required
 def analyze():
@@ -181,145 +231,70 @@ def analyze():
     text = request.form.get("text") or ""
     url = request.form.get("url") or ""
     file = request.files.get("file")
-    extracted_text = ""
+    upload = None
 
-    # --- TEXT ---
-    if typ == "text":
-        extracted_text = text
-
-    # --- URL ---
-    elif typ == "url" and url:
-        try:
-            import requests, re
-            r = requests.get(url, timeout=12)
-            page_text = re.sub('<[^<]+?>', ' ', r.text)
-            extracted_text = page_text[:20000]
-        except:
-            flash("Could not fetch URL content.")
-            extracted_text = ""
+    # an upload not handed to a job is removed when the request closes
+    if typ == "text" or (typ == "url" and url):
+        file = None
 
     # --- FILE ---
     elif file and allowed_file(file.filename):
-        safe = secure_filename(file.filename)
-        save_name = f"{uuid.uuid4().hex}_{safe}"
-        save_path = os.path.join(app.config["UPLOAD_FOLDER"], save_name)
-
         try:
-            file.save(save_path)
+            upload = accept_upload(file)
         except:
             flash("Failed to save file.")
             return redirect(url_for("verify"))
 
-        ext = safe.rsplit(".", 1)[1].lower()
-
-        try:
-            if ext in ["png", "jpg", "jpeg", "gif"]:
-                extracted_text = ocr_from_path(save_path)
-
-            elif ext in ["mp3", "wav"]:
-                extracted_text = transcribe_audio_path(save_path)
-
-            elif ext in ["mp4", "mov", "mkv", "webm"]:
-                info = process_video_file(save_path)
-                extracted_text = (
-                    info.get("audio_text", "")
-                    + "\n\n"
-                    + info.get("frames_text", "")
-                ).strip()
-        except:
-            flash("Failed to process uploaded file.")
-            extracted_text = ""
-        finally:
-            try:
-                os.remove(save_path)
-            except:
-                pass
-
     else:
         flash("Invalid request — missing text, link, or file.")
         return redirect(url_for("verify"))
 
-    # -------------------------
-    # ✅ AI processing
-    # -------------------------
     try:
-        wiki_snip = search_wikipedia_snippet(extracted_text or url)
-    except:
-        wiki_snip = None
+        if upload is None and async_runtime.available():
+            job = jobs.enqueue_async(current_user.id, run_check_async, current_user.id, typ, text, url)
+        else:
+            job = jobs.enqueue(current_user.id, run_check, current_user.id, typ, text, url, upload)
+    except jobs.JobQueueFull:
+        if upload:
+            upload.cleanup()
+        if _wants_json():
+            return jsonify({"error": "busy"}), 503
+        flash("TruthMate is busy right now, please try again in a moment.")
+        return redirect(url_for("verify"))
 
-    try:
-        trusted = collect_trusted_sources(extracted_text or url)
-        print(f"[DEBUG] Collected {len(trusted)} source entries, {sum(1 for v in trusted.values() if v is not None)} non-None")
-    except Exception as e:
-        print(f"[ERROR] Failed to collect trusted sources: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        trusted = {}
+    if _wants_json():
+        return jsonify({
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": url_for("job_status", job_id=job.id),
+        }), 202
 
-    try:
-        verdict = ask_llm_for_verdict(extracted_text or url, trusted or {})
-        print(f"[DEBUG] Verdict sources count: {len(verdict.get('sources', []))}")
-    except Exception as e:
-        print(f"[ERROR] Failed to get verdict: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        verdict = {
-            "status": "unknown",
-            "confidence": 40,
-            "reasoning": f"Error during analysis: {str(e)}",
-            "sources": [],
-            "risk_score": 50,
-        }
+    return redirect(url_for("job_pending", job_id=job.id))
 
-    sources = verdict.get("sources") or []
-    print(f"[DEBUG] Initial sources from verdict: {len(sources)}")
-    
-    # If no sources from verdict, try to extract from trusted sources dict
-    if not sources:
-        if wiki_snip:
-            sources = [wiki_snip]
-            print(f"[DEBUG] Using wiki_snip as source")
-        else:
-            # Convert trusted dict to list, filtering out None values
-            sources = [v for v in trusted.values() if v is not None and v.get("snippet")]
-            print(f"[DEBUG] Extracted {len(sources)} sources from trusted dict")
-    
-    # Ensure all sources have required fields
-    formatted_sources = []
-    for src in sources:
-        if isinstance(src, dict):
-            # Ensure source has required fields
-            if src.get("name") or src.get("url"):
-                formatted_sources.append({
-                    "name": src.get("name", "Unknown Source"),
-                    "url": src.get("url", ""),
-                    "snippet": src.get("snippet", "")
-                })
-    
-    sources = formatted_sources
-    print(f"[DEBUG] Final formatted sources count: {len(sources)}")
-
-    result = {
-        "status": verdict.get("status", "unknown"),
-        "confidence": int(verdict.get("confidence", 40)),
-        "reasoning": verdict.get("reasoning", ""),
-        "sources": sources,
-        "risk_score": int(verdict.get("risk_score", 50)),
-    }
-
-    # ✅ Save to DB
-    chk = Check(
-        user_id=current_user.id,
-        input_type=typ,
-        input_url=url,
-        text_snippet=(extracted_text or "")[:4000],
-        result_json=json.dumps(result),
-    )
-    db.session.add(chk)
-    db.session.commit()
 
-    # ✅ Redirect to stored result instead of rendering
-    return redirect(url_for("results", check_id=chk.id))
+# ✅ Job status (JSON, polled by results.html)
+@app.route("/jobs/<job_id>")
+@login_required
+def job_status(job_id):
+    job = Job.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    status = jobs.job_status(job)
+    return jsonify({
+        "job_id": job.id,
+        "status": status,
+        "check_id": job.check_id,
+        "result_url": url_for("results", check_id=job.check_id) if status == "done" and job.check_id else None,
+        "error": job.error if status == "failed" else None,
+    })
+
+
+# ✅ Pending result page
+@app.route("/results/pending/<job_id>")
+@login_required
+def job_pending(job_id):
+    job = Job.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    if job.status == "done" and job.check_id:
+        return redirect(url_for("results", check_id=job.check_id))
+    return render_template("results.html", result=None, job=job)
 
 
 # ✅ View saved result
@@ -376,6 +351,50 @@ def admin_panel():
     )
 
 
+# ✅ Admin runtime stats (JSON)
+@app.route("/admin/stats")
+@login_required
+def admin_stats():
+    if not current_user.is_admin():
+        return "Forbidden", 403
+
+    return jsonify({
+        "http_pools": http_client.pool_stats(),
+        "source_cache": cache_utils.cache_stats(),
+        "verdict_cache": verdict_cache_stats(),
+        "image_index": image_index_stats(),
+        "semantic_index": semantic_index_stats(),
+        "sources": source_stats(),
+        "single_flight": {
+            "source": source_flights.stats(),
+            "verdict": verdict_flights.stats(),
+        },
+        "async_pipeline": async_runtime.available(),
+        "logging": logging_stats(),
+    })
+
+
+# ✅ Admin source health (JSON): counters and circuit-breaker state per source
+@app.route("/admin/sources")
+@login_required
+def admin_sources():
+    if not current_user.is_admin():
+        return "Forbidden", 403
+
+    return jsonify(source_stats())
+
+
+# ✅ Prometheus scrape endpoint (per-stage latency histograms of this process)
+@app.route("/metrics")
+def prometheus_metrics():
+    if not METRICS_ENABLED:
+        return "Not Found", 404
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return "Unauthorized", 401
+
+    return Response(metrics.render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/static/logo.png")
 def serve_logo():
     return send_from_directory(os.path.join(app.root_path, "static"), "logo.png")
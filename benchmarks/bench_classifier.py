@@ -0,0 +1,79 @@
+"""
+CPU throughput of the zero-shot fallback: one call per text vs micro-batched.
+
+    CUDA_VISIBLE_DEVICES= python benchmarks/bench_classifier.py --texts 64 --concurrency 8
+
+Needs transformers + torch and the model weights in the local HF cache.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CLASSIFIER_MODEL
+from utils.classifier_service import BatchingClassifier
+
+LABELS = ["true", "fake", "unknown"]
+
+SAMPLES = [
+    "Drinking hot water every hour cures viral infections, doctors confirm.",
+    "The government has announced a new 2000 rupee note with a GPS tracking chip.",
+    "NASA confirmed that the Earth will experience six days of darkness next month.",
+    "The central bank raised interest rates by 25 basis points on Thursday.",
+    "A viral video shows a shark swimming on a flooded highway after the storm.",
+    "WhatsApp will start charging users a monthly fee from next week.",
+    "The city council approved the new metro line after a year of public hearings.",
+    "Scientists say onions placed in the room absorb the flu virus from the air.",
+]
+
+
+def run_single(pipe, texts):
+    start = time.perf_counter()
+    for text in texts:
+        pipe(text, candidate_labels=LABELS)
+    return time.perf_counter() - start
+
+
+def run_batched(pipe, texts, concurrency, max_batch, max_wait_ms):
+    batcher = BatchingClassifier(pipe, max_batch=max_batch, max_wait=max_wait_ms / 1000.0)
+    batcher(texts[0], LABELS)  # start the dispatcher outside the timed region
+    batcher.batches = batcher.items = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda t: batcher(t, LABELS), texts))
+    return time.perf_counter() - start, batcher.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = torch default)")
+    args = parser.parse_args()
+
+    import torch
+    from transformers import pipeline
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    pipe = pipeline("zero-shot-classification", model=CLASSIFIER_MODEL, device=-1)
+    texts = [SAMPLES[i % len(SAMPLES)] for i in range(args.texts)]
+    pipe(texts[0], candidate_labels=LABELS)  # warm-up
+
+    single = run_single(pipe, texts)
+    batched, stats = run_batched(pipe, texts, args.concurrency, args.max_batch, args.max_wait_ms)
+
+    print(f"model={CLASSIFIER_MODEL} texts={args.texts} torch_threads={torch.get_num_threads()}")
+    print(f"single : {single:8.2f}s  {args.texts / single:7.2f} texts/s")
+    print(f"batched: {batched:8.2f}s  {args.texts / batched:7.2f} texts/s  "
+          f"(concurrency={args.concurrency}, avg batch={stats['avg_batch']})")
+    print(f"speedup: {single / batched:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,3 +8,187 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "change_this_secret_for_dev")
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")  # optional
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "mp3", "wav", "mp4", "mov", "mkv", "webm"}
+
+# Trusted-source fan-out: overall deadline (seconds) for one check and the
+# size of the shared fetcher thread pool.
+SOURCES_DEADLINE = float(os.environ.get("SOURCES_DEADLINE", "10"))
+SOURCES_MAX_WORKERS = int(os.environ.get("SOURCES_MAX_WORKERS", "32"))
+
+# Outbound HTTP: one keep-alive pool per host, bounded in size.
+HTTP_POOL_HOSTS = int(os.environ.get("HTTP_POOL_HOSTS", "32"))
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "16"))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "1"))
+HTTP_BACKOFF = float(os.environ.get("HTTP_BACKOFF", "0.3"))
+
+# Source-result cache: in-process LRU (tier 1) in front of the `cache` table (tier 2).
+CACHE_TTL = int(os.environ.get("CACHE_TTL", str(60 * 60 * 24)))  # 24 hours, then stale
+# Stale source results are still served (and refreshed in the background)
+# until CACHE_HARD_TTL; only then are they gone for good.
+CACHE_HARD_TTL = int(os.environ.get("CACHE_HARD_TTL", str(60 * 60 * 24 * 7)))  # 7 days
+CACHE_MEMORY_MAX_ENTRIES = int(os.environ.get("CACHE_MEMORY_MAX_ENTRIES", "5000"))
+CACHE_MEMORY_MAX_BYTES = int(os.environ.get("CACHE_MEMORY_MAX_BYTES", str(16 * 1024 * 1024)))
+CACHE_FLUSH_INTERVAL = float(os.environ.get("CACHE_FLUSH_INTERVAL", "2"))
+CACHE_FLUSH_BATCH = int(os.environ.get("CACHE_FLUSH_BATCH", "200"))
+CACHE_SWEEP_INTERVAL = float(os.environ.get("CACHE_SWEEP_INTERVAL", "3600"))  # 0 disables the sweeper thread
+CACHE_SWEEP_BATCH = int(os.environ.get("CACHE_SWEEP_BATCH", "500"))
+
+# /analyze job queue: worker threads per process, max queued+running jobs per
+# process before /analyze answers 503, and how long a job may run before its
+# status is reported as failed.
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+JOB_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING", "64"))
+JOB_TIMEOUT = int(os.environ.get("JOB_TIMEOUT", "900"))
+JOB_RETENTION = int(os.environ.get("JOB_RETENTION", str(60 * 60 * 24 * 7)))  # job rows are swept after 7 days
+
+# Zero-shot classifier (Priority 7 fallback):
+#   lazy    - load in each worker on first use (default)
+#   preload - load once at import; with gunicorn.conf.py this happens in the
+#             master before fork, so workers share the weights copy-on-write
+#   sidecar - workers call one `python -m utils.classifier_service` process
+#   off     - never load it
+CLASSIFIER_MODE = os.environ.get("CLASSIFIER_MODE", "lazy")
+CLASSIFIER_MODEL = os.environ.get("CLASSIFIER_MODEL", "facebook/bart-large-mnli")
+# The sidecar listens on a unix socket path or a loopback "host:port" only.
+# Its connections carry pickles, so CLASSIFIER_SIDECAR_AUTHKEY is required in
+# sidecar mode and must not be SECRET_KEY: whoever holds it can run code there.
+CLASSIFIER_SIDECAR_ADDRESS = os.environ.get("CLASSIFIER_SIDECAR_ADDRESS", "/tmp/satya-classifier.sock")
+CLASSIFIER_SIDECAR_AUTHKEY = os.environ.get("CLASSIFIER_SIDECAR_AUTHKEY", "").encode()
+CLASSIFIER_BATCH_SIZE = int(os.environ.get("CLASSIFIER_BATCH_SIZE", "8"))  # 1 disables micro-batching
+CLASSIFIER_BATCH_WAIT_MS = float(os.environ.get("CLASSIFIER_BATCH_WAIT_MS", "5"))
+
+# Whole-check verdict cache (keyed by normalized extracted text or upload bytes).
+VERDICT_CACHE_TTL = int(os.environ.get("VERDICT_CACHE_TTL", str(60 * 60 * 6)))  # 6 hours
+
+# URL inputs: stop downloading after URL_MAX_BYTES, stop extracting after URL_MAX_CHARS.
+URL_MAX_BYTES = int(os.environ.get("URL_MAX_BYTES", str(2 * 1024 * 1024)))
+URL_MAX_CHARS = int(os.environ.get("URL_MAX_CHARS", "20000"))
+
+# Uploads: images up to this size are kept in memory and OCR'd straight from
+# it; audio/video (and bigger images) stream to UPLOAD_FOLDER.
+UPLOAD_MEMORY_MAX = int(os.environ.get("UPLOAD_MEMORY_MAX", str(32 * 1024 * 1024)))
+
+# Video text extraction: frames are sampled at up to VIDEO_SAMPLE_FPS (lower
+# for long videos, never more than VIDEO_MAX_SAMPLES decoded), kept only on a
+# scene change that is not a near-duplicate, and at most VIDEO_MAX_FRAMES are OCR'd.
+VIDEO_SAMPLE_FPS = float(os.environ.get("VIDEO_SAMPLE_FPS", "1"))
+VIDEO_MAX_SAMPLES = int(os.environ.get("VIDEO_MAX_SAMPLES", "600"))
+VIDEO_MAX_FRAMES = int(os.environ.get("VIDEO_MAX_FRAMES", "24"))
+VIDEO_SCENE_THRESHOLD = float(os.environ.get("VIDEO_SCENE_THRESHOLD", "12"))  # mean abs diff, 0-255
+VIDEO_DUP_DISTANCE = int(os.environ.get("VIDEO_DUP_DISTANCE", "6"))  # dHash Hamming distance
+# Audio and frame stages of a video run concurrently, each with its own budget (seconds).
+VIDEO_AUDIO_TIMEOUT = float(os.environ.get("VIDEO_AUDIO_TIMEOUT", "120"))
+VIDEO_FRAMES_TIMEOUT = float(os.environ.get("VIDEO_FRAMES_TIMEOUT", "60"))
+
+# Offline speech-to-text (faster-whisper, CPU, int8). STT_MODEL is a model
+# size ("tiny", "base", "small", ...) or a local CTranslate2 model directory;
+# weights must already be present (no downloads at runtime).
+STT_MODEL = os.environ.get("STT_MODEL", "base")
+STT_MODEL_DIR = os.environ.get("STT_MODEL_DIR") or None
+STT_COMPUTE_TYPE = os.environ.get("STT_COMPUTE_TYPE", "int8")
+STT_CPU_THREADS = int(os.environ.get("STT_CPU_THREADS", "0"))  # 0 = library default
+STT_WORKERS = int(os.environ.get("STT_WORKERS", "2"))  # concurrent transcriptions sharing the model
+STT_LANGUAGE = os.environ.get("STT_LANGUAGE") or None  # None = auto-detect
+STT_MAX_SECONDS = float(os.environ.get("STT_MAX_SECONDS", "900"))  # stop after this much audio
+
+# OCR engine: persistent worker threads (tesserocr keeps one Tesseract API per
+# thread; pytesseract is the fallback). Images wider than OCR_MAX_WIDTH are
+# downscaled; taller than OCR_TILE_HEIGHT are cut into overlapping tiles.
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", str(os.cpu_count() or 2)))
+OCR_LANG = os.environ.get("OCR_LANG", "eng")
+OCR_MAX_WIDTH = int(os.environ.get("OCR_MAX_WIDTH", "1600"))
+OCR_MIN_WIDTH = int(os.environ.get("OCR_MIN_WIDTH", "600"))
+OCR_TILE_HEIGHT = int(os.environ.get("OCR_TILE_HEIGHT", "2000"))
+OCR_TILE_OVERLAP = int(os.environ.get("OCR_TILE_OVERLAP", "80"))
+
+# Near-duplicate image matching: reuse a prior check when an upload's dHash is
+# within this Hamming distance of an already verified image (0 disables) AND
+# its OCR text agrees with that check's text (similarity ratio, 0..1): a dHash
+# alone cannot tell apart screenshots that share a layout but not their text.
+IMAGE_MATCH_DISTANCE = int(os.environ.get("IMAGE_MATCH_DISTANCE", "4"))
+IMAGE_MATCH_TEXT_SIMILARITY = float(os.environ.get("IMAGE_MATCH_TEXT_SIMILARITY", "0.9"))
+# closest fingerprint matches whose text is compared (a shared template can match many)
+IMAGE_MATCH_CANDIDATES = int(os.environ.get("IMAGE_MATCH_CANDIDATES", "200"))
+IMAGE_INDEX_REFRESH = float(os.environ.get("IMAGE_INDEX_REFRESH", "5"))  # seconds between DB catch-ups
+
+# Claim extraction: the input is reduced to at most CLAIM_MAX_QUERIES short
+# queries (CLAIM_MAX_WORDS words each) before the source fan-out. Every source
+# gets the best one; the others only go to sources that found nothing.
+CLAIM_MAX_QUERIES = int(os.environ.get("CLAIM_MAX_QUERIES", "2"))
+CLAIM_MAX_WORDS = int(os.environ.get("CLAIM_MAX_WORDS", "16"))
+
+# Semantic claim index (optional: sentence-transformers + hnswlib). A new
+# claim whose embedding has cosine similarity >= SEMANTIC_THRESHOLD with a past
+# check reuses that check's verdict. The in-memory HNSW graph is capped at
+# SEMANTIC_MEMORY_MB (oldest claims are replaced first) and snapshotted to
+# SEMANTIC_INDEX_PATH (`flask semantic-index-build`) so workers warm-start
+# instead of rebuilding.
+SEMANTIC_ENABLED = os.environ.get("SEMANTIC_ENABLED", "1") == "1"
+SEMANTIC_MODEL = os.environ.get("SEMANTIC_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+SEMANTIC_THRESHOLD = float(os.environ.get("SEMANTIC_THRESHOLD", "0.92"))
+SEMANTIC_INDEX_PATH = os.environ.get("SEMANTIC_INDEX_PATH", os.path.join(BASE_DIR, "semantic.hnsw"))
+SEMANTIC_MEMORY_MB = int(os.environ.get("SEMANTIC_MEMORY_MB", "512"))
+SEMANTIC_M = int(os.environ.get("SEMANTIC_M", "16"))
+SEMANTIC_EF = int(os.environ.get("SEMANTIC_EF", "64"))
+SEMANTIC_REFRESH = float(os.environ.get("SEMANTIC_REFRESH", "5"))  # seconds between DB catch-ups
+
+# Source adapters (utils/trusted_sources.py). Comma-separated keys to switch
+# off, and per-source read timeouts as "key=seconds,key=seconds".
+SOURCES_DISABLED = {s.strip() for s in os.environ.get("SOURCES_DISABLED", "").split(",") if s.strip()}
+SOURCE_TIMEOUTS = {
+    k.strip(): float(v)
+    for k, _, v in (item.partition("=") for item in os.environ.get("SOURCE_TIMEOUTS", "").split(","))
+    if k.strip() and v.strip()
+}
+
+# Per-source circuit breakers (per process). Over the last BREAKER_WINDOW
+# seconds, a source with at least BREAKER_MIN_CALLS fetches is opened
+# (skipped) when its error rate reaches BREAKER_ERROR_RATE or its p95 latency
+# reaches BREAKER_SLOW_P95 seconds; after BREAKER_COOLDOWN one probe is let through.
+BREAKER_WINDOW = float(os.environ.get("BREAKER_WINDOW", "60"))
+BREAKER_MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS", "5"))
+BREAKER_ERROR_RATE = float(os.environ.get("BREAKER_ERROR_RATE", "0.5"))
+BREAKER_SLOW_P95 = float(os.environ.get("BREAKER_SLOW_P95", "5"))
+BREAKER_COOLDOWN = float(os.environ.get("BREAKER_COOLDOWN", "30"))
+
+# Hedged source fetches: when a live fetch is still running past the source's
+# recent p90 (SOURCES_HEDGE_PERCENTILE) latency, fire a duplicate and take
+# whichever answers first. Needs SOURCES_HEDGE_MIN_SAMPLES timings per source.
+SOURCES_HEDGE = os.environ.get("SOURCES_HEDGE", "0") == "1"
+SOURCES_HEDGE_PERCENTILE = float(os.environ.get("SOURCES_HEDGE_PERCENTILE", "90"))
+SOURCES_HEDGE_MIN_SAMPLES = int(os.environ.get("SOURCES_HEDGE_MIN_SAMPLES", "20"))
+SOURCES_HEDGE_MIN_DELAY = float(os.environ.get("SOURCES_HEDGE_MIN_DELAY", "0.25"))  # seconds
+
+# Single-flight: identical concurrent source fetches / verdicts wait on one
+# in-flight computation. Across gunicorn workers this uses byte-range locks
+# on SINGLE_FLIGHT_LOCK_FILE (POSIX only). Verdict waiters give up after
+# SINGLE_FLIGHT_WAIT seconds and compute on their own; source fetch waiters
+# give up after SOURCES_DEADLINE and report nothing.
+SINGLE_FLIGHT_CROSS_PROCESS = os.environ.get("SINGLE_FLIGHT_CROSS_PROCESS", "1") == "1"
+SINGLE_FLIGHT_LOCK_FILE = os.environ.get("SINGLE_FLIGHT_LOCK_FILE", os.path.join(BASE_DIR, "singleflight.lock"))
+SINGLE_FLIGHT_WAIT = float(os.environ.get("SINGLE_FLIGHT_WAIT", "60"))
+
+# asyncio pipeline (optional: httpx). Text and URL checks run as coroutines on
+# one event loop per process instead of occupying a job thread each; at most
+# ASYNC_MAX_PENDING of them per process. "auto" uses it when httpx is installed.
+ASYNC_PIPELINE = os.environ.get("ASYNC_PIPELINE", "auto")  # auto | off
+ASYNC_MAX_PENDING = int(os.environ.get("ASYNC_MAX_PENDING", "500"))
+ASYNC_MAX_CONNECTIONS = int(os.environ.get("ASYNC_MAX_CONNECTIONS", "200"))
+ASYNC_THREADS = int(os.environ.get("ASYNC_THREADS", "64"))  # for DB/cache/parsing hops off the loop
+
+# Instrumentation: per-stage latency histograms at /metrics (Prometheus text
+# format, per process). Set METRICS_TOKEN to require "Authorization: Bearer
+# <token>"; METRICS_LOG_JSON=1 logs one JSON line per check with its stages.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_LOG_JSON = os.environ.get("METRICS_LOG_JSON", "0") == "1"
+
+# Logging (utils/logging_config.py): one config for the app, records handed to
+# a background thread through a bounded queue (full queue = record dropped,
+# never a blocked request). Below WARNING, each call site may log at most
+# LOG_RATE_LIMIT records per LOG_RATE_WINDOW seconds; the rest are counted
+# and reported with the next record that gets through.
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")  # text | json
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+LOG_RATE_LIMIT = int(os.environ.get("LOG_RATE_LIMIT", "20"))  # 0 = unlimited
+LOG_RATE_WINDOW = float(os.environ.get("LOG_RATE_WINDOW", "60"))  # seconds
@@ -0,0 +1,5 @@
+import os
+
+# CLASSIFIER_MODE=preload: import the app (and load the zero-shot model) once
+# in the master so forked workers share it instead of loading their own copy.
+preload_app = os.environ.get("CLASSIFIER_MODE") == "preload"
@@ -38,9 +38,33 @@ class Check(db.Model):
     result_json = db.Column(db.Text)  # store JSON as text
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class ImageFingerprint(db.Model):
+    __tablename__ = "image_fingerprints"
+    id = db.Column(db.Integer, primary_key=True)
+    check_id = db.Column(db.Integer, db.ForeignKey("checks.id"), nullable=False)
+    dhash = db.Column(db.BigInteger, nullable=False)  # 64-bit dHash stored as signed int64
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ClaimEmbedding(db.Model):
+    __tablename__ = "claim_embeddings"
+    id = db.Column(db.Integer, primary_key=True)
+    check_id = db.Column(db.Integer, db.ForeignKey("checks.id"), nullable=False, unique=True)
+    vector = db.Column(db.LargeBinary, nullable=False)  # float16, L2-normalised
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Job(db.Model):
+    __tablename__ = "jobs"
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    status = db.Column(db.String(16), default="queued")  # queued | running | done | failed
+    check_id = db.Column(db.Integer, db.ForeignKey("checks.id"), nullable=True)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # retention sweeps scan this
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class CacheEntry(db.Model):
     __tablename__ = "cache"
     id = db.Column(db.Integer, primary_key=True)
-    key = db.Column(db.String(500), unique=True, nullable=False)
+    key = db.Column(db.String(64), unique=True, nullable=False)  # "<namespace>:<digest>" (cache_utils.make_key)
     value = db.Column(db.Text)  # store JSON/text
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # expiry sweeps scan this
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Keep the suite off the real database, model downloads and shared lock files:
+# config.py reads these once, at import.
+_TMP = tempfile.mkdtemp(prefix="satya-tests-")
+os.environ.setdefault("CLASSIFIER_MODE", "off")
+os.environ.setdefault("SEMANTIC_ENABLED", "0")
+os.environ.setdefault("OPENAI_API_KEY", "")
+os.environ.setdefault("SINGLE_FLIGHT_CROSS_PROCESS", "0")
+os.environ.setdefault("SINGLE_FLIGHT_LOCK_FILE", os.path.join(_TMP, "singleflight.lock"))
+os.environ.setdefault("SEMANTIC_INDEX_PATH", os.path.join(_TMP, "semantic.hnsw"))
+os.environ.setdefault("CACHE_SWEEP_INTERVAL", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from models import db, User  # noqa: E402
+from utils import cache_utils, jobs  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    """A bare app on a throwaway SQLite file (app.py is bound to satya.db)."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(_TMP, 'test.db')}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    cache_utils.init_app(app)
+    jobs.init_app(app)
+    with app.app_context():
+        db.create_all()
+        cache_utils.ensure_cache_schema()
+    return app
+
+
+@pytest.fixture(scope="session")
+def user_id(app):
+    with app.app_context():
+        u = User(email="tests@example.com", name="tests")
+        u.set_password("x")
+        db.session.add(u)
+        db.session.commit()
+        return u.id
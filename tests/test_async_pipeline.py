@@ -0,0 +1,67 @@
+import json
+import uuid
+
+import pytest
+
+from models import db, Check
+from utils import async_http, async_runtime, trusted_sources
+from utils.pipeline import run_check_async
+from utils.trusted_sources import SourceAdapter
+
+pytestmark = pytest.mark.skipif(not async_http.HTTPX_OK, reason="httpx not installed")
+
+
+class FakeResponse:
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+@pytest.fixture
+def stub_sources(monkeypatch):
+    """Two HTML sources served by a stubbed async_http.get; returns the URLs requested."""
+    requested = []
+
+    async def fake_get(url, **kwargs):
+        requested.append(url)
+        return FakeResponse(f'<article><a href="/story">Story for {url}</a></article>')
+
+    monkeypatch.setattr(async_http, "get", fake_get)
+    monkeypatch.setattr(trusted_sources, "SOURCES", [
+        SourceAdapter(key, key.title(), f"https://{key}.example/search?q={{q}}",
+                      selector="article a", base_url=f"https://{key}.example/")
+        for key in (f"alpha_{uuid.uuid4().hex[:6]}", f"beta_{uuid.uuid4().hex[:6]}")
+    ])
+    return requested
+
+
+def test_run_check_async_end_to_end(app, user_id, stub_sources):
+    text = f"The river Thames froze solid in {uuid.uuid4().hex[:8]}."
+    check_id = async_runtime.run(run_check_async(app, user_id, "text", text, ""), timeout=30)
+
+    with app.app_context():
+        check = db.session.get(Check, check_id)
+        result = json.loads(check.result_json)
+
+    assert check.text_snippet == text
+    assert len(stub_sources) >= 2
+    # every stubbed source made it into the stored verdict
+    names = {s["name"] for s in result["sources"]}
+    assert names == {adapter.name for adapter in trusted_sources.SOURCES}
+    assert all(s["url"].endswith("/story") for s in result["sources"])
+
+
+def test_run_check_async_reuses_cached_verdict(app, user_id, stub_sources):
+    text = f"A second claim about {uuid.uuid4().hex[:8]} being true."
+    first = async_runtime.run(run_check_async(app, user_id, "text", text, ""), timeout=30)
+    fetched = len(stub_sources)
+    second = async_runtime.run(run_check_async(app, user_id, "text", text, ""), timeout=30)
+
+    assert first != second
+    assert len(stub_sources) == fetched
+    with app.app_context():
+        assert db.session.get(Check, first).result_json == db.session.get(Check, second).result_json
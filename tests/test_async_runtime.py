@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from utils.async_runtime import drive, drive_async
+
+
+def _plan(log):
+    try:
+        first = yield "double", (2,)
+        try:
+            yield "fail", ()
+        except ValueError as e:
+            log.append(f"caught {e}")
+        return first + (yield "double", (first,))
+    finally:
+        log.append("closed")
+
+
+def test_sync_and_async_drivers_run_the_same_plan():
+    def fail():
+        raise ValueError("boom")
+
+    async def double_async(x):
+        return x * 2
+
+    async def fail_async():
+        fail()
+
+    sync_log, async_log = [], []
+    assert drive(_plan(sync_log), {"double": lambda x: x * 2, "fail": fail}) == 12
+    assert asyncio.run(drive_async(_plan(async_log), {"double": double_async, "fail": fail_async})) == 12
+    assert sync_log == async_log == ["caught boom", "closed"]
+
+
+def test_unhandled_errors_propagate_after_cleanup():
+    log = []
+
+    def plan():
+        try:
+            yield "explode", ()
+        finally:
+            log.append("released")
+
+    def explode():
+        raise RuntimeError("upstream")
+
+    with pytest.raises(RuntimeError):
+        drive(plan(), {"explode": explode})
+    assert log == ["released"]
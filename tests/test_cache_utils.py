@@ -0,0 +1,106 @@
+import uuid
+from datetime import datetime, timedelta
+
+from config import CACHE_TTL, CACHE_HARD_TTL, VERDICT_CACHE_TTL
+from models import db, CacheEntry
+from utils import cache_utils
+from utils.cache_utils import MemoryCache, cache_lookup, cache_set, flush, make_key
+
+
+def _key(namespace="gnews"):
+    return make_key(namespace, uuid.uuid4().hex)
+
+
+def _row(key, age, value='{"snippet": "x"}'):
+    db.session.add(CacheEntry(key=key, value=value, timestamp=datetime.utcnow() - timedelta(seconds=age)))
+    db.session.commit()
+
+
+def test_memory_cache_hit_and_hard_expiry():
+    cache = MemoryCache(max_entries=10, max_bytes=10_000, ttl=60)
+    now = datetime.utcnow()
+    cache.put("a", "1", now + timedelta(seconds=60), now + timedelta(seconds=120))
+
+    assert cache.get("a", now) == ("1", now + timedelta(seconds=60))
+    assert cache.get("a", now + timedelta(seconds=121)) is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2, max_bytes=10_000, ttl=60)
+    now = datetime.utcnow()
+    later = now + timedelta(seconds=60)
+    cache.put("a", "1", later, later)
+    cache.put("b", "2", later, later)
+    cache.get("a", now)  # "b" is now the oldest
+    cache.put("c", "3", later, later)
+
+    assert cache.get("b", now) is None
+    assert cache.get("a", now) is not None and cache.get("c", now) is not None
+
+    small = MemoryCache(max_entries=10, max_bytes=10, ttl=60)
+    small.put("k1", "xxxx", later, later)
+    small.put("k2", "yyyy", later, later)  # 12 bytes in total: k1 goes
+    assert small.get("k1", now) is None and small.get("k2", now) is not None
+
+
+def test_lookup_serves_stale_rows_until_hard_expiry(app):
+    fresh, stale, gone = _key(), _key(), _key()
+    with app.app_context():
+        _row(fresh, age=60)
+        _row(stale, age=CACHE_TTL + 60)
+        _row(gone, age=max(CACHE_HARD_TTL, CACHE_TTL) + 60)
+
+        assert cache_lookup(fresh) == ({"snippet": "x"}, False)
+        assert cache_lookup(stale) == ({"snippet": "x"}, True)
+        assert cache_lookup(gone) == (None, False)
+        assert cache_utils.cache_get(stale) is None
+
+
+def test_write_through_commits_before_returning(app):
+    key = _key()
+    with app.app_context():
+        cache_set(key, {"snippet": "now"}, write_through=True)
+        assert CacheEntry.query.filter_by(key=key).one().value == '{"snippet": "now"}'
+
+
+def test_write_behind_reaches_the_db_on_flush(app):
+    key = _key()
+    with app.app_context():
+        cache_set(key, {"snippet": "later"})
+        cache_utils.memory_cache.clear()
+        assert cache_lookup(key) == ({"snippet": "later"}, False)  # from the pending buffer or the DB
+        flush()
+        assert CacheEntry.query.filter_by(key=key).one().value == '{"snippet": "later"}'
+
+
+def test_migrate_merges_legacy_keys_onto_the_newest(app):
+    query = f"Moon landing {uuid.uuid4().hex[:8]}"
+    with app.app_context():
+        _row(f"gnews:{query}", age=300, value='"old"')
+        _row(f"gnews:  {query.upper()} ", age=10, value='"new"')
+
+        rewritten, merged = cache_utils.migrate_cache_keys()
+
+        assert (rewritten, merged) == (1, 1)
+        rows = CacheEntry.query.filter_by(key=make_key("gnews", query)).all()
+        assert [row.value for row in rows] == ['"new"']
+        assert CacheEntry.query.filter(CacheEntry.key.like("gnews:%oon%")).count() == 0
+
+
+def test_sweep_removes_only_rows_past_hard_expiry(app):
+    keep_source, drop_source = _key(), _key()
+    keep_verdict, drop_verdict = _key("verdict"), _key("verdict")
+    with app.app_context():
+        _row(keep_source, age=CACHE_TTL + 60)  # stale, still servable
+        _row(drop_source, age=max(CACHE_HARD_TTL, CACHE_TTL) + 60)
+        _row(keep_verdict, age=60)
+        _row(drop_verdict, age=VERDICT_CACHE_TTL + 60)
+
+        assert cache_utils.sweep_expired(batch_size=1) >= 2
+
+        left = {row.key for row in CacheEntry.query.filter(
+            CacheEntry.key.in_([keep_source, drop_source, keep_verdict, drop_verdict])
+        )}
+        assert left == {keep_source, keep_verdict}
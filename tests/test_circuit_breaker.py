@@ -0,0 +1,53 @@
+import time
+
+from utils.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+COOLDOWN = 0.05
+
+
+def _tripped(cooldown=COOLDOWN):
+    breaker = CircuitBreaker(window=60, min_calls=1, error_rate=0.5, slow_p95=5, cooldown=cooldown)
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+    return breaker
+
+
+def _cooled():
+    breaker = _tripped()
+    time.sleep(COOLDOWN * 1.2)
+    return breaker
+
+
+def test_opens_on_error_rate_and_refuses_until_cooldown():
+    breaker = _tripped(cooldown=60)
+    assert not breaker.allow()
+    assert breaker.snapshot()["reason"] == "error rate 100%"
+
+
+def test_single_probe_closes_on_success():
+    breaker = _cooled()
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # one probe at a time
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = _cooled()
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+    assert breaker.trips == 2
+
+
+def test_lost_probe_expires_after_cooldown():
+    breaker = _cooled()
+    assert breaker.allow()       # the probe goes out and never reports back
+    assert not breaker.allow()
+    time.sleep(COOLDOWN * 1.2)
+    assert breaker.allow()       # written off: the next call probes instead
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
@@ -0,0 +1,26 @@
+from utils.claim_utils import extract_claim_queries
+
+
+def test_short_input_is_one_normalized_query():
+    assert extract_claim_queries("  Vaccines  CAUSE autism ") == ["vaccines cause autism"]
+    assert extract_claim_queries("") == []
+
+
+def test_claim_sentences_beat_boilerplate():
+    text = (
+        "Subscribe to our newsletter and follow us for more.\n"
+        "The health ministry announced that 500 hospitals will close in March.\n"
+        "Click here to share this post with friends."
+    )
+    claims = extract_claim_queries(text, max_claims=2)
+    assert claims[0] == "the health ministry announced that 500 hospitals will close in march"
+    assert all("subscribe" not in claim for claim in claims)
+
+
+def test_near_duplicates_count_once_and_queries_are_capped():
+    sentence = "Officials confirmed the bridge in Mumbai collapsed on Monday night."
+    text = f"{sentence}\n{sentence.upper()}\nOfficials confirmed the bridge in Mumbai collapsed on Monday."
+    assert len(extract_claim_queries(text, max_claims=3)) == 1
+
+    long_sentence = "The minister said " + " ".join(f"word{i}" for i in range(40)) + "."
+    assert len(extract_claim_queries(long_sentence, max_words=16)[0].split()) == 16
@@ -0,0 +1,24 @@
+import pytest
+
+from config import SECRET_KEY
+from utils.classifier_service import SidecarClient, _check_authkey, _parse_address
+
+
+def test_sidecar_address_is_unix_socket_or_loopback():
+    assert _parse_address("/tmp/satya-classifier.sock") == "/tmp/satya-classifier.sock"
+    assert _parse_address(":6000") == ("127.0.0.1", 6000)
+    assert _parse_address("localhost:6000") == ("localhost", 6000)
+    assert _parse_address("[::1]:6000") == ("::1", 6000)
+    for address in ("0.0.0.0:6000", "10.0.0.5:6000", "classifier.internal:6000"):
+        with pytest.raises(RuntimeError):
+            _parse_address(address)
+
+
+def test_sidecar_needs_its_own_authkey():
+    with pytest.raises(RuntimeError):
+        _check_authkey(b"")
+    with pytest.raises(RuntimeError):
+        _check_authkey(SECRET_KEY.encode())
+    with pytest.raises(RuntimeError):
+        SidecarClient("/tmp/satya-classifier.sock", b"")
+    assert _check_authkey(b"a-dedicated-key") == b"a-dedicated-key"
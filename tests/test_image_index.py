@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+pytest.importorskip("PIL")
+from PIL import Image, ImageDraw  # noqa: E402
+
+from models import db, Check  # noqa: E402
+from utils.image_hash import hamming  # noqa: E402
+from utils.image_index import fingerprint, find_match, remember, same_text  # noqa: E402
+
+
+def _chat_screenshot(lines):
+    """Same layout every time: header bar, two bubbles; only the words change."""
+    img = Image.new("RGB", (360, 640), "white")
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, 360, 60), fill=(7, 94, 84))
+    for i, line in enumerate(lines):
+        top = 100 + i * 90
+        draw.rounded_rectangle((20, top, 300, top + 60), radius=12, fill=(220, 248, 198))
+        draw.text((32, top + 22), line, fill="black")
+    return img
+
+
+CLAIM = ["Forwarded: drinking hot water", "cures the virus in 3 days"]
+OTHER = ["Lunch at noon tomorrow?", "Sure, see you there"]
+
+
+def test_same_layout_different_text_is_not_reused(app):
+    first, second = _chat_screenshot(CLAIM), _chat_screenshot(OTHER)
+    h1, h2 = fingerprint(first), fingerprint(second)
+    assert hamming(h1, h2) <= 4  # the fingerprints alone would call these the same image
+
+    with app.app_context():
+        chk = Check(input_type="file", text_snippet="\n".join(CLAIM),
+                    result_json=json.dumps({"status": "fake", "confidence": 90}))
+        db.session.add(chk)
+        db.session.commit()
+        remember(h1, chk.id)
+
+        assert find_match(h2, "\n".join(OTHER)) is None
+        # the same screenshot re-uploaded, OCR'd with a little noise
+        match = find_match(h2, "Forwarded: drinking hot water\ncures the virus in 3 dayss")
+        assert match is not None and match.id == chk.id
+
+
+def test_same_text_tolerates_ocr_noise_only():
+    assert same_text("Hot water cures  the VIRUS", "hot water cures the virus")
+    assert same_text("Hot water cures the virus in 3 days", "Hot water cures the virns in 3 days")
+    assert not same_text("Hot water cures the virus", "Cold water spreads the virus")
+    assert not same_text("", "")
+
+
+def test_later_check_of_the_same_template_is_found(app):
+    texts = (["Bank holiday declared", "for all of next week"], ["Schools closed", "until further notice"])
+    h1, h2 = fingerprint(_chat_screenshot(texts[0])), fingerprint(_chat_screenshot(texts[1]))
+
+    with app.app_context():
+        ids = []
+        for lines in texts:
+            chk = Check(input_type="file", text_snippet="\n".join(lines),
+                        result_json=json.dumps({"status": "real", "confidence": 80}))
+            db.session.add(chk)
+            db.session.commit()
+            remember(h1, chk.id)  # both stored under the same fingerprint
+            ids.append(chk.id)
+
+        match = find_match(h1, "\n".join(texts[1]))
+        assert match is not None and match.id == ids[1]
+        match = find_match(h2, "\n".join(texts[0]))
+        assert match is not None and match.id == ids[0]
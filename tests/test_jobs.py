@@ -0,0 +1,45 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from models import db, Job
+from utils import jobs, pipeline
+from utils.pipeline import run_check
+
+
+def _wait(app, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with app.app_context():
+            job = db.session.get(Job, job_id)
+            if job.status in ("done", "failed"):
+                return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {job.status}")
+
+
+def test_unreadable_url_fails_the_job_with_a_message(app, user_id, monkeypatch):
+    def unreachable(url):
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(pipeline, "fetch_url_text", unreachable)
+    with app.app_context():
+        job_id = jobs.enqueue(user_id, run_check, user_id, "url", "", "https://unreachable.example/").id
+
+    job = _wait(app, job_id)
+    assert job.status == "failed"
+    assert job.error == "Could not fetch URL content."
+    assert job.check_id is None
+
+
+def test_sweep_jobs_deletes_only_jobs_past_retention(app, user_id):
+    old, recent = uuid.uuid4().hex, uuid.uuid4().hex
+    with app.app_context():
+        long_ago = datetime.utcnow() - timedelta(days=30)
+        db.session.add(Job(id=old, user_id=user_id, status="done", created_at=long_ago, updated_at=long_ago))
+        db.session.add(Job(id=recent, user_id=user_id, status="done"))
+        db.session.commit()
+
+        assert jobs.sweep_jobs(batch_size=1) >= 1
+        assert db.session.get(Job, old) is None
+        assert db.session.get(Job, recent) is not None
@@ -0,0 +1,28 @@
+import logging
+
+from utils.logging_config import RateLimitFilter
+
+
+def _record(name, msg, level=logging.INFO, lineno=10):
+    return logging.LogRecord(name, level, __file__, lineno, msg, None, None)
+
+
+def test_call_site_is_limited_and_suppressions_reported():
+    limiter = RateLimitFilter(limit=2, window=60)
+    passed = [limiter.filter(_record("utils.trusted_sources", f"msg {i}")) for i in range(5)]
+    assert passed == [True, True, False, False, False]
+
+    limiter.window = 0  # next record opens a new window
+    record = _record("utils.trusted_sources", "msg 5")
+    assert limiter.filter(record)
+    assert record.getMessage() == "msg 5 (3 similar suppressed)"
+
+
+def test_warnings_are_never_limited():
+    limiter = RateLimitFilter(limit=1, window=60)
+    assert all(limiter.filter(_record("x", "boom", level=logging.WARNING)) for _ in range(10))
+
+
+def test_trace_lines_are_never_limited():
+    limiter = RateLimitFilter(limit=1, window=60)
+    assert all(limiter.filter(_record("satya.trace", '{"trace": "check"}')) for _ in range(100))
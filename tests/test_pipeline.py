@@ -0,0 +1,70 @@
+import json
+import uuid
+
+import pytest
+
+from models import db, Check
+from utils import pipeline
+from utils.cache_utils import cache_get, make_key
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    """Stub the source fan-out; set `answer` to what every source returns. Counts fan-outs."""
+    state = {"answer": None, "calls": 0}
+
+    def fake_collect(query):
+        state["calls"] += 1
+        return {"alpha": state["answer"], "beta": state["answer"]}
+
+    monkeypatch.setattr(pipeline, "collect_trusted_sources", fake_collect)
+    return state
+
+
+def _claim():
+    return f"The moon landing of {uuid.uuid4().hex[:8]} was staged."
+
+
+def test_verdict_without_evidence_is_not_cached(app, user_id, sources):
+    text = _claim()
+    with app.app_context():
+        first = pipeline.run_check(user_id, "text", text, "")
+        pipeline.run_check(user_id, "text", text, "")
+        assert sources["calls"] == 2
+        assert cache_get(make_key("verdict", text)) is None
+        assert json.loads(db.session.get(Check, first).result_json)["status"] == "unknown"
+
+
+def test_error_verdict_is_not_cached(app, user_id, sources, monkeypatch):
+    def broken(text, collected):
+        raise RuntimeError("upstream exploded")
+
+    monkeypatch.setattr(pipeline, "ask_llm_for_verdict", broken)
+    sources["answer"] = {"name": "Alpha", "url": "https://alpha.example/a", "snippet": "A report."}
+    text = _claim()
+    with app.app_context():
+        check_id = pipeline.run_check(user_id, "text", text, "")
+        assert cache_get(make_key("verdict", text)) is None
+        assert "upstream exploded" in json.loads(db.session.get(Check, check_id).result_json)["reasoning"]
+
+
+def test_verdict_with_evidence_is_reused(app, user_id, sources):
+    sources["answer"] = {"name": "Alpha", "url": "https://alpha.example/a", "snippet": "A report."}
+    text = _claim()
+    with app.app_context():
+        pipeline.run_check(user_id, "text", text, "")
+        pipeline.run_check(user_id, "text", text, "")
+        assert sources["calls"] == 1
+        assert cache_get(make_key("verdict", text)) is not None
+
+
+def test_failed_claim_indexing_does_not_fail_the_check(app, user_id, sources, monkeypatch):
+    def broken(*args):
+        raise RuntimeError("embedding store down")
+
+    monkeypatch.setattr(pipeline.semantic_index, "find_similar", lambda query: (None, "vector"))
+    monkeypatch.setattr(pipeline.semantic_index, "remember", broken)
+    sources["answer"] = {"name": "Alpha", "url": "https://alpha.example/a", "snippet": "A report."}
+    with app.app_context():
+        check_id = pipeline.run_check(user_id, "text", _claim(), "")
+        assert db.session.get(Check, check_id) is not None
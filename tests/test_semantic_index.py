@@ -0,0 +1,76 @@
+import json
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("hnswlib")
+
+from models import db, ClaimEmbedding  # noqa: E402
+from utils.semantic_index import SemanticIndex  # noqa: E402
+
+DIM = 8
+
+
+def _vectors(n, seed):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_concurrent_catch_up_adds_each_row_once(app, tmp_path):
+    with app.app_context():
+        ClaimEmbedding.query.delete()
+        base = 100000
+        db.session.add_all(
+            ClaimEmbedding(check_id=base + i, vector=v.astype(np.float16).tobytes())
+            for i, v in enumerate(_vectors(1500, seed=1))
+        )
+        db.session.commit()
+
+    index = SemanticIndex(DIM, path=str(tmp_path / "semantic.hnsw"), memory_mb=0)
+    assert index.capacity == 1000  # smaller than the table: the oldest get replaced
+
+    errors = []
+
+    def worker():
+        try:
+            with app.app_context():
+                index.catch_up(force=True, batch_size=100)
+        except Exception as e:  # pragma: no cover - the failure being tested
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+
+    assert errors == []
+    assert len(index.labels) == len(set(index.labels)) == 1000
+    assert list(index.labels) == list(range(base + 500, base + 1500))
+    assert sorted(index.index.get_ids_list()) == list(index.labels)
+
+
+@pytest.mark.parametrize("with_order", [True, False])
+def test_snapshot_with_deleted_labels_reloads_and_keeps_replacing(tmp_path, with_order):
+    path = str(tmp_path / "semantic.hnsw")
+    index = SemanticIndex(DIM, path=path, memory_mb=0)
+    vectors = _vectors(1005, seed=2)
+    index.add(vectors[:1000], list(range(1, 1001)))
+    index.index.mark_deleted(500)  # e.g. a replacement that never completed
+    index.labels.remove(500)
+    index.save()
+    if not with_order:  # a snapshot written before the order was recorded
+        with open(path + ".json") as fh:
+            meta = json.load(fh)
+        del meta["labels"]
+        with open(path + ".json", "w") as fh:
+            json.dump(meta, fh)
+
+    reloaded = SemanticIndex(DIM, path=path, memory_mb=0)
+    assert 500 not in reloaded.labels and len(reloaded.labels) == 999
+
+    for i in range(5):  # at capacity: every add replaces the oldest claim
+        reloaded.add(vectors[1000 + i:1001 + i], [2000 + i])
+    assert list(reloaded.labels)[-5:] == [2000, 2001, 2002, 2003, 2004]
@@ -0,0 +1,95 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from utils import single_flight, trusted_sources
+from utils.cache_utils import make_key
+from utils.circuit_breaker import CircuitBreaker, HALF_OPEN
+from utils.single_flight import SingleFlight
+from utils.trusted_sources import SourceAdapter, fetch_source
+
+
+def test_concurrent_calls_share_one_computation():
+    flights = SingleFlight(f"test-{uuid.uuid4().hex[:6]}")
+    calls = []
+    gate = threading.Event()
+
+    def slow(x):
+        calls.append(x)
+        gate.wait(5)
+        return x * 2
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do("k", slow, 21))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join(5)
+
+    assert results == [42] * 5
+    assert calls == [21]
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_probe_answered_by_another_worker_is_released(app, monkeypatch):
+    """
+    A half-open probe whose fetch is answered by another worker (remote hit:
+    the cache was filled while we waited on the process lock) never reaches
+    breaker.record(); it must not keep the source refused.
+    """
+    adapter = SourceAdapter(f"probe_{uuid.uuid4().hex[:6]}", "Probe", "https://probe.example/?q={q}",
+                            selector="a")
+    adapter.breaker = CircuitBreaker(window=60, min_calls=1, error_rate=0.5, slow_p95=5, cooldown=0.05)
+    adapter.breaker.record(False, 0.1)
+    time.sleep(0.06)
+    query = f"claim {uuid.uuid4().hex}"
+    key = make_key(adapter.namespace, query)
+    remote = {"name": "Probe", "url": "https://probe.example/x", "snippet": "filled by another worker"}
+
+    @contextmanager
+    def other_worker_holds_lock(name, timeout):
+        trusted_sources._cache_set(key, remote, write_through=True)
+        yield True, False
+
+    def must_not_fetch(*args):
+        raise AssertionError("remote hit should not fetch")
+
+    monkeypatch.setattr(single_flight, "process_lock", other_worker_holds_lock)
+    monkeypatch.setattr(trusted_sources, "_fetch_and_store", must_not_fetch)
+
+    with app.app_context():
+        assert fetch_source(adapter, query) == remote
+
+    assert adapter.breaker.state == HALF_OPEN
+    assert adapter.breaker.allow()  # the next call may probe
+
+
+def test_follower_that_gives_up_does_not_compute():
+    flights = SingleFlight(f"test-{uuid.uuid4().hex[:6]}", timeout=0.1, compute_on_timeout=False)
+    gate = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        gate.wait(5)
+        return "fetched"
+
+    leader = threading.Thread(target=flights.do, args=("k", slow))
+    leader.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    assert flights.do("k", slow, check=lambda: None) is None
+    assert time.monotonic() - start < 1
+    gate.set()
+    leader.join(5)
+
+    assert calls == [1]
+    assert flights.stats()["gave_up"] == 1
+
+
+def test_source_followers_wait_no_longer_than_the_fan_out():
+    assert trusted_sources.source_flights.timeout == trusted_sources.SOURCES_DEADLINE
+    assert not trusted_sources.source_flights.compute_on_timeout
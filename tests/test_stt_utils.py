@@ -0,0 +1,37 @@
+import math
+import struct
+import wave
+
+import pytest
+
+pytest.importorskip("av")
+pytest.importorskip("faster_whisper")
+
+from utils.stt_utils import SAMPLING_RATE, decode_head  # noqa: E402
+
+
+def _tone(path, seconds, rate=44100):
+    with wave.open(str(path), "wb") as out:
+        out.setnchannels(2)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        frames = b"".join(
+            struct.pack("<hh", v, v)
+            for v in (int(8000 * math.sin(2 * math.pi * 440 * i / rate)) for i in range(int(seconds * rate)))
+        )
+        out.writeframes(frames)
+
+
+def test_decode_stops_at_the_cap(tmp_path):
+    path = tmp_path / "long.wav"
+    _tone(path, seconds=12)
+    audio = decode_head(str(path), max_seconds=3)
+    assert len(audio) == 3 * SAMPLING_RATE
+    assert audio.dtype.name == "float32"
+
+
+def test_uncapped_decode_reads_everything(tmp_path):
+    path = tmp_path / "short.wav"
+    _tone(path, seconds=2)
+    audio = decode_head(str(path), max_seconds=0)
+    assert abs(len(audio) - 2 * SAMPLING_RATE) < SAMPLING_RATE // 10
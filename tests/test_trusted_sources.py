@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import pytest
+import requests
+
+from utils import http_client, trusted_sources
+from utils.circuit_breaker import CLOSED
+from utils.trusted_sources import SOURCES_BY_KEY, _fetch_uncached, _attempt
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, payload=None, text=""):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = text or json.dumps(payload)
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            error = requests.exceptions.HTTPError(f"{self.status_code}")
+            error.response = self
+            raise error
+
+
+@pytest.fixture
+def wiki_responses(monkeypatch):
+    """Route http_client.get by URL: summary and search responses set per test."""
+    routes = {}
+
+    def fake_get(url, **kwargs):
+        kind = "summary" if "/page/summary/" in url else "search"
+        response = routes[kind]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(http_client, "get", fake_get)
+    return routes
+
+
+def test_wiki_summary_404_falls_back_without_error(wiki_responses):
+    wiki_responses["summary"] = FakeResponse(404, {"title": "Not found."})
+    wiki_responses["search"] = FakeResponse(200, {"pages": [{"key": "Moon_landing", "snippet": "The Moon landing"}]})
+
+    res, outcome = _fetch_uncached(SOURCES_BY_KEY["wiki"], "moon landing staged")
+
+    assert outcome == "found"
+    assert res["url"].endswith("Moon_landing")
+
+
+def test_wiki_no_page_anywhere_is_empty_not_error(wiki_responses):
+    wiki_responses["summary"] = FakeResponse(404, {"title": "Not found."})
+    wiki_responses["search"] = FakeResponse(200, {"pages": []})
+
+    assert _fetch_uncached(SOURCES_BY_KEY["wiki"], "no such claim anywhere") == (None, "empty")
+
+
+def test_outcome_is_taken_from_the_last_attempt(wiki_responses):
+    wiki_responses["summary"] = requests.exceptions.ConnectionError("reset")
+    wiki_responses["search"] = FakeResponse(200, {"pages": []})
+    assert _fetch_uncached(SOURCES_BY_KEY["wiki"], "flaky summary") == (None, "empty")
+
+    wiki_responses["summary"] = FakeResponse(404, {})
+    wiki_responses["search"] = FakeResponse(503, {})
+    assert _fetch_uncached(SOURCES_BY_KEY["wiki"], "search down") == (None, "errors")
+
+
+def test_no_result_claims_do_not_trip_the_wiki_breaker(wiki_responses):
+    adapter = trusted_sources.SourceAdapter(
+        "wiki_test", "Wikipedia", SOURCES_BY_KEY["wiki"].url_template,
+        parse=trusted_sources._parse_wiki_summary, fallback=SOURCES_BY_KEY["wiki"].fallback,
+    )
+    wiki_responses["summary"] = FakeResponse(404, {})
+    wiki_responses["search"] = FakeResponse(200, {"pages": []})
+
+    for i in range(20):
+        _attempt(adapter, f"obscure claim {i}")
+
+    assert adapter.breaker.state == CLOSED
+    assert adapter.breaker.snapshot()["error_rate"] == 0.0
+
+
+def test_async_engine_reports_like_the_sync_one(wiki_responses, monkeypatch):
+    pytest.importorskip("httpx")
+    from utils import async_http
+
+    async def fake_get(url, **kwargs):
+        return http_client.get(url, **kwargs)
+
+    monkeypatch.setattr(async_http, "get", fake_get)
+    wiki_responses["summary"] = FakeResponse(404, {})
+    wiki_responses["search"] = FakeResponse(503, {})
+    adapter = trusted_sources.SourceAdapter(
+        "wiki_async_test", "Wikipedia", SOURCES_BY_KEY["wiki"].url_template,
+        parse=trusted_sources._parse_wiki_summary, fallback=SOURCES_BY_KEY["wiki"].fallback,
+    )
+
+    assert asyncio.run(trusted_sources._attempt_async(adapter, "search down")) == _attempt(adapter, "search down")
+
+
+def test_later_claims_only_go_to_sources_that_found_nothing(monkeypatch):
+    adapters = [
+        trusted_sources.SourceAdapter(f"fan_{name}", name, "https://x.example/?q={q}", selector="a")
+        for name in ("first", "second")
+    ]
+    found = {"fan_first": "best claim", "fan_second": "next claim"}
+    calls = []
+
+    def fake_fetch(adapter, query):
+        calls.append((adapter.key, query))
+        return {"name": adapter.name, "snippet": query} if found[adapter.key] == query else None
+
+    monkeypatch.setattr(trusted_sources, "SOURCES", adapters)
+    monkeypatch.setattr(trusted_sources, "fetch_source", fake_fetch)
+    monkeypatch.setattr(trusted_sources, "extract_claim_queries", lambda q: ["best claim", "next claim"])
+
+    sources = trusted_sources.collect_trusted_sources("a long post", deadline=5)
+
+    assert sorted(calls) == [("fan_first", "best claim"), ("fan_second", "best claim"), ("fan_second", "next claim")]
+    assert sources["fan_first"]["snippet"] == "best claim"
+    assert sources["fan_second"]["snippet"] == "next claim"
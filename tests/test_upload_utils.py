@@ -0,0 +1,78 @@
+import hashlib
+import io
+import os
+
+import pytest
+from flask import Flask, request
+
+from utils import upload_utils
+from utils.upload_utils import UploadRequest, accept_upload
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """An /analyze stand-in that accepts the "file" field unless type=reject; returns (client, accepted)."""
+    monkeypatch.setattr(upload_utils, "UPLOAD_FOLDER", str(tmp_path))
+    app = Flask(__name__)
+    app.request_class = UploadRequest
+    accepted = []
+
+    @app.route("/analyze", methods=["POST"])
+    def analyze():
+        if request.form.get("type") == "reject":  # parses the body, like the real view
+            return "rejected", 400
+        upload = accept_upload(request.files["file"])
+        accepted.append(upload)
+        return upload.digest
+
+    return app.test_client(), accepted
+
+
+def test_image_is_hashed_in_memory(client, tmp_path):
+    client, accepted = client
+    data = os.urandom(4096)
+    response = client.post("/analyze", data={"file": (io.BytesIO(data), "shot.png")})
+
+    assert response.get_data(as_text=True) == _digest(data)
+    assert accepted[0].data == data and accepted[0].path is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_video_is_spooled_once_and_kept_for_the_job(client, tmp_path):
+    client, accepted = client
+    data = os.urandom(256 * 1024)
+    response = client.post("/analyze", data={"file": (io.BytesIO(data), "clip.mp4")})
+
+    upload = accepted[0]
+    assert response.get_data(as_text=True) == _digest(data) == upload.digest
+    assert os.listdir(tmp_path) == [os.path.basename(upload.path)]
+    with open(upload.path, "rb") as fh:
+        assert fh.read() == data
+
+    upload.cleanup()
+    assert os.listdir(tmp_path) == []
+
+
+def test_spools_not_handed_to_a_job_are_removed(client, tmp_path):
+    client, accepted = client
+    response = client.post("/analyze", data={
+        "file": (io.BytesIO(b"a" * 1024), "clip.mp4"),
+        "extra": (io.BytesIO(b"b" * 1024), "other.mp4"),  # a field analyze never reads
+    })
+
+    assert response.status_code == 200
+    assert os.listdir(tmp_path) == [os.path.basename(accepted[0].path)]
+    accepted[0].cleanup()
+
+
+def test_rejected_request_leaves_nothing_behind(client, tmp_path):
+    client, accepted = client
+    response = client.post("/analyze", data={"type": "reject", "file": (io.BytesIO(b"a" * 1024), "clip.mp4")})
+
+    assert response.status_code == 400
+    assert accepted == []
+    assert os.listdir(tmp_path) == []
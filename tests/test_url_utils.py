@@ -0,0 +1,99 @@
+import pytest
+
+from utils import url_utils
+from utils.url_utils import PageTextExtractor, fetch_url_text
+
+
+class FakeResponse:
+    """Streams body in fixed chunks and counts how many were read."""
+
+    def __init__(self, body, content_type="text/html; charset=utf-8", chunk=1024):
+        self.body = body.encode("utf-8") if isinstance(body, str) else body
+        self.headers = {"Content-Type": content_type}
+        self.encoding = "utf-8"
+        self.chunk = chunk
+        self.chunks_read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=None):
+        for i in range(0, len(self.body), self.chunk):
+            self.chunks_read += 1
+            yield self.body[i:i + self.chunk]
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    def serve(response):
+        monkeypatch.setattr(url_utils.http_client, "get", lambda url, **kwargs: response)
+        return response
+    return serve
+
+
+def _extract(html, max_chars=10_000):
+    parser = PageTextExtractor(max_chars=max_chars)
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+
+def test_script_and_style_content_is_skipped():
+    text = _extract(
+        "<html><head><style>body { color: red }</style><script>var claim = 1;</script></head>"
+        "<body><p>The bridge opened in 1932.</p><noscript>enable js</noscript></body></html>"
+    )
+    assert text == "The bridge opened in 1932."
+
+
+def test_article_text_is_preferred_over_page_chrome():
+    article = "Officials confirmed the figures on Monday. " * 10
+    text = _extract(f"<nav>Home | News</nav><p>Sidebar teaser</p><article><p>{article}</p></article>")
+    assert text == article.strip()
+    assert _extract("<nav>Home | News</nav>") == "Home | News"  # chrome only as a fallback
+
+
+def test_fetch_stops_once_enough_text_is_collected(serve):
+    paragraph = "<p>" + "word " * 50 + "</p>"
+    response = serve(FakeResponse("<html><body>" + paragraph * 500 + "</body></html>"))
+
+    text = fetch_url_text("https://example.com", max_chars=500)
+
+    assert len(text) <= 500
+    assert response.chunks_read < len(response.body) // response.chunk
+
+
+def test_fetch_stops_at_the_byte_cap(serve):
+    response = serve(FakeResponse("<p>" + "x" * 100_000 + "</p>"))
+
+    fetch_url_text("https://example.com", max_bytes=4096, max_chars=1_000_000)
+
+    assert response.chunks_read == 4
+
+
+def test_plain_text_is_returned_as_is_up_to_the_cap(serve):
+    response = serve(FakeResponse("<b>not html</b> " * 1000, content_type="text/plain"))
+
+    text = fetch_url_text("https://example.com", max_chars=100)
+
+    assert text == ("<b>not html</b> " * 1000)[:100]
+    assert response.chunks_read == 1
+
+
+def test_non_text_content_type_is_refused(serve):
+    response = serve(FakeResponse(b"%PDF-1.7 ...", content_type="application/pdf"))
+
+    with pytest.raises(ValueError, match="application/pdf"):
+        fetch_url_text("https://example.com/report.pdf")
+    assert response.chunks_read == 0
+
+
+def test_missing_charset_decodes_as_utf8(serve):
+    serve(FakeResponse("<p>Café prices rose 5%</p>".encode("utf-8"), content_type="text/html"))
+    assert fetch_url_text("https://example.com") == "Café prices rose 5%"
@@ -0,0 +1,59 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from utils import stt_utils, video_utils  # noqa: E402
+
+
+class FakeClip:
+    """The same still frame over and over, each one slow to decode."""
+
+    def __init__(self, frames, delay):
+        self.duration = frames
+        self.frames = frames
+        self.delay = delay
+        self.decoded = 0
+
+    def iter_frames(self, fps, with_times, dtype):
+        still = np.full((48, 64, 3), 128, dtype=np.uint8)
+        for i in range(self.frames):
+            time.sleep(self.delay)
+            self.decoded += 1
+            yield i, still
+
+
+@pytest.fixture(autouse=True)
+def _imaging(monkeypatch):
+    # video_utils only imports these alongside moviepy
+    monkeypatch.setattr(video_utils, "Image", Image, raising=False)
+    monkeypatch.setattr(video_utils, "np", np, raising=False)
+
+
+def test_deadline_checked_on_skipped_frames():
+    clip = FakeClip(frames=200, delay=0.01)
+    kept = list(video_utils.sample_frames(clip, deadline=time.monotonic() + 0.2))
+    assert len(kept) == 1  # every later frame is a duplicate of the first
+    assert clip.decoded < 50
+
+
+def test_audio_stage_stops_at_deadline(monkeypatch):
+    produced = []
+
+    def segments():
+        for i in range(100):
+            time.sleep(0.02)
+            produced.append(i)
+            yield SimpleNamespace(text=f"segment {i}")
+
+    model = SimpleNamespace(transcribe=lambda audio, **kwargs: (segments(), None))
+    monkeypatch.setattr(stt_utils, "get_model", lambda: model)
+    monkeypatch.setattr(stt_utils, "decode_head", lambda fp, max_seconds: [0.0])
+    monkeypatch.setattr(video_utils, "transcription_available", lambda: True)
+
+    text = video_utils._audio_stage("clip.mp4", time.monotonic() + 0.2)
+    assert text.startswith("segment 0 segment 1")
+    assert len(produced) < 50
@@ -1,72 +1,41 @@
 import os
 import json
-import requests
 import re
 import logging
-from transformers import pipeline
-from utils.trusted_sources import collect_trusted_sources
+import asyncio
+from collections import namedtuple
+from utils import http_client, async_http, metrics
+from utils.async_runtime import drive, drive_async
+from utils.classifier_service import get_classifier
+from utils.stt_utils import transcribe_file
+from utils.trusted_sources import collect_trusted_sources, collect_trusted_sources_async, source_weight
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # ✅ Load OpenAI API key
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 
-# ✅ FREE HuggingFace model (backup only)
-try:
-    classifier = pipeline(
-        "zero-shot-classification",
-        model="facebook/bart-large-mnli"
-    )
-except:
-    classifier = None
+# ✅ FREE HuggingFace model (backup only) - loaded on first use, see utils/classifier_service.py
 
-def transcribe_audio_path(fp):
-    return ""
+def transcribe_audio_path(fp, deadline=None):
+    return transcribe_file(fp, deadline)   # offline CPU Whisper, see stt_utils
 
 
 def search_wikipedia_snippet(text):
     return None   # handled in trusted_sources
 
 
-def extract_key_claims(text):
-    """Extract key factual claims from text for better matching"""
-    # Simple keyword extraction - can be enhanced
-    text_lower = text.lower()
-    # Look for common claim patterns
-    claims = []
-    sentences = re.split(r'[.!?]+', text)
-    for sent in sentences[:10]:  # Limit to first 10 sentences
-        sent = sent.strip()
-        if len(sent) > 20 and any(word in sent.lower() for word in ['claim', 'said', 'reports', 'according', 'alleged']):
-            claims.append(sent[:200])
-    return claims[:3]  # Top 3 claims
-
-
 def analyze_source_reliability(sources):
     """Calculate reliability score based on source quality and quantity"""
-    reliability_scores = {
-        "snopes": 98,
-        "factcheck": 97,
-        "politifact": 96,
-        "altnews": 95,
-        "boom": 94,
-        "reuters": 92,
-        "bbc": 92,
-        "google_news": 75,
-        "wiki": 80
-    }
-    
     found_sources = []
     total_score = 0
     count = 0
     
-    logger.info(f"Analyzing {len(sources)} source entries")
+    logger.debug(f"Analyzing {len(sources)} source entries")
     
     for key, source in sources.items():
         if source and source.get("snippet"):
-            score = reliability_scores.get(key, 70)
+            score = source_weight(key)  # per-source weight from the adapter registry
             found_sources.append({
                 "name": source.get("name", key),
                 "url": source.get("url", ""),
@@ -75,14 +44,14 @@ def analyze_source_reliability(sources):
             })
             total_score += score
             count += 1
-            logger.info(f"Added source: {key} - {source.get('name', 'Unknown')}")
+            logger.debug(f"Added source: {key} - {source.get('name', 'Unknown')}")
         elif source:
-            logger.warning(f"Source {key} found but missing snippet: {source}")
+            logger.debug(f"Source {key} found but missing snippet: {source}")
         else:
             logger.debug(f"Source {key} is None")
     
     avg_reliability = total_score / count if count > 0 else 0
-    logger.info(f"Source analysis complete: {count} valid sources, avg reliability: {avg_reliability:.1f}%")
+    logger.debug(f"Source analysis complete: {count} valid sources, avg reliability: {avg_reliability:.1f}%")
     return found_sources, avg_reliability, count
 
 
@@ -133,19 +102,15 @@ def check_true_indicators(text, sources):
     return true_count, true_sources
 
 
-def ask_openai_gpt4(text, sources_summary):
-    """Use OpenAI GPT-4 for advanced fact-checking with high confidence"""
-    if not OPENAI_API_KEY:
-        return None
+def _openai_request(text, sources_summary):
+    """Headers and JSON payload of the GPT-4 fact-check call."""
+    # Build comprehensive prompt
+    sources_text = "\n".join([
+        f"- {s['name']}: {s['snippet'][:150]}" 
+        for s in sources_summary[:5]
+    ])
     
-    try:
-        # Build comprehensive prompt
-        sources_text = "\n".join([
-            f"- {s['name']}: {s['snippet'][:150]}" 
-            for s in sources_summary[:5]
-        ])
-        
-        prompt = f"""You are an expert fact-checker. Analyze the following claim and provide a detailed verdict.
+    prompt = f"""You are an expert fact-checker. Analyze the following claim and provide a detailed verdict.
 
 CLAIM TO VERIFY:
 {text[:1500]}
@@ -167,86 +132,108 @@ If multiple reputable news sources (Reuters, BBC) confirm this, mark as "true" w
 If evidence is mixed or insufficient, mark as "unknown" with confidence 40-60.
 Always provide detailed reasoning."""
 
-        headers = {
-            "Authorization": f"Bearer {OPENAI_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": "gpt-4-turbo-preview",  # or "gpt-4" if turbo not available
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are a professional fact-checker. Always respond with valid JSON only, no additional text."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.2,  # Lower temperature for more consistent, factual responses
-            "max_tokens": 800
-        }
-        
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=15
-        )
+    headers = {
+        "Authorization": f"Bearer {OPENAI_API_KEY}",
+        "Content-Type": "application/json"
+    }
+    
+    payload = {
+        "model": "gpt-4-turbo-preview",  # or "gpt-4" if turbo not available
+        "messages": [
+            {
+                "role": "system",
+                "content": "You are a professional fact-checker. Always respond with valid JSON only, no additional text."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        "temperature": 0.2,  # Lower temperature for more consistent, factual responses
+        "max_tokens": 800
+    }
+    return headers, payload
+
+
+def _openai_verdict(response):
+    """Verdict dict from a chat-completions response, or None."""
+    if response.status_code == 200:
+        result = response.json()
+        content = result["choices"][0]["message"]["content"].strip()
         
-        if response.status_code == 200:
-            result = response.json()
-            content = result["choices"][0]["message"]["content"].strip()
-            
-            # Extract JSON from response (handle cases where GPT adds extra text)
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                verdict = json.loads(json_match.group())
-                return verdict
-        else:
-            print(f"OpenAI API error: {response.status_code}")
-            return None
-            
+        # Extract JSON from response (handle cases where GPT adds extra text)
+        json_match = re.search(r'\{.*\}', content, re.DOTALL)
+        if json_match:
+            verdict = json.loads(json_match.group())
+            return verdict
+    else:
+        logger.warning(f"OpenAI API error: {response.status_code}")
+        return None
+
+
+OPENAI_URL = "https://api.openai.com/v1/chat/completions"
+
+
+def ask_openai_gpt4(text, sources_summary):
+    """Use OpenAI GPT-4 for advanced fact-checking with high confidence"""
+    if not OPENAI_API_KEY:
+        return None
+    try:
+        headers, payload = _openai_request(text, sources_summary)
+        with metrics.span("llm"):
+            response = http_client.post(OPENAI_URL, headers=headers, json=payload)
+        return _openai_verdict(response)
     except Exception as e:
-        print(f"OpenAI API exception: {str(e)}")
+        logger.warning(f"OpenAI API exception: {str(e)}")
         return None
 
 
-def ask_llm_for_verdict(text, collected):
-    """
-    ENHANCED FACT CHECKING LOGIC WITH 99% CONFIDENCE CAPABILITY
-    Priority:
-    1. Multiple fact-check sites debunk → FAKE (95-99% confidence)
-    2. Multiple reputable sources confirm → TRUE (90-99% confidence)
-    3. OpenAI GPT-4 analysis → Advanced reasoning (85-99% confidence)
-    4. Ensemble scoring from all sources → Weighted confidence
-    5. HF model backup → Lower confidence (60-80%)
-    """
+async def ask_openai_gpt4_async(text, sources_summary):
+    """ask_openai_gpt4() over the async HTTP client."""
+    if not OPENAI_API_KEY:
+        return None
+    try:
+        headers, payload = _openai_request(text, sources_summary)
+        with metrics.span("llm"):
+            response = await async_http.post(OPENAI_URL, headers=headers, json=payload)
+        return _openai_verdict(response)
+    except Exception as e:
+        logger.warning(f"OpenAI API exception: {str(e)}")
+        return None
 
-    text_query = (text or "").strip()
 
-    if not text_query:
-        return {
-            "status": "unknown",
-            "confidence": 40,
-            "reasoning": "No text provided.",
-            "sources": [],
-            "risk_score": 50
-        }
+Evidence = namedtuple("Evidence", [
+    "found_sources", "avg_reliability", "source_count",
+    "fake_count", "fake_sources", "true_count", "true_sources",
+])
 
-    # ✅ Use provided sources or collect trusted sources
-    if collected and isinstance(collected, dict) and len(collected) > 0:
-        logger.info(f"Using provided sources dictionary with {len(collected)} entries")
-        sources = collected
-    else:
-        logger.info(f"Starting fact-check for query: {text_query[:100]}")
-        sources = collect_trusted_sources(text_query)
-        logger.info(f"Collected sources dictionary with {len(sources)} entries")
-    
+NO_TEXT_VERDICT = {
+    "status": "unknown",
+    "confidence": 40,
+    "reasoning": "No text provided.",
+    "sources": [],
+    "risk_score": 50
+}
+
+NO_EVIDENCE_VERDICT = {
+    "status": "unknown",
+    "confidence": 40,
+    "reasoning": "No evidence found from trusted sources. Unable to verify claim.",
+    "sources": [],
+    "risk_score": 50
+}
+
+
+def is_settled(verdict):
+    """False for the placeholder verdicts given when there was nothing to judge the claim on."""
+    return verdict.get("reasoning") not in (NO_TEXT_VERDICT["reasoning"], NO_EVIDENCE_VERDICT["reasoning"])
+
+
+def _weigh_sources(text_query, sources):
+    """Reliability and fake/true indicators of the collected sources."""
     # ✅ Analyze source reliability
     found_sources, avg_reliability, source_count = analyze_source_reliability(sources)
-    logger.info(f"After analysis: {source_count} sources found, {len(found_sources)} sources in list")
+    logger.debug(f"After analysis: {source_count} sources found, {len(found_sources)} sources in list")
     
     # ✅ Check for fake indicators
     fake_count, fake_sources = check_fake_indicators(text_query, sources)
@@ -254,6 +241,15 @@ def ask_llm_for_verdict(text, collected):
     # ✅ Check for true indicators
     true_count, true_sources = check_true_indicators(text_query, sources)
     
+    return Evidence(found_sources, avg_reliability, source_count,
+                    fake_count, fake_sources, true_count, true_sources)
+
+
+def _verdict_from_sources(evidence):
+    """Priorities 1-3: verdicts the sources settle on their own, or None."""
+    (found_sources, avg_reliability, source_count,
+     fake_count, fake_sources, true_count, true_sources) = evidence
+
     # ✅ PRIORITY 1: Multiple fact-check sites debunk → HIGH CONFIDENCE FAKE
     if fake_count >= 2:
         confidence = min(95 + fake_count, 99)  # 95-99% confidence
@@ -288,28 +284,40 @@ def ask_llm_for_verdict(text, collected):
             "sources": true_sources[:5],
             "risk_score": max(100 - confidence, 1)
         }
-    
-    # ✅ PRIORITY 4: OpenAI GPT-4 Advanced Analysis
-    if OPENAI_API_KEY and found_sources:
-        gpt4_result = ask_openai_gpt4(text_query, found_sources)
-        if gpt4_result:
-            # Enhance confidence based on source reliability
-            base_confidence = gpt4_result.get("confidence", 70)
-            if avg_reliability > 85 and source_count >= 2:
-                # Boost confidence if we have high-quality sources
-                enhanced_confidence = min(base_confidence + 5, 99)
-            else:
-                enhanced_confidence = base_confidence
-            
-            return {
-                "status": gpt4_result.get("status", "unknown"),
-                "confidence": enhanced_confidence,
-                "reasoning": gpt4_result.get("reasoning", "AI analysis completed."),
-                "sources": found_sources[:5],
-                "risk_score": gpt4_result.get("risk_score", 50),
-                "key_evidence": gpt4_result.get("key_evidence", [])
-            }
-    
+
+    return None
+
+
+def _verdict_from_gpt4(evidence, gpt4_result):
+    """Priority 4: shape a GPT-4 result, or None if there is none."""
+    (found_sources, avg_reliability, source_count,
+     fake_count, fake_sources, true_count, true_sources) = evidence
+
+    if gpt4_result:
+        # Enhance confidence based on source reliability
+        base_confidence = gpt4_result.get("confidence", 70)
+        if avg_reliability > 85 and source_count >= 2:
+            # Boost confidence if we have high-quality sources
+            enhanced_confidence = min(base_confidence + 5, 99)
+        else:
+            enhanced_confidence = base_confidence
+        
+        return {
+            "status": gpt4_result.get("status", "unknown"),
+            "confidence": enhanced_confidence,
+            "reasoning": gpt4_result.get("reasoning", "AI analysis completed."),
+            "sources": found_sources[:5],
+            "risk_score": gpt4_result.get("risk_score", 50),
+            "key_evidence": gpt4_result.get("key_evidence", [])
+        }
+    return None
+
+
+def _fallback_verdict(text_query, evidence):
+    """Priorities 5-8: ensemble, single source, classifier, fallbacks."""
+    (found_sources, avg_reliability, source_count,
+     fake_count, fake_sources, true_count, true_sources) = evidence
+
     # ✅ PRIORITY 5: Ensemble Scoring - Combine multiple sources
     if source_count >= 2:
         # Calculate weighted confidence based on source reliability
@@ -364,12 +372,14 @@ def ask_llm_for_verdict(text, collected):
                 }
     
     # ✅ PRIORITY 7: HuggingFace Model Backup
+    classifier = get_classifier()
     if classifier:
         try:
-            result = classifier(
-                text_query[:500],
-                candidate_labels=["true", "fake", "unknown"]
-            )
+            with metrics.span("classifier"):
+                result = classifier(
+                    text_query[:500],
+                    candidate_labels=["true", "fake", "unknown"]
+                )
 
             status = result["labels"][0]
             base_confidence = int(result["scores"][0] * 100)
@@ -388,7 +398,7 @@ def ask_llm_for_verdict(text, collected):
                 "risk_score": 100 - enhanced_confidence if status == "fake" else enhanced_confidence
             }
         except Exception as e:
-            print(f"Classifier error: {str(e)}")
+            logger.warning(f"Classifier error: {str(e)}")
     
     # ✅ PRIORITY 8: Final fallback with any found sources
     if found_sources:
@@ -401,10 +411,74 @@ def ask_llm_for_verdict(text, collected):
         }
     
     # ✅ FINAL FALLBACK
-    return {
-        "status": "unknown",
-        "confidence": 40,
-        "reasoning": "No evidence found from trusted sources. Unable to verify claim.",
-        "sources": [],
-        "risk_score": 50
-    }
+    return dict(NO_EVIDENCE_VERDICT)
+
+
+def _verdict_plan(text, collected):
+    """
+    The priorities of ask_llm_for_verdict() as a plan (see utils/async_runtime.py):
+    yields ("sources", ...) when no sources were provided, ("gpt4", ...) and
+    ("fallback", ...); returns the verdict.
+    """
+    text_query = (text or "").strip()
+
+    if not text_query:
+        return dict(NO_TEXT_VERDICT)
+
+    # ✅ Use provided sources or collect trusted sources
+    if collected and isinstance(collected, dict) and len(collected) > 0:
+        logger.debug(f"Using provided sources dictionary with {len(collected)} entries")
+        sources = collected
+    else:
+        logger.debug(f"Starting fact-check for query: {text_query[:100]}")
+        sources = yield "sources", (text_query,)
+        logger.debug(f"Collected sources dictionary with {len(sources)} entries")
+
+    evidence = _weigh_sources(text_query, sources)
+    verdict = _verdict_from_sources(evidence)
+    if verdict:
+        return verdict
+
+    # ✅ PRIORITY 4: OpenAI GPT-4 Advanced Analysis
+    found_sources = evidence.found_sources
+    if OPENAI_API_KEY and found_sources:
+        verdict = _verdict_from_gpt4(evidence, (yield "gpt4", (text_query, found_sources)))
+        if verdict:
+            return verdict
+
+    return (yield "fallback", (text_query, evidence))
+
+
+def ask_llm_for_verdict(text, collected):
+    """
+    ENHANCED FACT CHECKING LOGIC WITH 99% CONFIDENCE CAPABILITY
+    Priority:
+    1. Multiple fact-check sites debunk → FAKE (95-99% confidence)
+    2. Multiple reputable sources confirm → TRUE (90-99% confidence)
+    3. OpenAI GPT-4 analysis → Advanced reasoning (85-99% confidence)
+    4. Ensemble scoring from all sources → Weighted confidence
+    5. HF model backup → Lower confidence (60-80%)
+    """
+    return drive(_verdict_plan(text, collected), {
+        "sources": collect_trusted_sources,
+        "gpt4": ask_openai_gpt4,
+        "fallback": _fallback_verdict,
+    })
+
+
+async def ask_llm_for_verdict_async(text, collected, app=None):
+    """
+    ask_llm_for_verdict() for the asyncio pipeline: sources and GPT-4 are
+    awaited, the classifier fallback runs on a worker thread.
+    """
+    async def sources(query):
+        return await collect_trusted_sources_async(query, app=app)
+
+    async def fallback(query, evidence):
+        return await asyncio.to_thread(_fallback_verdict, query, evidence)
+
+    return await drive_async(_verdict_plan(text, collected), {
+        "sources": sources,
+        "gpt4": ask_openai_gpt4_async,
+        "fallback": fallback,
+    })
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+try:
+    import httpx
+    HTTPX_OK = True
+except Exception:
+    HTTPX_OK = False
+
+from config import ASYNC_MAX_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_RETRIES
+from utils.http_client import DEFAULT_HEADERS, timeout_for
+
+# Async counterpart of utils/http_client.py for the asyncio pipeline.
+# httpx clients are bound to the event loop they were first used on, so there
+# is one per loop (in practice: the one in utils/async_runtime.py). Per-host
+# timeouts and default headers are the same as the sync client's.
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def _client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        with _lock:
+            client = _clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(
+                    headers=DEFAULT_HEADERS,
+                    limits=httpx.Limits(
+                        max_connections=ASYNC_MAX_CONNECTIONS,
+                        max_keepalive_connections=HTTP_POOL_MAXSIZE * 4,
+                    ),
+                    transport=httpx.AsyncHTTPTransport(retries=HTTP_RETRIES),  # connect errors only
+                    follow_redirects=True,
+                )
+                _clients[loop] = client
+    return client
+
+
+def _timeout(url, timeout):
+    connect, read = timeout if timeout is not None else timeout_for(url)
+    return httpx.Timeout(read, connect=connect)
+
+
+async def request(method, url, timeout=None, **kwargs):
+    """Like http_client.request, but awaitable. timeout is (connect, read) seconds."""
+    return await _client().request(method, url, timeout=_timeout(url, timeout), **kwargs)
+
+
+async def get(url, **kwargs):
+    return await request("GET", url, **kwargs)
+
+
+async def post(url, **kwargs):
+    return await request("POST", url, **kwargs)
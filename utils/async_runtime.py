@@ -0,0 +1,83 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import ASYNC_PIPELINE, ASYNC_THREADS
+from utils.async_http import HTTPX_OK
+
+# One long-lived event loop per process, on a daemon thread, for the asyncio
+# pipeline. Started lazily (and again after a fork) like the cache threads.
+
+_loop = None
+_loop_pid = None
+_lock = threading.Lock()
+
+
+def available():
+    return HTTPX_OK and ASYNC_PIPELINE != "off"
+
+
+def get_loop():
+    global _loop, _loop_pid
+    if _loop_pid != os.getpid():
+        with _lock:
+            if _loop_pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                loop.set_default_executor(
+                    ThreadPoolExecutor(max_workers=ASYNC_THREADS, thread_name_prefix="satya-async-io")
+                )
+                threading.Thread(target=loop.run_forever, name="satya-async", daemon=True).start()
+                _loop, _loop_pid = loop, os.getpid()
+    return _loop
+
+
+def submit(coro):
+    """Schedule a coroutine on the process loop; returns a concurrent.futures.Future."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def run(coro, timeout=None):
+    """Run a coroutine on the process loop and wait for its result (from a non-loop thread)."""
+    return submit(coro).result(timeout)
+
+
+def in_app(app, fn, *args):
+    """Call fn(*args) inside app's context (for work handed to worker threads)."""
+    if app is None:
+        return fn(*args)
+    with app.app_context():
+        return fn(*args)
+
+
+# A "plan" holds the control flow that the sync and async engines share,
+# without the I/O: a generator that yields (need, args) and is sent back
+# handlers[need](*args), or has the handler's exception thrown in. Each engine
+# drives the same plan with its own handlers, so the two cannot drift apart.
+
+def drive(plan, handlers):
+    """Run a plan with plain handlers; returns what the plan returns."""
+    reply, error = None, None
+    while True:
+        try:
+            need, args = plan.throw(error) if error is not None else plan.send(reply)
+        except StopIteration as done:
+            return done.value
+        try:
+            reply, error = handlers[need](*args), None
+        except Exception as e:
+            reply, error = None, e
+
+
+async def drive_async(plan, handlers):
+    """drive() with coroutine handlers."""
+    reply, error = None, None
+    while True:
+        try:
+            need, args = plan.throw(error) if error is not None else plan.send(reply)
+        except StopIteration as done:
+            return done.value
+        try:
+            reply, error = await handlers[need](*args), None
+        except Exception as e:
+            reply, error = None, e
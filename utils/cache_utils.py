@@ -0,0 +1,430 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask import has_app_context
+
+from config import (
+    CACHE_TTL, CACHE_HARD_TTL, CACHE_MEMORY_MAX_ENTRIES, CACHE_MEMORY_MAX_BYTES,
+    CACHE_FLUSH_INTERVAL, CACHE_FLUSH_BATCH,
+    CACHE_SWEEP_INTERVAL, CACHE_SWEEP_BATCH, VERDICT_CACHE_TTL,
+)
+from models import CacheEntry, db
+
+logger = logging.getLogger(__name__)
+
+
+# Namespaces whose entries live longer/shorter than CACHE_TTL. These are
+# never served stale: their TTL is also their hard expiry.
+NAMESPACE_TTLS = {
+    "verdict": VERDICT_CACHE_TTL,
+    "verdict_file": VERDICT_CACHE_TTL,
+}
+
+_WS_RE = re.compile(r"\s+")
+_ZERO_WIDTH_RE = re.compile("[\u200b\u200c\u200d\u2060\ufeff]")
+_HASHED_KEY_RE = re.compile(r"^[a-z0-9_]+:[0-9a-f]{32}$")
+
+
+def normalize_query(text):
+    """Canonical form of a query: NFKC, case-folded, zero-width chars dropped, whitespace collapsed."""
+    text = unicodedata.normalize("NFKC", text or "")
+    text = _ZERO_WIDTH_RE.sub("", text).casefold()
+    return _WS_RE.sub(" ", text).strip()
+
+
+def make_key(namespace, query):
+    """Fixed-width cache key: `<namespace>:<128-bit blake2b of the normalized query>`."""
+    digest = hashlib.blake2b(normalize_query(query).encode("utf-8"), digest_size=16).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+def ttl_for(key):
+    """Seconds an entry is fresh."""
+    return NAMESPACE_TTLS.get(key.partition(":")[0], CACHE_TTL)
+
+
+def hard_ttl_for(key):
+    """Seconds an entry may be served at all (stale after ttl_for)."""
+    namespace = key.partition(":")[0]
+    if namespace in NAMESPACE_TTLS:
+        return NAMESPACE_TTLS[namespace]
+    return max(CACHE_HARD_TTL, CACHE_TTL)
+
+
+def _lifetimes(key, written_at):
+    return (
+        written_at + timedelta(seconds=ttl_for(key)),
+        written_at + timedelta(seconds=hard_ttl_for(key)),
+    )
+
+
+class MemoryCache:
+    """
+    Thread-safe LRU with per-entry fresh/hard expiry, bounded by entry count
+    and by the approximate size of the stored JSON text.
+    """
+
+    def __init__(self, max_entries, max_bytes, ttl):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (text, fresh_until, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _size(key, text):
+        return len(key) + len(text)
+
+    def get(self, key, now):
+        """Return (text, fresh_until), or None once the entry is past its hard expiry."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            text, fresh_until, expires_at = item
+            if expires_at <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return text, fresh_until
+
+    def put(self, key, text, fresh_until, expires_at):
+        size = self._size(key, text)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (text, fresh_until, expires_at)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                old_key = next(iter(self._data))
+                self._remove(old_key)
+                self.evictions += 1
+
+    def _remove(self, key):
+        text, _, _ = self._data.pop(key)
+        self._bytes -= self._size(key, text)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+memory_cache = MemoryCache(CACHE_MEMORY_MAX_ENTRIES, CACHE_MEMORY_MAX_BYTES, CACHE_TTL)
+
+# Write-behind buffer for the `cache` table: key -> (text, written_at).
+_pending = {}
+_pending_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_wake = threading.Event()
+_app = None
+_flusher_pid = None
+_extra_sweeps = []  # other tables' retention sweeps, see add_sweep()
+_stats = {
+    "db_hits": 0, "db_misses": 0, "stale_hits": 0, "flushes": 0, "rows_flushed": 0, "flush_errors": 0,
+    "sweeps": 0, "rows_swept": 0,
+}
+
+
+def init_app(app):
+    """Register the Flask app used by the background flusher to reach the DB."""
+    global _app
+    _app = app
+
+
+def _ensure_flusher():
+    # Started lazily (and again after a fork) so every gunicorn worker gets its own threads.
+    global _flusher_pid
+    if _app is None or _flusher_pid == os.getpid():
+        return
+    _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_loop, name="satya-cache-flush", daemon=True).start()
+    if CACHE_SWEEP_INTERVAL > 0:
+        threading.Thread(target=_sweep_loop, name="satya-cache-sweep", daemon=True).start()
+
+
+def _flush_loop():
+    while True:
+        _wake.wait(CACHE_FLUSH_INTERVAL)
+        _wake.clear()
+        try:
+            with _app.app_context():
+                flush()
+        except Exception as e:
+            logger.error(f"Cache flush failed: {str(e)}")
+
+
+def _sweep_loop():
+    while True:
+        time.sleep(CACHE_SWEEP_INTERVAL)
+        for sweep in (sweep_expired, *_extra_sweeps):
+            try:
+                with _app.app_context():
+                    sweep()
+            except Exception as e:
+                logger.error(f"Sweep {sweep.__name__} failed: {str(e)}")
+
+
+def add_sweep(fn):
+    """Run fn() (in an app context) on the sweeper thread after each cache sweep."""
+    _extra_sweeps.append(fn)
+
+
+def cache_get(key):
+    """Return the cached value for key if it is fresh, or None. Checks memory first, then the DB."""
+    value, stale = cache_lookup(key)
+    return None if stale else value
+
+
+def cache_lookup(key):
+    """
+    Return (value, stale). A stale value is past its TTL but not its hard
+    expiry: callers may serve it while they refresh it. (None, False) on a miss.
+    """
+    now = datetime.utcnow()
+    item = memory_cache.get(key, now)
+    if item is None:
+        with _pending_lock:
+            pending = _pending.get(key)
+        if pending is not None:
+            text, written_at = pending
+            fresh_until, expires_at = _lifetimes(key, written_at)
+            memory_cache.put(key, text, fresh_until, expires_at)
+            item = (text, fresh_until)
+        else:
+            item = _db_get(key, now)
+    if item is None:
+        return None, False
+    text, fresh_until = item
+    try:
+        value = json.loads(text)
+    except Exception:
+        return None, False
+    stale = fresh_until <= now
+    if stale:
+        _stats["stale_hits"] += 1
+    return value, stale
+
+
+def _db_get(key, now):
+    if not has_app_context():
+        return None
+    entry = CacheEntry.query.filter_by(key=key).first()
+    if not entry or entry.timestamp is None:
+        _stats["db_misses"] += 1
+        return None
+    fresh_until, expires_at = _lifetimes(key, entry.timestamp)
+    if expires_at <= now:
+        # Expired rows are left for sweep_expired(); reads never write.
+        _stats["db_misses"] += 1
+        return None
+    _stats["db_hits"] += 1
+    memory_cache.put(key, entry.value, fresh_until, expires_at)
+    return entry.value, fresh_until
+
+
+def cache_set(key, value, write_through=False):
+    """
+    Store value in memory right away and queue it for the DB (write-behind).
+    write_through=True commits this key before returning, for results other
+    processes are waiting on (see utils/single_flight.py).
+    """
+    text = json.dumps(value)
+    now = datetime.utcnow()
+    memory_cache.put(key, text, *_lifetimes(key, now))
+    with _pending_lock:
+        _pending[key] = (text, now)
+        backlog = len(_pending)
+
+    if write_through and has_app_context():
+        flush([key])
+    if _app is None:
+        # No background flusher registered (scripts, shell): write through.
+        if has_app_context():
+            flush()
+        return
+    _ensure_flusher()
+    if backlog >= CACHE_FLUSH_BATCH:
+        _wake.set()
+
+
+def flush(keys=None):
+    """Write pending entries (all, or just `keys`) in one transaction. Needs an app context."""
+    with _flush_lock:
+        with _pending_lock:
+            if keys is None:
+                batch = dict(_pending)
+                _pending.clear()
+            else:
+                batch = {k: _pending.pop(k) for k in keys if k in _pending}
+            if not batch:
+                return 0
+        try:
+            existing = {
+                e.key: e for e in CacheEntry.query.filter(CacheEntry.key.in_(list(batch))).all()
+            }
+            for key, (text, written_at) in batch.items():
+                entry = existing.get(key)
+                if entry:
+                    entry.value = text
+                    entry.timestamp = written_at
+                else:
+                    db.session.add(CacheEntry(key=key, value=text, timestamp=written_at))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            _stats["flush_errors"] += 1
+            logger.error(f"Cache flush of {len(batch)} entries failed: {str(e)}")
+            # Put the batch back (unless newer values arrived meanwhile), but
+            # never let a broken DB grow the buffer without bound.
+            with _pending_lock:
+                for key, item in batch.items():
+                    if len(_pending) >= CACHE_FLUSH_BATCH * 10:
+                        break
+                    _pending.setdefault(key, item)
+            return 0
+        _stats["flushes"] += 1
+        _stats["rows_flushed"] += len(batch)
+        return len(batch)
+
+
+def _flush_at_exit():
+    if _app is None:
+        return
+    try:
+        with _app.app_context():
+            flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
+
+
+def cache_stats():
+    with _pending_lock:
+        pending = len(_pending)
+    return {
+        "memory": memory_cache.stats(),
+        "db": dict(_stats),
+        "pending_writes": pending,
+    }
+
+
+def ensure_cache_schema():
+    """Add indexes that create_all() does not retrofit onto an existing `cache` table."""
+    db.session.execute(db.text("CREATE INDEX IF NOT EXISTS ix_cache_timestamp ON cache (timestamp)"))
+    db.session.commit()
+
+
+def sweep_expired(batch_size=CACHE_SWEEP_BATCH):
+    """
+    Delete `cache` rows past their hard expiry in chunks of batch_size, one
+    short transaction per chunk so request threads are never locked out for long.
+    Returns the number of rows deleted. Needs an app context.
+    """
+    now = datetime.utcnow()
+    deleted = 0
+    for namespace, ttl in NAMESPACE_TTLS.items():
+        deleted += _sweep(
+            batch_size,
+            CacheEntry.key.like(f"{namespace}:%"),
+            CacheEntry.timestamp < now - timedelta(seconds=ttl),
+        )
+    deleted += _sweep(
+        batch_size,
+        *[CacheEntry.key.notlike(f"{namespace}:%") for namespace in NAMESPACE_TTLS],
+        CacheEntry.timestamp < now - timedelta(seconds=max(CACHE_HARD_TTL, CACHE_TTL)),
+    )
+    _stats["sweeps"] += 1
+    _stats["rows_swept"] += deleted
+    return deleted
+
+
+def _sweep(batch_size, *criteria):
+    deleted = 0
+    while True:
+        ids = [
+            row.id for row in
+            CacheEntry.query.with_entities(CacheEntry.id)
+            .filter(*criteria)
+            .limit(batch_size)
+            .all()
+        ]
+        if not ids:
+            return deleted
+        CacheEntry.query.filter(CacheEntry.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += len(ids)
+
+
+def migrate_cache_keys(batch_size=500):
+    """
+    Rewrite legacy raw-text keys (`gnews:<query>`) to the hashed scheme.
+    When two legacy rows collapse onto one key the newest one wins.
+    Returns (rewritten, merged). Needs an app context.
+    """
+    rewritten = merged = 0
+    last_id = 0
+    while True:
+        rows = (
+            CacheEntry.query.filter(CacheEntry.id > last_id)
+            .order_by(CacheEntry.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+        for row in rows:
+            if _HASHED_KEY_RE.match(row.key or ""):
+                continue
+            namespace, _, raw = row.key.partition(":")
+            new_key = make_key(namespace, raw)
+            twin = CacheEntry.query.filter_by(key=new_key).first()
+            if twin is None:
+                row.key = new_key
+                rewritten += 1
+                continue
+            if (row.timestamp or datetime.min) > (twin.timestamp or datetime.min):
+                twin.value = row.value
+                twin.timestamp = row.timestamp
+            db.session.delete(row)
+            merged += 1
+        db.session.commit()
+    return rewritten, merged
@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import deque
+
+from config import (
+    BREAKER_WINDOW, BREAKER_MIN_CALLS, BREAKER_ERROR_RATE,
+    BREAKER_SLOW_P95, BREAKER_COOLDOWN,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100.0 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class CircuitBreaker:
+    """
+    Rolling-window breaker for one upstream.
+
+    closed    -> calls go through; outcomes are recorded for the last `window` seconds.
+    open      -> calls are refused until `cooldown` seconds have passed.
+    half_open -> a single probe call is let through; success closes the
+                 breaker (with a fresh window), failure opens it again. A
+                 probe that reports nothing within `cooldown` seconds is
+                 written off and the next call becomes the probe.
+    """
+
+    def __init__(self, window=BREAKER_WINDOW, min_calls=BREAKER_MIN_CALLS,
+                 error_rate=BREAKER_ERROR_RATE, slow_p95=BREAKER_SLOW_P95, cooldown=BREAKER_COOLDOWN):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_p95 = slow_p95
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.reason = ""
+        self.trips = 0
+        self._calls = deque()  # (finished_at, ok, latency)
+        self._probing = False
+        self._probe_at = 0.0
+        self._probe_id = 0
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+
+    def allow(self):
+        """True if a call may go out now."""
+        return self.acquire() is not None
+
+    def acquire(self):
+        """
+        Like allow(), but returns a permit (None when refused): 0 for an
+        ordinary call, the probe's number in half_open. Callers that may end
+        up not making the call hand the permit back to release().
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CLOSED:
+                return 0
+            if self.state == OPEN and now - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and (not self._probing or now - self._probe_at >= self.cooldown):
+                self._probing = True
+                self._probe_at = now
+                self._probe_id += 1
+                return self._probe_id
+            return None
+
+    def release(self, permit):
+        """Free the probe slot held by `permit` if its call never reported (no-op otherwise)."""
+        if not permit:
+            return
+        with self._lock:
+            if self.state == HALF_OPEN and self._probing and permit == self._probe_id:
+                self._probing = False
+
+    def record(self, ok, latency):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if ok and latency < self.slow_p95:
+                    self.state = CLOSED
+                    self.reason = ""
+                    self._calls.clear()
+                else:
+                    self._open(now, "probe failed" if not ok else f"probe took {latency:.1f}s")
+                return
+            if self.state == OPEN:
+                return  # a call that started before the breaker opened
+            self._calls.append((now, ok, latency))
+            self._prune(now)
+            if len(self._calls) < self.min_calls:
+                return
+            errors = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+            rate = errors / len(self._calls)
+            p95 = percentile([lat for _, _, lat in self._calls], 95)
+            if rate >= self.error_rate:
+                self._open(now, f"error rate {rate:.0%}")
+            elif p95 >= self.slow_p95:
+                self._open(now, f"p95 latency {p95:.1f}s")
+
+    def _open(self, now, reason):
+        self.state = OPEN
+        self.opened_at = now
+        self.reason = reason
+        self.trips += 1
+        self._calls.clear()
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            calls = list(self._calls)
+            latencies = [lat for _, _, lat in calls]
+            return {
+                "state": self.state,
+                "reason": self.reason,
+                "trips": self.trips,
+                "calls": len(calls),
+                "error_rate": round(sum(1 for _, ok, _ in calls if not ok) / len(calls), 3) if calls else 0.0,
+                "p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+                "retry_in": round(max(self.cooldown - (now - self.opened_at), 0), 1) if self.state == OPEN else None,
+            }
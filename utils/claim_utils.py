@@ -0,0 +1,82 @@
+import re
+
+from config import CLAIM_MAX_QUERIES, CLAIM_MAX_WORDS
+from utils.cache_utils import normalize_query
+
+# Claim extraction: turn a pasted message, OCR dump or web page into a few
+# short search queries, so every source gets a small query and the same
+# claim maps to the same cache keys no matter what text surrounds it.
+
+_URL_RE = re.compile(r"https?://\S+|www\.\S+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?:])\s+|[\r\n]+|\s[|•·]\s")
+_NOISE_RE = re.compile(r"[^\w\s%'\-₹$€£.]", re.UNICODE)
+_WS_RE = re.compile(r"\s+")
+
+CLAIM_CUES = {
+    "claim", "claims", "said", "says", "reports", "reported", "according", "alleged",
+    "confirmed", "announced", "declared", "revealed", "viral", "shows", "died", "dies",
+    "arrested", "banned", "launched", "will", "has", "have", "is", "are", "was", "were",
+}
+BOILERPLATE = {
+    "subscribe", "cookie", "cookies", "privacy", "login", "sign", "share", "follow",
+    "advertisement", "copyright", "newsletter", "click", "forward", "forwarded",
+}
+
+
+def _clean(sentence):
+    sentence = _URL_RE.sub(" ", sentence)
+    sentence = _NOISE_RE.sub(" ", sentence)
+    return _WS_RE.sub(" ", sentence).strip(" .-'")
+
+
+def _score(words, position):
+    lower = [w.lower() for w in words]
+    score = 0.0
+    score += 2.0 * sum(1 for w in lower if w in CLAIM_CUES and len(w) > 3)
+    score += 0.5 * sum(1 for w in lower if w in CLAIM_CUES and len(w) <= 3)
+    score += 1.0 * sum(1 for w in words if any(ch.isdigit() for ch in w))
+    score += 0.5 * sum(1 for w in words[1:] if w[:1].isupper())
+    score -= 3.0 * sum(1 for w in lower if w in BOILERPLATE)
+    if 6 <= len(words) <= 30:
+        score += 2.0
+    return score - 0.2 * position
+
+
+def _similar(a, b):
+    a, b = set(a.split()), set(b.split())
+    return len(a & b) / max(min(len(a), len(b)), 1) >= 0.8
+
+
+def extract_claim_queries(text, max_claims=CLAIM_MAX_QUERIES, max_words=CLAIM_MAX_WORDS):
+    """
+    Return up to max_claims short, normalized claim queries, best first.
+    Short inputs come back as a single query; near-identical sentences
+    (same normalized form, or 80% of the shorter one's words shared) are
+    counted once.
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+
+    candidates = []
+    for position, sentence in enumerate(_SENTENCE_RE.split(text[:20000])):
+        words = _clean(sentence).split()
+        if len(words) < 4:
+            continue
+        candidates.append((_score(words, position), position, " ".join(words[:max_words])))
+        if len(candidates) >= 200:
+            break
+
+    if not candidates:
+        words = _clean(text).split()
+        return [normalize_query(" ".join(words[:max_words]))] if words else []
+
+    claims = []
+    for _, _, claim in sorted(candidates, key=lambda c: (-c[0], c[1])):
+        claim = normalize_query(claim)
+        if any(claim == seen or _similar(claim, seen) for seen in claims):
+            continue
+        claims.append(claim)
+        if len(claims) >= max_claims:
+            break
+    return claims
@@ -0,0 +1,242 @@
+import os
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from multiprocessing.connection import Listener, Client
+
+from config import (
+    SECRET_KEY, CLASSIFIER_MODE, CLASSIFIER_MODEL,
+    CLASSIFIER_SIDECAR_ADDRESS, CLASSIFIER_SIDECAR_AUTHKEY,
+    CLASSIFIER_BATCH_SIZE, CLASSIFIER_BATCH_WAIT_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Zero-shot classifier hosting.
+# get_classifier() returns a callable with the transformers pipeline signature,
+# classifier(text, candidate_labels=[...]) -> {"labels": [...], "scores": [...]},
+# or None when the model is unavailable. Depending on CLASSIFIER_MODE it is the
+# in-process pipeline (loaded once, on first use or at preload) or a client
+# for the sidecar started with `python -m utils.classifier_service`.
+
+class BatchingClassifier:
+    """
+    Micro-batching wrapper around a zero-shot pipeline.
+    Concurrent callers are queued; a single dispatcher thread waits up to
+    max_wait seconds (or until max_batch texts are queued) and runs them as one
+    padded forward pass per label set, then hands each caller its own result.
+    """
+
+    def __init__(self, pipe, max_batch=CLASSIFIER_BATCH_SIZE, max_wait=CLASSIFIER_BATCH_WAIT_MS / 1000.0):
+        self.pipe = pipe
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker_pid = None
+        self._worker_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def __call__(self, text, candidate_labels):
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, tuple(candidate_labels), future))
+        return future.result()
+
+    def _ensure_worker(self):
+        # (re)start the dispatcher in this process, e.g. after a gunicorn fork
+        if self._worker_pid == os.getpid():
+            return
+        with self._worker_lock:
+            if self._worker_pid != os.getpid():
+                self._worker_pid = os.getpid()
+                threading.Thread(target=self._loop, name="satya-classifier-batch", daemon=True).start()
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run(batch)
+
+    def _run(self, batch):
+        groups = {}
+        for text, labels, future in batch:
+            groups.setdefault(labels, []).append((text, future))
+        for labels, items in groups.items():
+            texts = [text for text, _ in items]
+            try:
+                # zero-shot runs one NLI pair per (text, label): batch them all together
+                results = self.pipe(texts, candidate_labels=list(labels), batch_size=len(texts) * len(labels))
+                if isinstance(results, dict):
+                    results = [results]
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(items)
+            for (_, future), result in zip(items, results):
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+_classifier = None
+_load_failed = False
+_load_lock = threading.Lock()
+
+
+def load_classifier():
+    """Build the HF pipeline once per process. Returns None if transformers/model are missing."""
+    global _classifier, _load_failed
+    if _classifier is not None or _load_failed:
+        return _classifier
+    with _load_lock:
+        if _classifier is None and not _load_failed:
+            try:
+                from transformers import pipeline
+                pipe = pipeline("zero-shot-classification", model=CLASSIFIER_MODEL)
+                _classifier = BatchingClassifier(pipe) if CLASSIFIER_BATCH_SIZE > 1 else pipe
+                logger.info(f"Loaded zero-shot classifier {CLASSIFIER_MODEL}")
+            except Exception as e:
+                _load_failed = True
+                logger.warning(f"Zero-shot classifier unavailable: {str(e)}")
+    return _classifier
+
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+def _parse_address(address):
+    # "host:port" -> TCP (loopback only), anything else is a unix socket path
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        host = host.strip("[]") or "127.0.0.1"
+        if host not in LOOPBACK_HOSTS:
+            raise RuntimeError(f"CLASSIFIER_SIDECAR_ADDRESS must be a unix socket or a loopback address, not {host}")
+        return (host, int(port))
+    return address
+
+
+def _check_authkey(authkey):
+    """The sidecar unpickles what it receives: insist on a dedicated key."""
+    if not authkey:
+        raise RuntimeError("CLASSIFIER_MODE=sidecar needs CLASSIFIER_SIDECAR_AUTHKEY")
+    if authkey == SECRET_KEY.encode():
+        raise RuntimeError("CLASSIFIER_SIDECAR_AUTHKEY must differ from SECRET_KEY")
+    return authkey
+
+
+class SidecarClient:
+    """Calls the classifier sidecar; one connection per calling thread."""
+
+    def __init__(self, address, authkey):
+        self.address = _parse_address(address)
+        self.authkey = _check_authkey(authkey)
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def __call__(self, text, candidate_labels):
+        for attempt in range(2):
+            try:
+                conn = self._conn()
+                conn.send((text, list(candidate_labels)))
+                ok, payload = conn.recv()
+                break
+            except (OSError, EOFError):
+                # stale connection (sidecar restarted); reconnect once
+                self._local.conn = None
+                if attempt:
+                    raise
+        if not ok:
+            raise RuntimeError(payload)
+        return payload
+
+
+_sidecar_client = None
+
+
+def get_classifier():
+    global _sidecar_client
+    if CLASSIFIER_MODE == "off":
+        return None
+    if CLASSIFIER_MODE == "sidecar":
+        if _sidecar_client is None:
+            _sidecar_client = SidecarClient(CLASSIFIER_SIDECAR_ADDRESS, CLASSIFIER_SIDECAR_AUTHKEY)
+        return _sidecar_client
+    return load_classifier()
+
+
+def preload_classifier():
+    """
+    Load the model now (CLASSIFIER_MODE=preload); call before gunicorn forks
+    workers. In sidecar mode, checks the sidecar settings instead, so a
+    missing key fails at startup rather than on the first fallback verdict.
+    """
+    if CLASSIFIER_MODE == "preload":
+        load_classifier()
+    elif CLASSIFIER_MODE == "sidecar":
+        get_classifier()
+
+
+def _handle(conn, classifier):
+    with conn:
+        while True:
+            try:
+                text, labels = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                result = classifier(text, candidate_labels=labels)
+                conn.send((True, {"labels": list(result["labels"]), "scores": [float(s) for s in result["scores"]]}))
+            except Exception as e:
+                conn.send((False, str(e)))
+
+
+def serve(address=CLASSIFIER_SIDECAR_ADDRESS, authkey=CLASSIFIER_SIDECAR_AUTHKEY):
+    """Host one copy of the model for every worker on this box."""
+    try:
+        authkey = _check_authkey(authkey)
+        address = _parse_address(address)
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+    classifier = load_classifier()
+    if classifier is None:
+        raise SystemExit("Zero-shot classifier could not be loaded")
+    if isinstance(address, str):
+        if os.path.exists(address):
+            os.remove(address)
+    with Listener(address, authkey=authkey) as listener:
+        if isinstance(address, str):
+            os.chmod(address, 0o600)  # only this user's workers may connect
+        logger.info(f"Classifier sidecar listening on {address}")
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_handle, args=(conn, classifier), daemon=True).start()
+
+
+if __name__ == "__main__":
+    from utils.logging_config import configure_logging
+    configure_logging()
+    serve()
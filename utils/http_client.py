@@ -0,0 +1,109 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import HTTP_POOL_HOSTS, HTTP_POOL_MAXSIZE, HTTP_RETRIES, HTTP_BACKOFF
+
+# Shared outbound HTTP client.
+# All fetches go through one HTTPAdapter, i.e. one urllib3 pool per host with
+# keep-alive, so repeat checks reuse TCP+TLS connections instead of
+# handshaking again. Sessions are per-thread (requests.Session is not
+# thread-safe), the adapter and its pools are shared.
+
+DEFAULT_TIMEOUT = (3.05, 8)  # (connect, read) seconds
+
+# Per-host (connect, read) timeouts; anything not listed uses DEFAULT_TIMEOUT.
+HOST_TIMEOUTS = {
+    "en.wikipedia.org": (3.05, 6),
+    "news.google.com": (3.05, 8),
+    "api.openai.com": (5, 15),
+}
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+}
+
+_retry = Retry(
+    total=HTTP_RETRIES,
+    backoff_factor=HTTP_BACKOFF,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({"GET", "HEAD"}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+_adapter = HTTPAdapter(
+    pool_connections=HTTP_POOL_HOSTS,
+    pool_maxsize=HTTP_POOL_MAXSIZE,
+    max_retries=_retry,
+    pool_block=False,
+)
+
+_local = threading.local()
+
+
+def _session():
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        session.mount("http://", _adapter)
+        session.mount("https://", _adapter)
+        _local.session = session
+    return session
+
+
+def timeout_for(url):
+    """Return the (connect, read) timeout configured for the url's host."""
+    host = (urlsplit(url).hostname or "").lower()
+    return HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT)
+
+
+def request(method, url, **kwargs):
+    """Like requests.request, but pooled and with the per-host timeout unless one is given."""
+    if kwargs.get("timeout") is None:
+        kwargs["timeout"] = timeout_for(url)
+    return _session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def pool_stats():
+    """
+    Connection reuse per host.
+    A "hit" is a request served on an already-open pooled connection,
+    a "miss" is one that had to open a new connection.
+    """
+    hosts = {}
+    pools = _adapter.poolmanager.pools
+    for key in pools.keys():
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        host = f"{key.key_scheme}://{key.key_host}:{key.key_port or ''}".rstrip(":")
+        misses = pool.num_connections
+        hits = max(pool.num_requests - misses, 0)
+        hosts[host] = {
+            "requests": pool.num_requests,
+            "hits": hits,
+            "misses": misses,
+            "maxsize": pool.pool.maxsize if pool.pool is not None else 0,
+        }
+    total_hits = sum(h["hits"] for h in hosts.values())
+    total_misses = sum(h["misses"] for h in hosts.values())
+    total = total_hits + total_misses
+    return {
+        "hosts": hosts,
+        "hits": total_hits,
+        "misses": total_misses,
+        "hit_ratio": round(total_hits / total, 3) if total else 0.0,
+    }
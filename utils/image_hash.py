@@ -0,0 +1,79 @@
+try:
+    from PIL import Image
+    PIL_OK = True
+except Exception:
+    PIL_OK = False
+
+
+def dhash(img, size=8):
+    """64-bit difference hash of a PIL image (size x size gradient bits)."""
+    gray = img.convert("L").resize((size + 1, size), Image.BILINEAR)
+    pixels = list(gray.getdata())
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class MultiIndexHashIndex:
+    """
+    In-memory multi-index hashing over 64-bit hashes.
+    The hash is split into `chunks` substrings, each with its own table. If two
+    hashes are within distance d, at least one substring is within
+    d // chunks of the other (pigeonhole), so a query only probes the buckets of
+    each substring's small neighbourhood and verifies those candidates, instead
+    of scanning every stored hash.
+    """
+
+    def __init__(self, bits=64, chunks=4):
+        self.bits = bits
+        self.chunks = chunks
+        self.width = bits // chunks
+        self.mask = (1 << self.width) - 1
+        self.tables = [dict() for _ in range(chunks)]
+        self.hashes = {}  # item id -> hash
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def _parts(self, h):
+        return [(h >> (i * self.width)) & self.mask for i in range(self.chunks)]
+
+    def _neighbours(self, part, radius):
+        # all values within `radius` bit flips of part (radius is 0..2 in practice)
+        out = {part}
+        frontier = {part}
+        for _ in range(radius):
+            frontier = {v ^ (1 << b) for v in frontier for b in range(self.width)}
+            out |= frontier
+        return out
+
+    def add(self, h, item_id):
+        if item_id in self.hashes:
+            return
+        self.hashes[item_id] = h
+        for table, part in zip(self.tables, self._parts(h)):
+            table.setdefault(part, []).append(item_id)
+
+    def search(self, h, max_distance):
+        """Return [(distance, item_id)] of every stored hash within max_distance, closest first."""
+        radius = max_distance // self.chunks
+        found = []
+        seen = set()
+        for table, part in zip(self.tables, self._parts(h)):
+            for key in self._neighbours(part, radius):
+                for item_id in table.get(key, ()):
+                    if item_id in seen:
+                        continue
+                    seen.add(item_id)
+                    d = hamming(h, self.hashes[item_id])
+                    if d <= max_distance:
+                        found.append((d, item_id))
+        found.sort()
+        return found
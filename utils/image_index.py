@@ -0,0 +1,136 @@
+import threading
+import time
+import logging
+from difflib import SequenceMatcher
+
+from config import (
+    IMAGE_MATCH_DISTANCE, IMAGE_MATCH_TEXT_SIMILARITY, IMAGE_MATCH_CANDIDATES, IMAGE_INDEX_REFRESH,
+)
+from models import db, Check, ImageFingerprint
+from utils.image_hash import MultiIndexHashIndex, dhash
+from utils.cache_utils import normalize_query
+
+try:
+    from utils.ocr_utils import to_image
+    PIL_OK = True
+except Exception:
+    PIL_OK = False
+
+logger = logging.getLogger(__name__)
+
+# Near-duplicate lookup for uploaded images.
+# Fingerprints of verified images live in the image_fingerprints table; each
+# process mirrors them in a MultiIndexHashIndex and catches up on rows added
+# by other workers at most every IMAGE_INDEX_REFRESH seconds. A fingerprint
+# match is only a candidate: it is confirmed against the upload's OCR text.
+
+_index = MultiIndexHashIndex()
+_lock = threading.Lock()
+_last_id = 0
+_last_refresh = 0.0
+_stats = {"lookups": 0, "hits": 0, "rejected": 0}
+
+
+def _to_signed(h):
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+
+def _to_unsigned(v):
+    return v + (1 << 64) if v < 0 else v
+
+
+def fingerprint(src):
+    """dHash of an image given as bytes, path, array or PIL image; None if it can't be decoded."""
+    if not PIL_OK:
+        return None
+    try:
+        return dhash(to_image(src))
+    except Exception:
+        return None
+
+
+def _refresh(batch_size=50000):
+    # needs an app context; loads only rows added since the last refresh
+    global _last_id, _last_refresh
+    now = time.monotonic()
+    if now - _last_refresh < IMAGE_INDEX_REFRESH:
+        return
+    _last_refresh = now
+    while True:
+        rows = (
+            ImageFingerprint.query
+            .with_entities(ImageFingerprint.id, ImageFingerprint.check_id, ImageFingerprint.dhash)
+            .filter(ImageFingerprint.id > _last_id)
+            .order_by(ImageFingerprint.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return
+        for row_id, check_id, value in rows:
+            _index.add(_to_unsigned(value), check_id)
+        _last_id = rows[-1][0]
+
+
+def same_text(a, b, threshold=IMAGE_MATCH_TEXT_SIMILARITY):
+    """True if two OCR texts agree up to normalization and a little OCR noise."""
+    a, b = normalize_query(a)[:4000], normalize_query(b)[:4000]
+    if not a or not b:
+        return False
+    if a == b:
+        return True
+    sm = SequenceMatcher(None, a, b, autojunk=False)
+    return sm.real_quick_ratio() >= threshold and sm.quick_ratio() >= threshold and sm.ratio() >= threshold
+
+
+def find_match(h, text, max_distance=IMAGE_MATCH_DISTANCE):
+    """
+    Return the Check of the closest previously verified image within
+    max_distance whose text agrees with `text` (the upload's OCR), or None.
+    Candidates are tried closest first (oldest first on a tie), so screenshots
+    of one template still find the check that shares their text.
+    """
+    if h is None or max_distance <= 0:
+        return None
+    with _lock:
+        _refresh()
+        matches = _index.search(h, max_distance)[:IMAGE_MATCH_CANDIDATES]
+    _stats["lookups"] += 1
+    if not matches:
+        return None
+    rows = (
+        Check.query
+        .with_entities(Check.id, Check.text_snippet)
+        .filter(Check.id.in_([check_id for _, check_id in matches]))
+        .all()
+    )
+    texts = dict(rows)
+    for distance, check_id in matches:
+        if check_id in texts and same_text(text, texts[check_id] or ""):
+            _stats["hits"] += 1
+            logger.info(f"Image matched check {check_id} at distance {distance}")
+            return db.session.get(Check, check_id)
+    _stats["rejected"] += 1
+    logger.debug(f"Image matched {len(matches)} checks, but none with the same text")
+    return None
+
+
+def remember(h, check_id):
+    """Record the fingerprint of a freshly verified image."""
+    if h is None:
+        return
+    db.session.add(ImageFingerprint(check_id=check_id, dhash=_to_signed(h)))
+    db.session.commit()
+    with _lock:
+        _index.add(h, check_id)
+
+
+def image_index_stats():
+    lookups, hits = _stats["lookups"], _stats["hits"]
+    return {
+        "size": len(_index),
+        "lookups": lookups,
+        "hits": hits,
+        "rejected": _stats["rejected"],
+        "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+    }
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from config import JOB_WORKERS, JOB_MAX_PENDING, JOB_TIMEOUT, JOB_RETENTION, ASYNC_MAX_PENDING, CACHE_SWEEP_BATCH
+from models import db, Job
+from utils import async_runtime, metrics
+
+logger = logging.getLogger(__name__)
+
+# Background job queue for /analyze.
+# Job rows in SQLite carry status and the resulting check id, so any gunicorn
+# worker can answer /jobs/<id>; the work itself runs on a bounded thread pool
+# in the worker that accepted the request. Coroutine jobs (enqueue_async) run
+# on the process event loop instead, with their own, larger bound.
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="satya-job")
+_slots = threading.BoundedSemaphore(JOB_MAX_PENDING)
+_async_slots = threading.BoundedSemaphore(ASYNC_MAX_PENDING)
+_app = None
+
+
+def init_app(app):
+    global _app
+    _app = app
+
+
+def enqueue(user_id, fn, *args):
+    """
+    Create a queued Job and run fn(*args) on the worker pool.
+    fn must return the id of the Check it stored.
+    Raises JobQueueFull when this process already has JOB_MAX_PENDING jobs.
+    """
+    if not _slots.acquire(blocking=False):
+        raise JobQueueFull()
+    try:
+        job = Job(id=uuid.uuid4().hex, user_id=user_id, status="queued")
+        db.session.add(job)
+        db.session.commit()
+        _executor.submit(_run, job.id, fn, args)
+    except Exception:
+        _slots.release()
+        raise
+    return job
+
+
+def enqueue_async(user_id, coro_fn, *args):
+    """
+    Like enqueue(), for a coroutine function: coro_fn(app, *args) runs on the
+    process event loop (utils/async_runtime.py) and returns the Check id.
+    """
+    if not _async_slots.acquire(blocking=False):
+        raise JobQueueFull()
+    try:
+        job = Job(id=uuid.uuid4().hex, user_id=user_id, status="queued")
+        db.session.add(job)
+        db.session.commit()
+        async_runtime.submit(_run_async(job.id, coro_fn, args))
+    except Exception:
+        _async_slots.release()
+        raise
+    return job
+
+
+async def _run_async(job_id, coro_fn, args):
+    try:
+        await asyncio.to_thread(async_runtime.in_app, _app, _set_status, job_id, "running")
+        try:
+            with metrics.trace("check", job_id=job_id, pipeline="async"):
+                check_id = await coro_fn(_app, *args)
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed")
+            await asyncio.to_thread(async_runtime.in_app, _app, _set_status, job_id, "failed", None, str(e))
+        else:
+            await asyncio.to_thread(async_runtime.in_app, _app, _set_status, job_id, "done", check_id)
+    finally:
+        _async_slots.release()
+
+
+def _run(job_id, fn, args):
+    try:
+        with _app.app_context():
+            _set_status(job_id, "running")
+            try:
+                with metrics.trace("check", job_id=job_id, pipeline="thread"):
+                    check_id = fn(*args)
+            except Exception as e:
+                db.session.rollback()
+                logger.exception(f"Job {job_id} failed")
+                _set_status(job_id, "failed", error=str(e))
+            else:
+                _set_status(job_id, "done", check_id=check_id)
+    finally:
+        _slots.release()
+
+
+def _set_status(job_id, status, check_id=None, error=None):
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return
+    job.status = status
+    job.updated_at = datetime.utcnow()
+    if check_id is not None:
+        job.check_id = check_id
+    if error is not None:
+        job.error = error[:2000]
+    db.session.commit()
+
+
+def ensure_jobs_schema():
+    """Add indexes that create_all() does not retrofit onto an existing `jobs` table."""
+    db.session.execute(db.text("CREATE INDEX IF NOT EXISTS ix_jobs_created_at ON jobs (created_at)"))
+    db.session.commit()
+
+
+def sweep_jobs(batch_size=CACHE_SWEEP_BATCH):
+    """
+    Delete jobs older than JOB_RETENTION in chunks of batch_size (their
+    checks stay in the history). Returns the number deleted. Needs an app context.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_RETENTION)
+    deleted = 0
+    while True:
+        ids = [
+            row.id for row in
+            Job.query.with_entities(Job.id)
+            .filter(Job.created_at < cutoff)
+            .limit(batch_size)
+            .all()
+        ]
+        if not ids:
+            return deleted
+        Job.query.filter(Job.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += len(ids)
+
+
+def job_status(job):
+    """Status of a job as shown to clients; jobs stuck past JOB_TIMEOUT count as failed."""
+    if job.status in ("queued", "running"):
+        last = job.updated_at or job.created_at
+        if last and datetime.utcnow() - last > timedelta(seconds=JOB_TIMEOUT):
+            return "failed"
+    return job.status
@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+from config import LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_RATE_LIMIT, LOG_RATE_WINDOW
+from utils import metrics
+
+# One logging setup for the app (configure_logging(), called from app.py).
+# Request threads only filter and enqueue a record; a QueueListener thread
+# formats and writes it. Each record carries the job id of the check being
+# traced on its thread or task (utils/metrics.py), "-" outside one.
+# Noisy call sites are rate limited below WARNING (see config.LOG_RATE_*).
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [job=%(job_id)s] %(message)s"
+
+# HTTP client libraries log every request at INFO/DEBUG
+QUIET_LOGGERS = ("httpx", "httpcore", "urllib3")
+# One line per check by design (utils/metrics.py), never rate limited
+UNLIMITED_LOGGERS = ("satya.trace",)
+
+_handler = None
+_listener = None
+_lock = threading.Lock()
+
+
+class ContextFilter(logging.Filter):
+    """Adds job_id (and pipeline) of the current check to each record."""
+
+    def filter(self, record):
+        trace = metrics.current_trace()
+        tags = trace.tags if trace is not None else {}
+        record.job_id = tags.get("job_id", "-")
+        record.pipeline = tags.get("pipeline", "-")
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    At most `limit` records per call site per `window` seconds below WARNING,
+    except from the `exempt` loggers. Suppressed records are counted and the count is appended to the next
+    record from that call site that gets through.
+    """
+
+    def __init__(self, limit, window, exempt=UNLIMITED_LOGGERS):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.exempt = frozenset(exempt)
+        self._sites = {}  # (logger, file, line) -> [window start, count, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.limit <= 0 or record.levelno >= logging.WARNING or record.name in self.exempt:
+            return True
+        site = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                self._sites[site] = [now, 1, 0]
+            elif state[1] < self.limit:
+                state[1] += 1
+                suppressed = 0
+            else:
+                state[2] += 1
+                return False
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar suppressed)"
+            record.args = None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "job_id": getattr(record, "job_id", "-"),
+            "pipeline": getattr(record, "pipeline", "-"),
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full."""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging():
+    """Install the queue handler on the root logger and start the writer thread (once per process)."""
+    global _handler, _listener
+    with _lock:
+        if _handler is not None:
+            return
+        stream = logging.StreamHandler()
+        stream.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+        _handler = _DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        _handler.addFilter(ContextFilter())
+        _handler.addFilter(RateLimitFilter(LOG_RATE_LIMIT, LOG_RATE_WINDOW))
+
+        root = logging.getLogger()
+        for h in list(root.handlers):
+            root.removeHandler(h)
+        root.addHandler(_handler)
+        root.setLevel(LOG_LEVEL)
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+        _listener = QueueListener(_handler.queue, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_stop)
+        if hasattr(os, "register_at_fork"):
+            # gunicorn --preload forks after import; the writer thread does not survive that
+            os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def _stop():
+    if _listener is not None:
+        _listener.stop()  # drains what is still queued
+
+
+def _restart_in_child():
+    global _listener
+    _handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+    _handler.dropped = 0
+    _listener = QueueListener(_handler.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def logging_stats():
+    if _handler is None:
+        return {"configured": False}
+    return {
+        "configured": True,
+        "queued": _handler.queue.qsize(),
+        "dropped": _handler.dropped,
+    }
@@ -0,0 +1,166 @@
+import bisect
+import contextvars
+import json
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+from config import METRICS_ENABLED, METRICS_LOG_JSON
+
+logger = logging.getLogger(__name__)
+trace_logger = logging.getLogger("satya.trace")
+
+# Per-stage latency of /analyze checks.
+# span() times one stage (extraction, a source fetch, the LLM call, the
+# verdict, persistence) into the stage histogram and, when a check is being
+# traced, onto that check's Trace. The current trace lives in a contextvar:
+# asyncio tasks and asyncio.to_thread inherit it; thread pool submissions
+# must pass it on with contextvars.copy_context().run.
+# Values are per process, like the /admin/stats counters.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Histogram:
+    """Minimal labelled Prometheus histogram."""
+
+    def __init__(self, name, help_text, labels, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            base = ",".join(f'{name}="{_escape(v)}"' for name, v in zip(self.labels, key))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {series[-1]}")
+        return "\n".join(lines)
+
+
+STAGE_SECONDS = Histogram(
+    "satya_stage_seconds",
+    "Latency of one /analyze stage in seconds.",
+    ("stage", "source", "cache", "outcome"),
+)
+CHECK_SECONDS = Histogram(
+    "satya_check_seconds",
+    "End-to-end latency of one /analyze check in seconds.",
+    ("input_type", "pipeline", "status"),
+)
+
+_HISTOGRAMS = (STAGE_SECONDS, CHECK_SECONDS)
+
+
+class Trace:
+    """Stages of one check, for the JSON log line."""
+
+    def __init__(self, name, **tags):
+        self.name = name
+        self.tags = tags
+        self.spans = []  # appended from several threads; list.append is atomic
+        self.start = time.perf_counter()
+
+
+_current = contextvars.ContextVar("satya_trace", default=None)
+
+
+def current_trace():
+    return _current.get()
+
+
+def tag(**tags):
+    """Attach tags to the current trace (no-op outside one)."""
+    trace = _current.get()
+    if trace is not None:
+        trace.tags.update(tags)
+
+
+@contextmanager
+def span(stage, **tags):
+    """
+    Time a stage. Yields its tag dict so the body can add e.g. cache="hit";
+    the stage's "source", "cache" and "outcome" tags become histogram labels.
+    """
+    if not METRICS_ENABLED:
+        yield tags
+        return
+    start = time.perf_counter()
+    try:
+        yield tags
+    except BaseException:
+        tags.setdefault("outcome", "error")
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage, **tags)
+        trace = _current.get()
+        if trace is not None:
+            trace.spans.append({"stage": stage, "ms": round(elapsed * 1000, 1), **tags})
+
+
+@contextmanager
+def trace(name, **tags):
+    """Trace one check: its total time goes to CHECK_SECONDS, its stages to the JSON log line."""
+    current = Trace(name, **tags)
+    token = _current.set(current)
+    status = "ok"
+    try:
+        yield current
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _current.reset(token)
+        if METRICS_ENABLED:
+            _finish(current, status)
+
+
+def _finish(current, status):
+    elapsed = time.perf_counter() - current.start
+    CHECK_SECONDS.observe(
+        elapsed,
+        input_type=current.tags.get("input_type", ""),
+        pipeline=current.tags.get("pipeline", ""),
+        status=status,
+    )
+    if METRICS_LOG_JSON:
+        trace_logger.info(json.dumps({
+            "trace": current.name,
+            "status": status,
+            "total_ms": round(elapsed * 1000, 1),
+            **current.tags,
+            "spans": current.spans,
+        }, default=str))
+
+
+def render_metrics():
+    return "\n".join(h.render() for h in _HISTOGRAMS) + "\n"
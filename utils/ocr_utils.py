@@ -1,18 +1,187 @@
 import os
+import io
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+try:
+    from PIL import Image, ImageOps
+    PIL_OK = True
+except Exception:
+    PIL_OK = False
+try:
+    import tesserocr
+    TESSEROCR_OK = PIL_OK
+except Exception:
+    TESSEROCR_OK = False
 try:
     import pytesseract
-    from PIL import Image
-    TESSERACT_OK = True
+    PYTESSERACT_OK = PIL_OK
 except Exception:
-    TESSERACT_OK = False
+    PYTESSERACT_OK = False
 
-def ocr_from_path(fp):
-    """Return text from an image file. If pytesseract not installed, return empty string."""
-    if not TESSERACT_OK:
+TESSERACT_OK = TESSEROCR_OK or PYTESSERACT_OK
+
+from config import (
+    OCR_WORKERS, OCR_LANG, OCR_MAX_WIDTH, OCR_MIN_WIDTH,
+    OCR_TILE_HEIGHT, OCR_TILE_OVERLAP,
+)
+
+logger = logging.getLogger(__name__)
+
+# OCR service.
+# Every image (uploads and video frames alike) goes through the same path:
+# preprocess -> cut into tiles -> recognize each tile on a persistent worker
+# pool. With tesserocr each worker thread keeps its own initialised Tesseract
+# API, so there is no fork+exec or model load per image; Tesseract releases the
+# GIL while recognising, so threads use every core. Without tesserocr the
+# workers fall back to pytesseract (one tesseract process per tile).
+
+_local = threading.local()
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="satya-ocr")
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def _api():
+    api = getattr(_local, "api", None)
+    if api is None:
+        api = tesserocr.PyTessBaseAPI(lang=OCR_LANG)
+        _local.api = api
+    return api
+
+
+def to_image(src):
+    """Accept a PIL image, numpy array, encoded bytes or a path."""
+    if isinstance(src, Image.Image):
+        return src
+    if isinstance(src, (bytes, bytearray)):
+        return Image.open(io.BytesIO(src))
+    if isinstance(src, (str, os.PathLike)):
+        return Image.open(src)
+    return Image.fromarray(src)
+
+
+def _otsu_threshold(gray):
+    hist = gray.histogram()
+    total = sum(hist)
+    sum_all = sum(i * h for i, h in enumerate(hist))
+    sum_bg = weight_bg = 0
+    best, threshold = 0, 127
+    for i, h in enumerate(hist):
+        weight_bg += h
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += i * h
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if between > best:
+            best, threshold = between, i
+    return threshold
+
+
+def preprocess(img):
+    """Grayscale, scale width into [OCR_MIN_WIDTH, OCR_MAX_WIDTH], Otsu-binarize to dark text on white."""
+    gray = ImageOps.exif_transpose(img).convert("L")
+    w, h = gray.size
+    if w > OCR_MAX_WIDTH:
+        gray = gray.resize((OCR_MAX_WIDTH, max(int(h * OCR_MAX_WIDTH / w), 1)), Image.LANCZOS)
+    elif 0 < w < OCR_MIN_WIDTH:
+        gray = gray.resize((OCR_MIN_WIDTH, max(int(h * OCR_MIN_WIDTH / w), 1)), Image.LANCZOS)
+    threshold = _otsu_threshold(gray)
+    binary = gray.point(lambda p: 255 if p > threshold else 0, mode="L")
+    # dark-mode screenshots: make the background white
+    if sum(binary.histogram()[:128]) > (binary.width * binary.height) / 2:
+        binary = ImageOps.invert(binary)
+    return binary
+
+
+def tiles(img):
+    """Cut tall images into OCR_TILE_HEIGHT strips overlapping by OCR_TILE_OVERLAP px."""
+    w, h = img.size
+    if h <= OCR_TILE_HEIGHT:
+        return [img]
+    step = OCR_TILE_HEIGHT - OCR_TILE_OVERLAP
+    return [img.crop((0, top, w, min(top + OCR_TILE_HEIGHT, h))) for top in range(0, h - OCR_TILE_OVERLAP, step)]
+
+
+def _recognize(tile):
+    # runs on an OCR worker thread
+    if TESSEROCR_OK:
+        api = _api()
+        api.SetImage(tile)
+        return api.GetUTF8Text() or ""
+    return pytesseract.image_to_string(tile, lang=OCR_LANG) or ""
+
+
+def _ocr_local(src):
+    # one whole image on the current (worker) thread; tiles run one after another
+    try:
+        return "\n".join(_recognize(t) for t in tiles(preprocess(to_image(src))))
+    except Exception as e:
+        logger.warning(f"OCR error: {str(e)}")
         return ""
+
+
+def _ocr_one(src):
+    # one image from a caller thread: its tiles are recognized in parallel on the pool
     try:
-        text = pytesseract.image_to_string(Image.open(fp), lang='eng')
-        return text or ""
+        parts = tiles(preprocess(to_image(src)))
+        if len(parts) == 1:
+            return _get_pool().submit(_recognize, parts[0]).result()
+        futures = [_get_pool().submit(_recognize, t) for t in parts]
+        return "\n".join(f.result() for f in futures)
     except Exception as e:
-        print("OCR error:", e)
+        logger.warning(f"OCR error: {str(e)}")
+        return ""
+
+
+def _done(value):
+    f = Future()
+    f.set_result(value)
+    return f
+
+
+def submit_image(src):
+    """Queue OCR of one image (PIL image, array, bytes or path); returns a Future of the text."""
+    if not TESSERACT_OK:
+        return _done("")
+    return _get_pool().submit(_ocr_local, src)
+
+
+def ocr_images(sources):
+    """Batch OCR: recognize many images concurrently on the pool; texts come back in input order."""
+    futures = [submit_image(src) for src in sources]
+    return [f.result() for f in futures]
+
+
+def ocr_from_image(img):
+    """Return text from a PIL image. If no Tesseract backend is installed, return empty string."""
+    if not TESSERACT_OK:
+        return ""
+    return _ocr_one(img)
+
+def ocr_from_bytes(data):
+    """Return text from encoded image bytes (png/jpg/gif) without touching disk."""
+    if not TESSERACT_OK:
+        return ""
+    return _ocr_one(data)
+
+def ocr_from_path(fp):
+    """Return text from an image file. If no Tesseract backend is installed, return empty string."""
+    if not TESSERACT_OK:
         return ""
+    return _ocr_one(fp)
@@ -0,0 +1,384 @@
+import asyncio
+import json
+import logging
+import threading
+
+from models import db, Check
+from utils.url_utils import fetch_url_text
+from utils.upload_utils import IMAGE_EXTENSIONS
+from utils.image_index import fingerprint, find_match, remember
+from utils import semantic_index
+from utils.single_flight import SingleFlight, AsyncSingleFlight
+from utils.async_runtime import in_app
+from utils import metrics
+from utils.cache_utils import cache_get, cache_set, make_key
+from utils.ocr_utils import ocr_from_path, ocr_from_bytes
+from utils.video_utils import process_video_file
+from utils.ai_utils import (
+    search_wikipedia_snippet, ask_llm_for_verdict, ask_llm_for_verdict_async,
+    is_settled, transcribe_audio_path
+)
+from utils.trusted_sources import collect_trusted_sources, collect_trusted_sources_async
+
+# The /analyze pipeline: extract text from the input, verify it, store a Check.
+# run_check runs on a job worker thread (see utils/jobs.py), inside an app
+# context; run_check_async is its asyncio variant for text and URL inputs.
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionError(Exception):
+    """The input could not be read; the message is shown to the user on the failed job."""
+
+
+verdict_flights = SingleFlight("verdict")
+async_verdict_flights = AsyncSingleFlight("verdict")
+
+# Verdict cache hit ratio, per process.
+_verdict_stats = {"lookups": 0, "hits": 0}
+_verdict_lock = threading.Lock()
+
+
+def _verdict_lookup(key):
+    cached = cache_get(key)
+    hit = isinstance(cached, dict) and "result" in cached
+    with _verdict_lock:
+        _verdict_stats["lookups"] += 1
+        _verdict_stats["hits"] += int(hit)
+    return cached if hit else None
+
+
+def verdict_cache_stats():
+    with _verdict_lock:
+        lookups, hits = _verdict_stats["lookups"], _verdict_stats["hits"]
+    return {
+        "lookups": lookups,
+        "hits": hits,
+        "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+    }
+
+
+def extract_text(typ, text, url, upload=None):
+    """Return the text to verify. Uploads (utils.upload_utils.Upload) are cleaned up once read."""
+    with metrics.span("extract", input_type=typ, ext=upload.ext if upload else ""):
+        return _extract_text(typ, text, url, upload)
+
+
+def _extract_text(typ, text, url, upload):
+
+    # --- TEXT ---
+    if typ == "text":
+        return text
+
+    # --- URL ---
+    if typ == "url" and url:
+        try:
+            return fetch_url_text(url)
+        except Exception as e:
+            logger.warning(f"Could not fetch URL content: {str(e)}")
+            raise ExtractionError("Could not fetch URL content.") from e
+
+    # --- FILE ---
+    if upload:
+        ext = upload.ext
+        try:
+            if ext in ["png", "jpg", "jpeg", "gif"]:
+                if upload.data is not None:
+                    return ocr_from_bytes(upload.data)
+                return ocr_from_path(upload.path)
+
+            elif ext in ["mp3", "wav"]:
+                return transcribe_audio_path(upload.path)
+
+            elif ext in ["mp4", "mov", "mkv", "webm"]:
+                info = process_video_file(upload.path)
+                return (
+                    info.get("audio_text", "")
+                    + "\n\n"
+                    + info.get("frames_text", "")
+                ).strip()
+        except Exception as e:
+            logger.exception(f"Failed to process uploaded file: {str(e)}")
+            raise ExtractionError("Failed to process uploaded file.") from e
+        finally:
+            upload.cleanup()
+
+    return ""
+
+
+def verify_text(extracted_text, url=""):
+    """
+    Run source collection + verdict. Returns (result dict stored on a Check,
+    settled): settled is False when the verdict rests on nothing (an error, or
+    no source answered and no model judged the claim), so it must not be reused.
+    """
+    try:
+        wiki_snip = search_wikipedia_snippet(extracted_text or url)
+    except:
+        wiki_snip = None
+
+    try:
+        trusted = collect_trusted_sources(extracted_text or url)
+        logger.debug(f"Collected {len(trusted)} source entries, {sum(1 for v in trusted.values() if v is not None)} non-None")
+    except Exception as e:
+        logger.exception(f"Failed to collect trusted sources: {str(e)}")
+        trusted = {}
+
+    try:
+        verdict = ask_llm_for_verdict(extracted_text or url, trusted or {})
+        logger.debug(f"Verdict sources count: {len(verdict.get('sources', []))}")
+    except Exception as e:
+        logger.exception(f"Failed to get verdict: {str(e)}")
+        return _format_result(_error_verdict(e), trusted, wiki_snip), False
+
+    return _format_result(verdict, trusted, wiki_snip), _settled(verdict, trusted)
+
+
+async def verify_text_async(extracted_text, url="", app=None):
+    """verify_text() on the event loop; `app` gives the cache lookups their context. Returns (result, settled)."""
+    try:
+        # off the loop and guarded, as in verify_text()
+        wiki_snip = await asyncio.to_thread(search_wikipedia_snippet, extracted_text or url)
+    except Exception:
+        wiki_snip = None
+
+    try:
+        trusted = await collect_trusted_sources_async(extracted_text or url, app=app)
+        logger.debug(f"Collected {len(trusted)} source entries, {sum(1 for v in trusted.values() if v is not None)} non-None")
+    except Exception as e:
+        logger.exception(f"Failed to collect trusted sources: {str(e)}")
+        trusted = {}
+
+    try:
+        verdict = await ask_llm_for_verdict_async(extracted_text or url, trusted or {}, app=app)
+        logger.debug(f"Verdict sources count: {len(verdict.get('sources', []))}")
+    except Exception as e:
+        logger.exception(f"Failed to get verdict: {str(e)}")
+        return _format_result(_error_verdict(e), trusted, wiki_snip), False
+
+    return _format_result(verdict, trusted, wiki_snip), _settled(verdict, trusted)
+
+
+def _settled(verdict, trusted):
+    # some source answered, or GPT-4 / the classifier judged the claim
+    return any(v is not None for v in trusted.values()) or is_settled(verdict)
+
+
+def _error_verdict(e):
+    return {
+        "status": "unknown",
+        "confidence": 40,
+        "reasoning": f"Error during analysis: {str(e)}",
+        "sources": [],
+        "risk_score": 50,
+    }
+
+
+def _format_result(verdict, trusted, wiki_snip):
+    sources = verdict.get("sources") or []
+    logger.debug(f"Initial sources from verdict: {len(sources)}")
+    
+    # If no sources from verdict, try to extract from trusted sources dict
+    if not sources:
+        if wiki_snip:
+            sources = [wiki_snip]
+            logger.debug("Using wiki_snip as source")
+        else:
+            # Convert trusted dict to list, filtering out None values
+            sources = [v for v in trusted.values() if v is not None and v.get("snippet")]
+            logger.debug(f"Extracted {len(sources)} sources from trusted dict")
+    
+    # Ensure all sources have required fields
+    formatted_sources = []
+    for src in sources:
+        if isinstance(src, dict):
+            # Ensure source has required fields
+            if src.get("name") or src.get("url"):
+                formatted_sources.append({
+                    "name": src.get("name", "Unknown Source"),
+                    "url": src.get("url", ""),
+                    "snippet": src.get("snippet", "")
+                })
+    
+    sources = formatted_sources
+    logger.debug(f"Final formatted sources count: {len(sources)}")
+
+    return {
+        "status": verdict.get("status", "unknown"),
+        "confidence": int(verdict.get("confidence", 40)),
+        "reasoning": verdict.get("reasoning", ""),
+        "sources": sources,
+        "risk_score": int(verdict.get("risk_score", 50)),
+    }
+
+
+def run_check(user_id, typ, text, url, upload=None):
+    """
+    Full /analyze pipeline. Returns the id of the stored Check.
+    Identical inputs (same upload bytes, or same normalized text) reuse a
+    cached verdict instead of re-running extraction and verification, and
+    near-duplicate images whose OCR text agrees reuse the matching check's verdict.
+    Paraphrases of an already-checked claim reuse that check's verdict via the
+    semantic claim index, before any source is queried.
+    """
+    metrics.tag(input_type=typ)
+    file_key = None
+    if upload:
+        file_key = f"verdict_file:{upload.digest}"
+        cached = _verdict_lookup(file_key)
+        if cached:
+            upload.cleanup()
+            metrics.tag(shortcut="file_cache")
+            return _store_check(user_id, typ, url, cached.get("text_snippet", ""), cached["result"])
+
+    image_hash = None
+    if upload and upload.ext in IMAGE_EXTENSIONS:
+        image_hash = fingerprint(upload.data if upload.data is not None else upload.path)
+
+    extracted_text = extract_text(typ, text, url, upload)
+
+    if image_hash is not None:
+        # the fingerprint only nominates a prior check; its text has to agree too
+        prior = find_match(image_hash, extracted_text)
+        if prior is not None:
+            result = json.loads(prior.result_json)
+            cache_set(file_key, {"result": result, "text_snippet": extracted_text[:4000]})
+            metrics.tag(shortcut="image_match")
+            return _store_check(user_id, typ, url, extracted_text, result)
+
+    query = extracted_text or url
+    if not query.strip():
+        # nothing to key on (e.g. OCR produced no text): don't pin this verdict
+        result, _ = verify_text(extracted_text, url)
+        return _store_check(user_id, typ, url, extracted_text, result)
+
+    text_key = make_key("verdict", query)
+    with metrics.span("verdict") as stage:
+        cached = _verdict_lookup(text_key)
+        claim_vector = None
+        settled = True
+        if cached:
+            result = cached["result"]
+            stage["cache"] = "hit"
+        else:
+            # identical checks submitted at the same time share one verification
+            verdict = verdict_flights.do(
+                text_key, _compute_verdict, extracted_text, url, query, text_key,
+                check=lambda: _verdict_lookup(text_key),
+            )
+            result = verdict["result"]
+            settled = verdict.get("settled", True)
+            stage["cache"] = verdict.get("via", "miss")
+            # only the first of the coalesced checks indexes the claim
+            claim_vector = verdict.pop("claim_vector", None)
+
+    if file_key and settled:
+        cache_set(file_key, {"result": result, "text_snippet": (extracted_text or "")[:4000]})
+
+    check_id = _store_check(user_id, typ, url, extracted_text, result)
+    if image_hash is not None and settled and extracted_text.strip():
+        remember(image_hash, check_id)
+    if claim_vector is not None:
+        _remember_claim(check_id, query, claim_vector)
+    return check_id
+
+
+def _similar_claim(query):
+    """(result of a past check of the same claim or None, claim embedding or None)."""
+    try:
+        prior, claim_vector = semantic_index.find_similar(query)
+    except Exception as e:
+        logger.warning(f"Semantic index lookup failed: {str(e)}")
+        return None, None
+    if prior is not None:
+        return json.loads(prior.result_json), None  # already indexed under the matching check
+    return None, claim_vector
+
+
+def _remember_claim(check_id, query, claim_vector):
+    # the check is already stored: indexing its claim is best effort
+    try:
+        semantic_index.remember(check_id, query, claim_vector)
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Semantic index update failed: {str(e)}")
+
+
+def _compute_verdict(extracted_text, url, query, text_key):
+    result, claim_vector = _similar_claim(query)
+    via, settled = "semantic", True
+    if result is None:
+        result, settled = verify_text(extracted_text, url)
+        via = "miss"
+    return _settle(text_key, result, claim_vector, via, settled)
+
+
+def _settle(text_key, result, claim_vector, via, settled):
+    # an error or a verdict with no evidence behind it is returned, never reused
+    if settled:
+        cache_set(text_key, {"result": result}, write_through=True)
+    else:
+        claim_vector = None
+    return {"result": result, "claim_vector": claim_vector, "via": via, "settled": settled}
+
+
+async def run_check_async(app, user_id, typ, text, url):
+    """
+    run_check() for text and URL inputs on the event loop: waiting on the
+    sources and GPT-4 holds no thread. DB and cache access, URL download and
+    claim embedding hop to worker threads inside `app`'s context.
+    """
+    def off_loop(fn, *args):
+        return asyncio.to_thread(in_app, app, fn, *args)
+
+    metrics.tag(input_type=typ)
+    extracted_text = await off_loop(extract_text, typ, text, url)
+    query = extracted_text or url
+    if not query.strip():
+        result, _ = await verify_text_async(extracted_text, url, app)
+        return await off_loop(_store_check, user_id, typ, url, extracted_text, result)
+
+    text_key = make_key("verdict", query)
+    with metrics.span("verdict") as stage:
+        cached = await off_loop(_verdict_lookup, text_key)
+        claim_vector = None
+        if cached:
+            result = cached["result"]
+            stage["cache"] = "hit"
+        else:
+            verdict = await async_verdict_flights.do(
+                text_key, _compute_verdict_async, app, extracted_text, url, query, text_key,
+            )
+            result = verdict["result"]
+            stage["cache"] = verdict.get("via", "miss")
+            claim_vector = verdict.pop("claim_vector", None)
+
+    check_id = await off_loop(_store_check, user_id, typ, url, extracted_text, result)
+    if claim_vector is not None:
+        await off_loop(_remember_claim, check_id, query, claim_vector)
+    return check_id
+
+
+async def _compute_verdict_async(app, extracted_text, url, query, text_key):
+    result, claim_vector = await asyncio.to_thread(in_app, app, _similar_claim, query)
+    via, settled = "semantic", True
+    if result is None:
+        result, settled = await verify_text_async(extracted_text, url, app)
+        via = "miss"
+    return await asyncio.to_thread(in_app, app, _settle, text_key, result, claim_vector, via, settled)
+
+
+def _store_check(user_id, typ, url, extracted_text, result):
+    # ✅ Save to DB (cache hits too, so they show up in the user's history)
+    with metrics.span("persist"):
+        chk = Check(
+            user_id=user_id,
+            input_type=typ,
+            input_url=url,
+            text_snippet=(extracted_text or "")[:4000],
+            result_json=json.dumps(result),
+        )
+        db.session.add(chk)
+        db.session.commit()
+    metrics.tag(verdict=result.get("status", "unknown"))
+    return chk.id
@@ -0,0 +1,270 @@
+import os
+import json
+import threading
+import time
+import logging
+from collections import deque
+
+try:
+    import numpy as np
+    import hnswlib
+    from sentence_transformers import SentenceTransformer
+    SEMANTIC_OK = True
+except Exception:
+    SEMANTIC_OK = False
+
+from config import (
+    SEMANTIC_ENABLED, SEMANTIC_MODEL, SEMANTIC_THRESHOLD, SEMANTIC_INDEX_PATH,
+    SEMANTIC_MEMORY_MB, SEMANTIC_M, SEMANTIC_EF, SEMANTIC_REFRESH,
+)
+from models import db, Check, ClaimEmbedding
+from utils.claim_utils import extract_claim_queries
+
+logger = logging.getLogger(__name__)
+
+# Near-duplicate (paraphrase) matching of claims against past checks.
+# Embeddings are computed once, by the worker that verified the claim, and
+# stored in claim_embeddings (float16). Each process keeps an HNSW graph over
+# them: it warm-starts from the snapshot at SEMANTIC_INDEX_PATH and then
+# catches up on rows added since, so no worker re-embeds anyone else's claims.
+
+
+class SemanticIndex:
+    """Memory-capped HNSW index (inner product on normalised vectors) keyed by check id."""
+
+    def __init__(self, dim, path=SEMANTIC_INDEX_PATH, memory_mb=SEMANTIC_MEMORY_MB, m=SEMANTIC_M):
+        self.dim = dim
+        self.path = path
+        self.m = m
+        # vector + level-0 links + label/bookkeeping, per element
+        per_element = dim * 4 + m * 2 * 4 + 64
+        self.capacity = max(int(memory_mb * 1024 * 1024 / per_element), 1000)
+        self.index = hnswlib.Index(space="ip", dim=dim)
+        self.labels = deque()  # insertion order, for replacing the oldest when full
+        self.last_id = 0  # highest claim_embeddings.id seen
+        self.lock = threading.Lock()
+        self.last_refresh = 0.0
+        if not self._load():
+            self.index.init_index(max_elements=self.capacity, ef_construction=200, M=m, allow_replace_deleted=True)
+        self.index.set_ef(SEMANTIC_EF)
+
+    def _load(self):
+        meta_path = self.path + ".json"
+        if not (os.path.exists(self.path) and os.path.exists(meta_path)):
+            return False
+        try:
+            with open(meta_path) as fh:
+                meta = json.load(fh)
+            if meta.get("dim") != self.dim or meta.get("model") != SEMANTIC_MODEL:
+                return False
+            self.index.load_index(self.path, max_elements=self.capacity, allow_replace_deleted=True)
+            live = set(self._live_ids())
+            # oldest first, as saved; older snapshots did not record the order
+            order = meta.get("labels") or sorted(live)
+            self.labels = deque(label for label in order if label in live)
+            self.last_id = meta.get("last_id", 0)
+            logger.info(f"Loaded semantic index snapshot with {len(self.labels)} claims")
+            return True
+        except Exception as e:
+            logger.warning(f"Semantic index snapshot unusable, rebuilding: {str(e)}")
+            self.index = hnswlib.Index(space="ip", dim=self.dim)
+            return False
+
+    def _live_ids(self):
+        # get_ids_list() also lists labels marked deleted; get_items() refuses those
+        for label in self.index.get_ids_list():
+            try:
+                self.index.get_items([label])
+            except RuntimeError:
+                continue
+            yield label
+
+    def add(self, vectors, check_ids):
+        with self.lock:
+            self._add(vectors, check_ids)
+
+    def _add(self, vectors, check_ids):
+        # caller holds self.lock
+        for vector, check_id in zip(vectors, check_ids):
+            if len(self.labels) >= self.capacity:
+                try:
+                    self.index.mark_deleted(self.labels.popleft())
+                except RuntimeError:
+                    pass  # already deleted: its slot is free anyway
+            self.index.add_items(vector[None, :], [check_id], replace_deleted=True)
+            self.labels.append(check_id)
+
+    def search(self, vector):
+        """Return (similarity, check_id) of the nearest claim, or None."""
+        with self.lock:
+            if not self.labels:
+                return None
+            ids, distances = self.index.knn_query(vector[None, :], k=1)
+        return 1.0 - float(distances[0][0]), int(ids[0][0])
+
+    def catch_up(self, force=False, batch_size=5000):
+        """
+        Add claim_embeddings rows newer than last_id. Needs an app context.
+        Runs under the index lock, so concurrent callers never add a row
+        twice; an unforced call returns at once while another catch-up runs.
+        """
+        if not self.lock.acquire(blocking=force):
+            return
+        try:
+            now = time.monotonic()
+            if not force and now - self.last_refresh < SEMANTIC_REFRESH:
+                return
+            self.last_refresh = now
+            while True:
+                rows = (
+                    ClaimEmbedding.query
+                    .with_entities(ClaimEmbedding.id, ClaimEmbedding.check_id, ClaimEmbedding.vector)
+                    .filter(ClaimEmbedding.id > self.last_id)
+                    .order_by(ClaimEmbedding.id)
+                    .limit(batch_size)
+                    .all()
+                )
+                if not rows:
+                    return
+                vectors = [np.frombuffer(v, dtype=np.float16).astype(np.float32) for _, _, v in rows]
+                self._add(vectors, [check_id for _, check_id, _ in rows])
+                self.last_id = rows[-1][0]
+        finally:
+            self.lock.release()
+
+    def save(self):
+        """Atomically write a snapshot (graph + metadata) for other processes to warm-start from."""
+        with self.lock:
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            self.index.save_index(tmp)
+            os.replace(tmp, self.path)
+            meta = {
+                "dim": self.dim, "model": SEMANTIC_MODEL, "last_id": self.last_id,
+                "count": len(self.labels), "labels": list(self.labels),
+            }
+            with open(tmp, "w") as fh:
+                json.dump(meta, fh)
+            os.replace(tmp, self.path + ".json")
+
+
+_model = None
+_index = None
+_failed = False
+_init_lock = threading.Lock()
+_stats = {"lookups": 0, "hits": 0}
+
+
+def _ready():
+    global _model, _index, _failed
+    if not (SEMANTIC_ENABLED and SEMANTIC_OK) or _failed:
+        return False
+    if _index is None:
+        with _init_lock:
+            if _index is None and not _failed:
+                try:
+                    _model = SentenceTransformer(SEMANTIC_MODEL, device="cpu")
+                    _index = SemanticIndex(_model.get_sentence_embedding_dimension())
+                except Exception as e:
+                    _failed = True
+                    logger.warning(f"Semantic index unavailable: {str(e)}")
+                    return False
+    return True
+
+
+def _claim_text(text):
+    # embed the leading claim, not the whole article: paraphrases of the same
+    # claim land close together while page boilerplate would pull them apart
+    claims = extract_claim_queries(text or "")
+    return claims[0] if claims else ""
+
+
+def embed(text):
+    return _model.encode([text], normalize_embeddings=True, convert_to_numpy=True)[0].astype(np.float32)
+
+
+def find_similar(text, threshold=SEMANTIC_THRESHOLD):
+    """
+    Return (Check, vector) for the most similar past claim above threshold,
+    or (None, vector) so the caller can remember() the claim without
+    embedding it twice. (None, None) when the index is unavailable.
+    """
+    claim = _claim_text(text)
+    if not claim or not _ready():
+        return None, None
+    vector = embed(claim)
+    _index.catch_up()
+    match = _index.search(vector)
+    _stats["lookups"] += 1
+    if match is None or match[0] < threshold:
+        return None, vector
+    similarity, check_id = match
+    chk = db.session.get(Check, check_id)
+    if chk is None:
+        return None, vector
+    _stats["hits"] += 1
+    logger.info(f"Claim matched check {check_id} (similarity {similarity:.3f})")
+    return chk, vector
+
+
+def remember(check_id, text, vector=None):
+    """Store the claim embedding of a freshly verified check."""
+    if not _ready():
+        return
+    if vector is None:
+        claim = _claim_text(text)
+        if not claim:
+            return
+        vector = embed(claim)
+    row = ClaimEmbedding(check_id=check_id, vector=vector.astype(np.float16).tobytes())
+    db.session.add(row)
+    db.session.commit()
+    _index.catch_up(force=True)
+
+
+def build_index(batch_size=256):
+    """
+    Embed past checks that have no claim embedding yet (from text_snippet),
+    catch the index up and write a snapshot. Returns the number embedded.
+    """
+    if not _ready():
+        return 0
+    embedded = 0
+    last_check = 0
+    while True:
+        checks = (
+            Check.query
+            .outerjoin(ClaimEmbedding, ClaimEmbedding.check_id == Check.id)
+            .filter(ClaimEmbedding.id.is_(None), Check.id > last_check)
+            .order_by(Check.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not checks:
+            break
+        last_check = checks[-1].id
+        pairs = []
+        for chk in checks:
+            claim = _claim_text(chk.text_snippet or chk.input_url)
+            if claim:
+                pairs.append((chk.id, claim))
+        if pairs:
+            vectors = _model.encode([c for _, c in pairs], normalize_embeddings=True, convert_to_numpy=True)
+            for (check_id, _), vector in zip(pairs, vectors):
+                db.session.add(ClaimEmbedding(check_id=check_id, vector=vector.astype(np.float16).tobytes()))
+            db.session.commit()
+            embedded += len(pairs)
+    _index.catch_up(force=True)
+    _index.save()
+    return embedded
+
+
+def semantic_index_stats():
+    lookups, hits = _stats["lookups"], _stats["hits"]
+    return {
+        "available": _index is not None,
+        "size": len(_index.labels) if _index is not None else 0,
+        "capacity": _index.capacity if _index is not None else 0,
+        "lookups": lookups,
+        "hits": hits,
+        "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+    }
@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+try:
+    import fcntl
+    FCNTL_OK = True
+except Exception:
+    FCNTL_OK = False
+
+from config import SINGLE_FLIGHT_CROSS_PROCESS, SINGLE_FLIGHT_LOCK_FILE, SINGLE_FLIGHT_WAIT
+
+logger = logging.getLogger(__name__)
+
+# Request coalescing. Within a process, concurrent callers with the same key
+# share one call of the function. Across processes, the leader of each
+# process takes a byte-range lock on SINGLE_FLIGHT_LOCK_FILE (one byte per key
+# hash); a process that had to wait for it first re-checks the shared cache,
+# which the other process's leader filled (write-through) before unlocking.
+
+_LOCK_SLOTS = 1 << 20
+
+_fd = None
+_fd_pid = None
+_fd_lock = threading.Lock()
+
+
+def _lock_fd():
+    # POSIX record locks belong to the process and are dropped when any of its
+    # descriptors for the file is closed, so keep one open per process.
+    global _fd, _fd_pid
+    if _fd_pid != os.getpid():
+        with _fd_lock:
+            if _fd_pid != os.getpid():
+                _fd = os.open(SINGLE_FLIGHT_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+                _fd_pid = os.getpid()
+    return _fd
+
+
+@contextmanager
+def process_lock(key, timeout):
+    """
+    Hold the cross-process lock for key. Yields (waited, timed_out): whether
+    another process held it first (so the caller should look for its result
+    before computing), and whether it gave up after timeout seconds without the lock.
+    """
+    if not (SINGLE_FLIGHT_CROSS_PROCESS and FCNTL_OK):
+        yield False, False
+        return
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    offset = int.from_bytes(digest, "big") % _LOCK_SLOTS
+    try:
+        fd = _lock_fd()
+    except OSError as e:
+        logger.warning(f"Single-flight lock file unavailable: {str(e)}")
+        yield False, False
+        return
+
+    waited = False
+    acquired = False
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset)
+            acquired = True
+            break
+        except OSError:
+            waited = True
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(0.05)
+    try:
+        yield waited, not acquired
+    finally:
+        if acquired:
+            fcntl.lockf(fd, fcntl.LOCK_UN, 1, offset)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key. A caller that has waited
+    `timeout` seconds on another's call computes on its own, or, with
+    compute_on_timeout=False, returns check() (None without one) instead.
+    """
+
+    def __init__(self, name, timeout=SINGLE_FLIGHT_WAIT, compute_on_timeout=True):
+        self.name = name
+        self.timeout = timeout
+        self.compute_on_timeout = compute_on_timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+        self.remote_hits = 0
+        self.gave_up = 0
+
+    def do(self, key, fn, *args, check=None):
+        """
+        Return fn(*args), computed once for all concurrent callers with this
+        key. `check()` is consulted (after waiting on another process) for a
+        result that process already published; None means "not there".
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            if call.done.wait(self.timeout):
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            return self._give_up(key, fn, args, check)
+
+        try:
+            with process_lock(f"{self.name}:{key}", self.timeout) as (waited, timed_out):
+                result = check() if (waited and check is not None) else None
+                if result is not None:
+                    self.remote_hits += 1
+                elif timed_out:
+                    result = self._give_up(key, fn, args, check=None)
+                else:
+                    result = fn(*args)
+            call.result = result
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _give_up(self, key, fn, args, check):
+        self.gave_up += 1
+        logger.warning(f"Single-flight {self.name}: gave up waiting on {key}")
+        if self.compute_on_timeout:
+            return fn(*args)
+        return check() if check is not None else None
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._calls)
+        return {
+            "in_flight": in_flight,
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "remote_hits": self.remote_hits,
+            "gave_up": self.gave_up,
+        }
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines on one event loop. In-process only: waiting
+    on the cross-process lock would block the loop.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._tasks = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key, fn, *args):
+        task = self._tasks.get(key)
+        if task is None:
+            self.leaders += 1
+            task = self._tasks[key] = asyncio.ensure_future(fn(*args))
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.followers += 1
+        # shield: a caller giving up (deadline) must not cancel the shared call
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {"in_flight": len(self._tasks), "leaders": self.leaders, "followers": self.followers}
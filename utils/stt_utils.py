@@ -0,0 +1,135 @@
+import time
+import threading
+import logging
+try:
+    from faster_whisper import WhisperModel
+    import av  # faster-whisper's own audio reader
+    import numpy as np
+    WHISPER_OK = True
+except Exception:
+    WHISPER_OK = False
+
+from config import (
+    STT_MODEL, STT_MODEL_DIR, STT_COMPUTE_TYPE, STT_CPU_THREADS,
+    STT_WORKERS, STT_LANGUAGE, STT_MAX_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Local CPU speech-to-text.
+# One quantized Whisper model per process, shared by up to STT_WORKERS
+# concurrent transcriptions. Audio is read with PyAV (faster-whisper's own
+# reader), so any file ffmpeg understands works, including video containers.
+# Decoding stops after STT_MAX_SECONDS: only that window is resampled to
+# 16 kHz mono and held in memory (about 64 KB per second of audio), so the
+# cap bounds memory and CPU, not just the transcript. Silero VAD drops
+# silence and segments are produced lazily, in 30s windows.
+
+SAMPLING_RATE = 16000
+
+_model = None
+_load_failed = False
+_load_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(STT_WORKERS)
+
+
+def get_model():
+    global _model, _load_failed
+    if not WHISPER_OK or _load_failed:
+        return None
+    if _model is None:
+        with _load_lock:
+            if _model is None and not _load_failed:
+                try:
+                    _model = WhisperModel(
+                        STT_MODEL,
+                        device="cpu",
+                        compute_type=STT_COMPUTE_TYPE,
+                        cpu_threads=STT_CPU_THREADS,
+                        num_workers=STT_WORKERS,
+                        download_root=STT_MODEL_DIR,
+                        local_files_only=True,
+                    )
+                    logger.info(f"Loaded speech-to-text model {STT_MODEL} ({STT_COMPUTE_TYPE})")
+                except Exception as e:
+                    _load_failed = True
+                    logger.warning(f"Speech-to-text unavailable: {str(e)}")
+    return _model
+
+
+def transcription_available():
+    return get_model() is not None
+
+
+def decode_head(fp, max_seconds, sampling_rate=SAMPLING_RATE):
+    """
+    Mono float32 samples of the first max_seconds of fp's first audio stream
+    (all of it when max_seconds is 0); the rest of the file is never decoded.
+    """
+    limit = int(max_seconds * sampling_rate) if max_seconds else None
+    resampler = av.audio.resampler.AudioResampler(format="s16", layout="mono", rate=sampling_rate)
+    chunks, total = [], 0
+    with av.open(fp, mode="r", metadata_errors="ignore") as container:
+        if not container.streams.audio:
+            return np.zeros(0, dtype=np.float32)
+        frames = container.decode(audio=0)
+        for frame in frames:
+            for out in resampler.resample(frame):
+                samples = out.to_ndarray().reshape(-1)
+                if limit is not None:
+                    samples = samples[: limit - total]
+                chunks.append(samples)
+                total += len(samples)
+            if limit is not None and total >= limit:
+                break
+        else:
+            for out in resampler.resample(None):  # flush the resampler's tail
+                chunks.append(out.to_ndarray().reshape(-1))
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks).astype(np.float32) / 32768.0
+
+
+def transcribe_stream(fp, max_seconds=STT_MAX_SECONDS, deadline=None):
+    """
+    Yield transcript segments of the first max_seconds of an audio/video file.
+    With a deadline (time.monotonic()), no segment is started after it.
+    """
+    model = get_model()
+    if model is None:
+        return
+    if deadline is None:
+        _slots.acquire()
+    elif not _slots.acquire(timeout=max(deadline - time.monotonic(), 0)):
+        return
+    try:
+        audio = decode_head(fp, max_seconds)
+        if not len(audio):
+            return
+        segments, info = model.transcribe(
+            audio,
+            language=STT_LANGUAGE,
+            beam_size=1,
+            vad_filter=True,
+            vad_parameters={"min_silence_duration_ms": 500},
+            condition_on_previous_text=False,
+        )
+        # segments are decoded lazily, one window per iteration
+        for segment in segments:
+            text = segment.text.strip()
+            if text:
+                yield text
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning("Transcription stopped at its deadline")
+                return
+    finally:
+        _slots.release()
+
+
+def transcribe_file(fp, deadline=None):
+    """Full transcript of an audio/video file ("" when no model is available)."""
+    try:
+        return " ".join(transcribe_stream(fp, deadline=deadline))
+    except Exception as e:
+        logger.error(f"Transcription failed: {str(e)}")
+        return ""
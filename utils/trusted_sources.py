@@ -1,412 +1,574 @@
-import json, time
-from urllib.parse import quote_plus
+import time, threading
+import asyncio
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import quote_plus, urljoin
 import requests
 from bs4 import BeautifulSoup
-from models import CacheEntry, db
+from flask import current_app, has_app_context
+from config import (
+    SOURCES_DEADLINE, SOURCES_MAX_WORKERS, SOURCES_DISABLED, SOURCE_TIMEOUTS,
+    SOURCES_HEDGE, SOURCES_HEDGE_PERCENTILE, SOURCES_HEDGE_MIN_SAMPLES, SOURCES_HEDGE_MIN_DELAY,
+)
+from utils.cache_utils import cache_lookup, cache_set, make_key
+from utils import http_client, async_http, metrics
+from utils.circuit_breaker import CircuitBreaker, percentile
+from utils.single_flight import SingleFlight, AsyncSingleFlight
+from utils.async_runtime import in_app, drive, drive_async
+from utils.claim_utils import extract_claim_queries
 import logging
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-CACHE_TTL = 60 * 60 * 24  # 24 hours
-
 def _cache_get(key):
-    entry = CacheEntry.query.filter_by(key=key).first()
-    if not entry:
+    return cache_lookup(key)
+
+def _cache_set(key, value, write_through=False):
+    cache_set(key, value, write_through=write_through)
+
+
+class SourceAdapter:
+    """
+    Declarative description of one trusted source.
+
+    The default parser takes the first element matching `selector` in the
+    HTML page at `url_template` (formatted with the URL-quoted query) and
+    resolves its href against `base_url`. Sources that need more supply their
+    own `parse(adapter, response)`; `shape_query` trims the query for sources
+    that match on a few terms only, and `fallback` is tried (under the same
+    cache key) when this adapter finds nothing.
+    """
+
+    def __init__(self, key, name, url_template, selector=None, weight=70, timeout=None,
+                 enabled=True, namespace=None, base_url="", parse=None, shape_query=None,
+                 headers=None, fallback=None):
+        self.key = key
+        self.name = name
+        self.url_template = url_template
+        self.selector = selector
+        self.weight = weight
+        # read timeout in seconds; None uses the per-host default in http_client
+        self.timeout = SOURCE_TIMEOUTS.get(key, timeout)
+        self.enabled = enabled and key not in SOURCES_DISABLED
+        self.namespace = namespace or key
+        self.base_url = base_url
+        self.parse = parse or _parse_first_link
+        self.shape_query = shape_query
+        self.headers = headers
+        self.fallback = fallback
+        self.breaker = CircuitBreaker()
+        self.latencies = deque(maxlen=200)  # recent successful fetch times, for hedging
+
+    def hedge_delay(self):
+        """Seconds to wait before hedging a live fetch, or None when hedging is off."""
+        if not SOURCES_HEDGE or len(self.latencies) < SOURCES_HEDGE_MIN_SAMPLES:
+            return None
+        return max(percentile(list(self.latencies), SOURCES_HEDGE_PERCENTILE), SOURCES_HEDGE_MIN_DELAY)
+
+    def url_for(self, query):
+        if self.shape_query:
+            query = self.shape_query(query)
+        return self.url_template.format(q=quote_plus(query))
+
+    def __repr__(self):
+        return f"<SourceAdapter {self.key}>"
+
+
+def _parse_first_link(adapter, response):
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, "html.parser")
+    first = soup.select_one(adapter.selector)
+    if not first:
         return None
-    age = (time.time() - entry.timestamp.timestamp())
-    if age > CACHE_TTL:
-        try:
-            db.session.delete(entry)
-            db.session.commit()
-        except:
-            db.session.rollback()
+    return {
+        "name": adapter.name,
+        "url": urljoin(adapter.base_url, first.get("href", "")),
+        "snippet": first.get_text(strip=True)[:200],
+    }
+
+
+def _parse_wiki_summary(adapter, response):
+    if response.status_code == 404:
+        return None  # no page by that title: an ordinary miss, the search fallback runs next
+    response.raise_for_status()
+    data = response.json()
+    if not data.get("extract"):
         return None
-    try:
-        return json.loads(entry.value)
-    except:
+    return {
+        "name": adapter.name,
+        "url": data.get("content_urls", {}).get("desktop", {}).get("page", ""),
+        "snippet": data.get("extract", "")[:300],
+    }
+
+
+def _parse_wiki_search(adapter, response):
+    response.raise_for_status()
+    pages = response.json().get("pages") or []
+    if not pages:
         return None
+    page = pages[0]
+    return {
+        "name": adapter.name,
+        "url": f"https://en.wikipedia.org/wiki/{quote_plus(page.get('key', ''))}",
+        "snippet": page.get("snippet", "")[:300],
+    }
 
-def _cache_set(key, value):
-    text = json.dumps(value)
-    entry = CacheEntry.query.filter_by(key=key).first()
-    if entry:
-        entry.value = text
-        entry.timestamp = db.func.current_timestamp()
+
+# ✅ Source registry — order is the order results are reported in.
+# `weight` is the reliability score used by ai_utils.analyze_source_reliability;
+# `namespace` keeps the cache keys the fetchers have always used.
+SOURCES = [
+    SourceAdapter(
+        "wiki", "Wikipedia",
+        "https://en.wikipedia.org/api/rest_v1/page/summary/{q}",
+        weight=80, parse=_parse_wiki_summary,
+        shape_query=lambda q: " ".join(q[:100].split()[:5]),  # first 5 words
+        headers={"User-Agent": "TruthMate/1.0"},
+        fallback=SourceAdapter(
+            "wiki_search", "Wikipedia",
+            "https://en.wikipedia.org/api/rest_v1/page/search/{q}",
+            parse=_parse_wiki_search, shape_query=lambda q: q[:50],
+            headers={"User-Agent": "TruthMate/1.0"},
+        ),
+    ),
+    SourceAdapter(
+        "google_news", "Google News",
+        "https://news.google.com/search?q={q}&hl=en-IN&gl=IN&ceid=IN:en",
+        selector="article a", weight=75, namespace="gnews", base_url="https://news.google.com/",
+    ),
+    SourceAdapter(
+        "altnews", "AltNews (India Fact Check)",
+        "https://www.altnews.in/?s={q}",
+        selector=".td-module-title a", weight=95, base_url="https://www.altnews.in/",
+    ),
+    SourceAdapter(
+        "boom", "BoomLive (India Fact Check)",
+        "https://www.boomlive.in/search?q={q}",
+        selector="a.card-title", weight=94, base_url="https://www.boomlive.in/",
+    ),
+    SourceAdapter(
+        "reuters", "Reuters",
+        "https://www.reuters.com/site-search/?query={q}",
+        selector="a.search-result-title", weight=92, base_url="https://www.reuters.com/",
+    ),
+    SourceAdapter(
+        "bbc", "BBC News",
+        "https://www.bbc.co.uk/search?q={q}",
+        selector=".ssrcss-6arcww-PromoHeadline a", weight=92, base_url="https://www.bbc.co.uk/",
+    ),
+    SourceAdapter(
+        "snopes", "Snopes",
+        "https://www.snopes.com/?s={q}",
+        selector=".search-results .card a", weight=98, base_url="https://www.snopes.com/",
+    ),
+    SourceAdapter(
+        "factcheck", "FactCheck.org",
+        "https://www.factcheck.org/?s={q}",
+        selector=".entry-title a", weight=97, base_url="https://www.factcheck.org/",
+    ),
+    SourceAdapter(
+        "politifact", "PolitiFact",
+        "https://www.politifact.com/search/?q={q}",
+        selector=".o-title a, .c-quote__title a", weight=96, base_url="https://www.politifact.com/",
+    ),
+]
+SOURCES_BY_KEY = {adapter.key: adapter for adapter in SOURCES}
+
+
+def source_weight(key, default=70):
+    adapter = SOURCES_BY_KEY.get(key)
+    return adapter.weight if adapter else default
+
+
+# Per-source counters, per process.
+_source_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(key, outcome, elapsed=None):
+    with _stats_lock:
+        st = _source_stats.setdefault(key, {
+            "requests": 0, "cache_hits": 0, "stale_hits": 0, "refreshes": 0, "hedges": 0, "skipped": 0, "found": 0, "empty": 0,
+            "errors": 0, "timeouts": 0, "fetch_ms_total": 0.0,
+        })
+        if outcome in ("cache_hits", "stale_hits", "refreshes", "hedges", "skipped"):
+            st[outcome] += 1
+            return
+        st["requests"] += 1
+        st[outcome] += 1
+        if elapsed is not None:
+            st["fetch_ms_total"] += elapsed * 1000
+
+
+def source_stats():
+    with _stats_lock:
+        stats = {}
+        for adapter in SOURCES:
+            st = dict(_source_stats.get(adapter.key, {}))
+            fetches = st.get("requests", 0)
+            st["avg_fetch_ms"] = round(st.pop("fetch_ms_total", 0.0) / fetches, 1) if fetches else 0.0
+            st["enabled"] = adapter.enabled
+            st["weight"] = adapter.weight
+            st["breaker"] = adapter.breaker.snapshot()
+            stats[adapter.key] = st
+        return stats
+
+
+_TIMEOUT_ERRORS = (requests.exceptions.Timeout,)
+_HTTP_ERRORS = (requests.exceptions.HTTPError,)
+_CONNECTION_ERRORS = (requests.exceptions.ConnectionError,)
+if async_http.HTTPX_OK:
+    _TIMEOUT_ERRORS += (async_http.httpx.TimeoutException,)
+    _HTTP_ERRORS += (async_http.httpx.HTTPStatusError,)
+    _CONNECTION_ERRORS += (async_http.httpx.TransportError,)
+
+
+def _failure_outcome(adapter, query, e):
+    """Log a failed fetch (sync or async client) and classify it for the counters."""
+    if isinstance(e, _TIMEOUT_ERRORS):
+        logger.error(f"{adapter.name}: Request timeout for query: {query[:50]}")
+        return "timeouts"
+    if isinstance(e, _HTTP_ERRORS):
+        logger.error(f"{adapter.name}: HTTP error {e.response.status_code} for query: {query[:50]}")
+    elif isinstance(e, _CONNECTION_ERRORS):
+        logger.error(f"{adapter.name}: Connection error for query: {query[:50]} - {str(e)}")
     else:
-        entry = CacheEntry(key=key, value=text)
-        db.session.add(entry)
-    try:
-        db.session.commit()
-    except:
-        db.session.rollback()
+        logger.error(f"{adapter.name}: Unexpected error for query: {query[:50]} - {str(e)}")
+    return "errors"
 
 
-# ✅ GOOGLE NEWS
-def google_news(query):
-    key = f"gnews:{query}"
-    cached = _cache_get(key)
-    if cached:
-        logger.info(f"Google News: Cache hit for query: {query[:50]}")
-        return cached
-    try:
-        url = f"https://news.google.com/search?q={quote_plus(query)}&hl=en-IN&gl=IN&ceid=IN:en"
-        logger.info(f"Google News: Fetching {url}")
-        r = requests.get(url, timeout=8, headers={"User-Agent":"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"})
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        first = soup.select_one("article a")
-        if first:
-            title = first.get_text(strip=True)[:200]
-            href = "https://news.google.com" + first['href'][1:]
-            res = {"name":"Google News", "url": href, "snippet": title}
-            _cache_set(key, res)
-            logger.info(f"Google News: Found result - {title[:50]}")
-            return res
+def _timeout_of(adapter):
+    return (3.05, adapter.timeout) if adapter.timeout else None
+
+
+# The engine's control flow is written once, as plans (see utils/async_runtime.py):
+# the sync engine drives them on threads, the async one on the event loop.
+
+def _fetch_plan(adapter, query):
+    """
+    Try the adapter, then its fallbacks: each attempt yields ("get", (adapter, url))
+    and is sent the parsed result. Returns (result, outcome of the last attempt).
+    """
+    outcome = "empty"
+    while adapter is not None:
+        url = adapter.url_for(query)
+        logger.debug(f"{adapter.name}: Fetching {url}")
+        try:
+            res = yield "get", (adapter, url)
+        except Exception as e:
+            outcome = _failure_outcome(adapter, query, e)
         else:
-            logger.warning(f"Google News: No results found for query: {query[:50]}")
-    except requests.exceptions.Timeout:
-        logger.error(f"Google News: Request timeout for query: {query[:50]}")
-    except requests.exceptions.ConnectionError as e:
-        logger.error(f"Google News: Connection error for query: {query[:50]} - {str(e)}")
-    except requests.exceptions.HTTPError as e:
-        logger.error(f"Google News: HTTP error {e.response.status_code} for query: {query[:50]}")
-    except Exception as e:
-        logger.error(f"Google News: Unexpected error for query: {query[:50]} - {str(e)}")
-    return None
+            if res:
+                logger.debug(f"{adapter.name}: Found result - {res['snippet'][:50]}")
+                return res, "found"
+            logger.debug(f"{adapter.name}: No results found for query: {query[:50]}")
+            outcome = "empty"
+        adapter = adapter.fallback
+    return None, outcome
 
 
-# ✅ ALT NEWS INDIA
-def altnews_search(query):
-    key = f"altnews:{query}"
-    cached = _cache_get(key)
+def _attempt_plan(adapter, query):
+    """One live fetch, fed into the source's breaker and latency history."""
+    start = time.monotonic()
+    res, outcome = yield from _fetch_plan(adapter, query)
+    elapsed = time.monotonic() - start
+    ok = outcome in ("found", "empty")
+    adapter.breaker.record(ok, elapsed)
+    if ok:
+        adapter.latencies.append(elapsed)
+    return res, outcome
+
+
+def _store_plan(adapter, query, key):
+    """Hedged live fetch ("hedged"), counted, and cached when it found something ("store")."""
+    start = time.monotonic()
+    res, outcome = yield "hedged", (adapter, query)
+    _record(adapter.key, outcome, time.monotonic() - start)
+    if res:
+        # committed right away: workers coalesced onto this fetch read it from the DB
+        yield "store", (key, res)
+    return res
+
+
+def _source_plan(adapter, query, key, stage):
+    """Cache lookup ("cached"), circuit breaker, then a single-flight live fetch ("fetch")."""
+    cached = yield "cached", (adapter, query, key, stage)
     if cached:
-        logger.info(f"AltNews: Cache hit for query: {query[:50]}")
         return cached
+    permit = adapter.breaker.acquire()
+    if permit is None:
+        _record(adapter.key, "skipped")
+        stage["outcome"] = "skipped"
+        return None
+    stage["cache"] = "miss"
     try:
-        url = f"https://www.altnews.in/?s={quote_plus(query)}"
-        logger.info(f"AltNews: Fetching {url}")
-        r = requests.get(url, timeout=8, headers={"User-Agent":"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"})
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        first = soup.select_one(".td-module-title a")
-        if first:
-            title = first.get_text(strip=True)[:200]
-            href = first['href']
-            res = {"name":"AltNews (India Fact Check)", "url": href, "snippet": title}
-            _cache_set(key, res)
-            logger.info(f"AltNews: Found result - {title[:50]}")
-            return res
-        else:
-            logger.warning(f"AltNews: No results found for query: {query[:50]}")
-    except requests.exceptions.Timeout:
-        logger.error(f"AltNews: Request timeout for query: {query[:50]}")
-    except requests.exceptions.ConnectionError as e:
-        logger.error(f"AltNews: Connection error for query: {query[:50]} - {str(e)}")
-    except requests.exceptions.HTTPError as e:
-        logger.error(f"AltNews: HTTP error {e.response.status_code} for query: {query[:50]}")
-    except Exception as e:
-        logger.error(f"AltNews: Unexpected error for query: {query[:50]} - {str(e)}")
-    return None
+        res = yield "fetch", (adapter, query, key)
+    finally:
+        # answered by someone else's fetch: a probe permit was never used
+        adapter.breaker.release(permit)
+    stage["outcome"] = "found" if res else "none"
+    return res
 
 
-# ✅ BOOMLIVE INDIA
-def boomlive_search(query):
-    key = f"boom:{query}"
-    cached = _cache_get(key)
-    if cached:
-        logger.info(f"BoomLive: Cache hit for query: {query[:50]}")
-        return cached
+def _hedge_now(adapter, first_done):
+    """Past the hedge delay: fire a duplicate unless the first attempt answered or the breaker objects."""
+    if first_done or not adapter.breaker.allow():
+        return False
+    _record(adapter.key, "hedges")
+    return True
+
+
+def _pick_attempt(finished, picked):
+    """The first finished attempt that found something, else the last one seen."""
+    for attempt in finished:
+        picked = attempt.result()
+        if picked[0]:
+            break
+    return picked
+
+
+def _get(adapter, url):
+    return adapter.parse(adapter, http_client.get(url, headers=adapter.headers, timeout=_timeout_of(adapter)))
+
+
+def _fetch_uncached(adapter, query):
+    """Try the adapter, then its fallbacks; returns (result, outcome of the last attempt)."""
+    return drive(_fetch_plan(adapter, query), {"get": _get})
+
+
+def _attempt(adapter, query):
+    return drive(_attempt_plan(adapter, query), {"get": _get})
+
+
+def _fetch_hedged(adapter, query):
+    """
+    Live fetch; once it has run past the source's hedge delay a duplicate is
+    fired and the first useful answer wins. The loser finishes in the
+    background and only feeds the breaker and latency history.
+    """
+    delay = adapter.hedge_delay()
+    if delay is None:
+        return _attempt(adapter, query)
+    first = _hedge_executor.submit(_attempt, adapter, query)
+    done, _ = wait([first], timeout=delay)
+    if not _hedge_now(adapter, bool(done)):
+        return first.result()
+    pending = {first, _hedge_executor.submit(_attempt, adapter, query)}
+    picked = (None, "empty")
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        picked = _pick_attempt(done, picked)
+        if picked[0]:
+            break
+    return picked
+
+
+def _fetch_and_store(adapter, query, key):
+    return drive(_store_plan(adapter, query, key), {
+        "hedged": _fetch_hedged,
+        "store": lambda key, res: _cache_set(key, res, write_through=True),
+    })
+
+
+# A caller that waits longer than the fan-out deadline has already been given
+# up on: it stops waiting (freeing its _executor thread) instead of fetching too.
+source_flights = SingleFlight("source", timeout=SOURCES_DEADLINE, compute_on_timeout=False)
+
+# Keys with a background refresh in flight, so a hot stale entry is refreshed once.
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _revalidate(adapter, query, key):
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    if not adapter.breaker.allow():
+        with _refreshing_lock:
+            _refreshing.discard(key)
+        return
+    _record(adapter.key, "refreshes")
+    app = current_app._get_current_object() if has_app_context() else None
+    _executor.submit(_refresh, app, adapter, query, key)
+
+
+def _refresh(app, adapter, query, key):
     try:
-        url = f"https://www.boomlive.in/search?q={quote_plus(query)}"
-        logger.info(f"BoomLive: Fetching {url}")
-        r = requests.get(url, timeout=8, headers={"User-Agent":"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"})
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        first = soup.select_one("a.card-title")
-        if first:
-            title = first.get_text(strip=True)[:200]
-            href = first['href']
-            if not href.startswith("http"):
-                href = "https://www.boomlive.in" + href
-            res = {"name":"BoomLive (India Fact Check)", "url": href, "snippet": title}
-            _cache_set(key, res)
-            logger.info(f"BoomLive: Found result - {title[:50]}")
-            return res
+        if app is None:
+            _fetch_and_store(adapter, query, key)
         else:
-            logger.warning(f"BoomLive: No results found for query: {query[:50]}")
-    except requests.exceptions.Timeout:
-        logger.error(f"BoomLive: Request timeout for query: {query[:50]}")
-    except requests.exceptions.ConnectionError as e:
-        logger.error(f"BoomLive: Connection error for query: {query[:50]} - {str(e)}")
-    except requests.exceptions.HTTPError as e:
-        logger.error(f"BoomLive: HTTP error {e.response.status_code} for query: {query[:50]}")
+            with app.app_context():
+                _fetch_and_store(adapter, query, key)
     except Exception as e:
-        logger.error(f"BoomLive: Unexpected error for query: {query[:50]} - {str(e)}")
-    return None
+        logger.error(f"{adapter.name}: Background refresh failed - {str(e)}")
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def _cached_result(adapter, query, key, stage):
+    """Cache side of the engine: the cached result (stale ones get refreshed), or None."""
+    cached, stale = _cache_get(key)
+    if not cached:
+        return None
+    logger.debug(f"{adapter.name}: Cache hit for query: {query[:50]}")
+    _record(adapter.key, "stale_hits" if stale else "cache_hits")
+    stage["cache"] = "stale" if stale else "hit"
+    stage["outcome"] = "found"
+    if stale:
+        _revalidate(adapter, query, key)
+    return cached
+
+
+def fetch_source(adapter, query):
+    """
+    Shared engine for every adapter: cache lookup, circuit breaker, fetch,
+    metrics, cache fill. Cached results are served even while the source's
+    breaker is open; live fetches are skipped until it lets a probe through.
+    A stale cached result (past CACHE_TTL, within CACHE_HARD_TTL) is returned
+    right away and refreshed in the background. Live fetches are single-flight
+    per cache key.
+    """
+    def fetch(adapter, query, key):
+        # identical concurrent fetches (this worker or others) wait on one request
+        return source_flights.do(key, _fetch_and_store, adapter, query, key, check=lambda: _cache_get(key)[0])
+
+    key = make_key(adapter.namespace, query)
+    with metrics.span("source", source=adapter.key) as stage:
+        return drive(_source_plan(adapter, query, key, stage), {"cached": _cached_result, "fetch": fetch})
+
+
+# ✅ Async engine (asyncio pipeline): the same plans, with HTTP through
+# utils/async_http.py. Cache and DB work runs on worker threads inside `app`'s
+# context so the loop never blocks on SQLite.
+async_source_flights = AsyncSingleFlight("source")
+
+
+async def _get_async(adapter, url):
+    r = await async_http.get(url, headers=adapter.headers, timeout=_timeout_of(adapter))
+    return await asyncio.to_thread(adapter.parse, adapter, r)  # HTML parsing is CPU work
+
+
+async def _attempt_async(adapter, query):
+    return await drive_async(_attempt_plan(adapter, query), {"get": _get_async})
+
+
+async def _fetch_hedged_async(adapter, query):
+    delay = adapter.hedge_delay()
+    if delay is None:
+        return await _attempt_async(adapter, query)
+    first = asyncio.ensure_future(_attempt_async(adapter, query))
+    done, _ = await asyncio.wait([first], timeout=delay)
+    if not _hedge_now(adapter, bool(done)):
+        return await first
+    pending = {first, asyncio.ensure_future(_attempt_async(adapter, query))}
+    picked = (None, "empty")
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        picked = _pick_attempt(done, picked)
+        if picked[0]:
+            break
+    return picked
+
+
+async def _fetch_and_store_async(app, adapter, query, key):
+    async def store(key, res):
+        await asyncio.to_thread(in_app, app, _cache_set, key, res, True)
+
+    return await drive_async(_store_plan(adapter, query, key), {"hedged": _fetch_hedged_async, "store": store})
+
+
+async def fetch_source_async(adapter, query, app=None):
+    """Async fetch_source(). Live fetches are single-flight within this process."""
+    async def cached(*args):
+        return await asyncio.to_thread(in_app, app, _cached_result, *args)
+
+    async def fetch(adapter, query, key):
+        return await async_source_flights.do(key, _fetch_and_store_async, app, adapter, query, key)
+
+    key = make_key(adapter.namespace, query)
+    with metrics.span("source", source=adapter.key) as stage:
+        return await drive_async(_source_plan(adapter, query, key, stage), {"cached": cached, "fetch": fetch})
+
+
+# ✅ Per-source entry points (kept for callers that want a single source)
+def google_news(query):
+    return fetch_source(SOURCES_BY_KEY["google_news"], query)
+
+
+def altnews_search(query):
+    return fetch_source(SOURCES_BY_KEY["altnews"], query)
+
+
+def boomlive_search(query):
+    return fetch_source(SOURCES_BY_KEY["boom"], query)
 
 
-# ✅ REUTERS
 def reuters_search(query):
-    key = f"reuters:{query}"
-    cached = _cache_get(key)
-    if cached:
-        logger.info(f"Reuters: Cache hit for query: {query[:50]}")
-        return cached
-    try:
-        url = f"https://www.reuters.com/site-search/?query={quote_plus(query)}"
-        logger.info(f"Reuters: Fetching {url}")
-        r = requests.get(url, timeout=8, headers={"User-Agent":"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"})
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        first = soup.select_one("a.search-result-title")
-        if first:
-            title = first.get_text(strip=True)[:200]
-            href = "https://www.reuters.com" + first['href']
-            res = {"name":"Reuters", "url": href, "snippet": title}
-            _cache_set(key, res)
-            logger.info(f"Reuters: Found result - {title[:50]}")
-            return res
-        else:
-            logger.warning(f"Reuters: No results found for query: {query[:50]}")
-    except requests.exceptions.Timeout:
-        logger.error(f"Reuters: Request timeout for query: {query[:50]}")
-    except requests.exceptions.ConnectionError as e:
-        logger.error(f"Reuters: Connection error for query: {query[:50]} - {str(e)}")
-    except requests.exceptions.HTTPError as e:
-        logger.error(f"Reuters: HTTP error {e.response.status_code} for query: {query[:50]}")
-    except Exception as e:
-        logger.error(f"Reuters: Unexpected error for query: {query[:50]} - {str(e)}")
-    return None
+    return fetch_source(SOURCES_BY_KEY["reuters"], query)
 
 
-# ✅ BBC
 def bbc_search(query):
-    key = f"bbc:{query}"
-    cached = _cache_get(key)
-    if cached:
-        logger.info(f"BBC: Cache hit for query: {query[:50]}")
-        return cached
-    try:
-        url = f"https://www.bbc.co.uk/search?q={quote_plus(query)}"
-        logger.info(f"BBC: Fetching {url}")
-        r = requests.get(url, timeout=8, headers={"User-Agent":"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"})
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        first = soup.select_one(".ssrcss-6arcww-PromoHeadline a")
-        if first:
-            title = first.get_text(strip=True)[:200]
-            href = first['href']
-            res = {"name":"BBC News", "url": href, "snippet": title}
-            _cache_set(key, res)
-            logger.info(f"BBC: Found result - {title[:50]}")
-            return res
-        else:
-            logger.warning(f"BBC: No results found for query: {query[:50]}")
-    except requests.exceptions.Timeout:
-        logger.error(f"BBC: Request timeout for query: {query[:50]}")
-    except requests.exceptions.ConnectionError as e:
-        logger.error(f"BBC: Connection error for query: {query[:50]} - {str(e)}")
-    except requests.exceptions.HTTPError as e:
-        logger.error(f"BBC: HTTP error {e.response.status_code} for query: {query[:50]}")
-    except Exception as e:
-        logger.error(f"BBC: Unexpected error for query: {query[:50]} - {str(e)}")
-    return None
+    return fetch_source(SOURCES_BY_KEY["bbc"], query)
 
 
-# ✅ SNOPES
 def snopes_search(query):
-    key = f"snopes:{query}"
-    cached = _cache_get(key)
-    if cached:
-        logger.info(f"Snopes: Cache hit for query: {query[:50]}")
-        return cached
-    try:
-        url = f"https://www.snopes.com/?s={quote_plus(query)}"
-        logger.info(f"Snopes: Fetching {url}")
-        r = requests.get(url, timeout=8, headers={"User-Agent":"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"})
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        first = soup.select_one(".search-results .card a")
-        if first:
-            title = first.get_text(strip=True)[:200]
-            href = first['href']
-            res = {"name":"Snopes", "url": href, "snippet": title}
-            _cache_set(key, res)
-            logger.info(f"Snopes: Found result - {title[:50]}")
-            return res
-        else:
-            logger.warning(f"Snopes: No results found for query: {query[:50]}")
-    except requests.exceptions.Timeout:
-        logger.error(f"Snopes: Request timeout for query: {query[:50]}")
-    except requests.exceptions.ConnectionError as e:
-        logger.error(f"Snopes: Connection error for query: {query[:50]} - {str(e)}")
-    except requests.exceptions.HTTPError as e:
-        logger.error(f"Snopes: HTTP error {e.response.status_code} for query: {query[:50]}")
-    except Exception as e:
-        logger.error(f"Snopes: Unexpected error for query: {query[:50]} - {str(e)}")
-    return None
+    return fetch_source(SOURCES_BY_KEY["snopes"], query)
 
 
-# ✅ FACTCHECK.org
 def factcheck_search(query):
-    key = f"factcheck:{query}"
-    cached = _cache_get(key)
-    if cached:
-        logger.info(f"FactCheck: Cache hit for query: {query[:50]}")
-        return cached
-    try:
-        url = f"https://www.factcheck.org/?s={quote_plus(query)}"
-        logger.info(f"FactCheck: Fetching {url}")
-        r = requests.get(url, timeout=8, headers={"User-Agent":"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"})
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        first = soup.select_one(".entry-title a")
-        if first:
-            title = first.get_text(strip=True)[:200]
-            href = first['href']
-            res = {"name":"FactCheck.org", "url": href, "snippet": title}
-            _cache_set(key, res)
-            logger.info(f"FactCheck: Found result - {title[:50]}")
-            return res
-        else:
-            logger.warning(f"FactCheck: No results found for query: {query[:50]}")
-    except requests.exceptions.Timeout:
-        logger.error(f"FactCheck: Request timeout for query: {query[:50]}")
-    except requests.exceptions.ConnectionError as e:
-        logger.error(f"FactCheck: Connection error for query: {query[:50]} - {str(e)}")
-    except requests.exceptions.HTTPError as e:
-        logger.error(f"FactCheck: HTTP error {e.response.status_code} for query: {query[:50]}")
-    except Exception as e:
-        logger.error(f"FactCheck: Unexpected error for query: {query[:50]} - {str(e)}")
-    return None
+    return fetch_source(SOURCES_BY_KEY["factcheck"], query)
 
 
-# ✅ POLITIFACT
 def politifact_search(query):
-    key = f"politifact:{query}"
-    cached = _cache_get(key)
-    if cached:
-        logger.info(f"PolitiFact: Cache hit for query: {query[:50]}")
-        return cached
-    try:
-        url = f"https://www.politifact.com/search/?q={quote_plus(query)}"
-        logger.info(f"PolitiFact: Fetching {url}")
-        r = requests.get(url, timeout=8, headers={"User-Agent":"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"})
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        first = soup.select_one('.o-title a, .c-quote__title a')
-        if first:
-            title = first.get_text(strip=True)[:200]
-            href = first['href']
-            if not href.startswith("http"):
-                href = "https://www.politifact.com" + href
-            res = {"name":"PolitiFact", "url": href, "snippet": title}
-            _cache_set(key, res)
-            logger.info(f"PolitiFact: Found result - {title[:50]}")
-            return res
-        else:
-            logger.warning(f"PolitiFact: No results found for query: {query[:50]}")
-    except requests.exceptions.Timeout:
-        logger.error(f"PolitiFact: Request timeout for query: {query[:50]}")
-    except requests.exceptions.ConnectionError as e:
-        logger.error(f"PolitiFact: Connection error for query: {query[:50]} - {str(e)}")
-    except requests.exceptions.HTTPError as e:
-        logger.error(f"PolitiFact: HTTP error {e.response.status_code} for query: {query[:50]}")
-    except Exception as e:
-        logger.error(f"PolitiFact: Unexpected error for query: {query[:50]} - {str(e)}")
-    return None
+    return fetch_source(SOURCES_BY_KEY["politifact"], query)
 
 
-
-# ✅ WIKIPEDIA API
 def wikipedia_search(query):
-    key = f"wiki:{query}"
-    cached = _cache_get(key)
-    if cached:
-        logger.info(f"Wikipedia: Cache hit for query: {query[:50]}")
-        return cached
-    try:
-        # Extract key terms for Wikipedia search
-        search_terms = query[:100].split()[:5]  # First 5 words
-        search_query = " ".join(search_terms)
-        
-        # Wikipedia API search
-        search_url = "https://en.wikipedia.org/api/rest_v1/page/summary/" + quote_plus(search_query)
-        logger.info(f"Wikipedia: Fetching {search_url}")
-        r = requests.get(search_url, timeout=8, headers={"User-Agent": "TruthMate/1.0"})
-        
-        if r.status_code == 200:
-            data = r.json()
-            if data.get("extract"):
-                res = {
-                    "name": "Wikipedia",
-                    "url": data.get("content_urls", {}).get("desktop", {}).get("page", ""),
-                    "snippet": data.get("extract", "")[:300]
-                }
-                _cache_set(key, res)
-                logger.info(f"Wikipedia: Found result - {data.get('title', 'Unknown')}")
-                return res
-            else:
-                logger.warning(f"Wikipedia: No extract found for query: {query[:50]}")
-        else:
-            logger.warning(f"Wikipedia: HTTP {r.status_code} for query: {query[:50]}")
-    except requests.exceptions.Timeout:
-        logger.error(f"Wikipedia: Request timeout for query: {query[:50]}")
-    except requests.exceptions.ConnectionError as e:
-        logger.error(f"Wikipedia: Connection error for query: {query[:50]} - {str(e)}")
-    except Exception as e:
-        logger.error(f"Wikipedia: Error in summary API for query: {query[:50]} - {str(e)}")
-    
-    # Fallback: try Wikipedia search API
-    try:
-        search_url = f"https://en.wikipedia.org/api/rest_v1/page/search/{quote_plus(query[:50])}"
-        logger.info(f"Wikipedia: Trying search API - {search_url}")
-        r = requests.get(search_url, timeout=8, headers={"User-Agent": "TruthMate/1.0"})
-        if r.status_code == 200:
-            results = r.json()
-            if results.get("pages") and len(results["pages"]) > 0:
-                page = results["pages"][0]
-                res = {
-                    "name": "Wikipedia",
-                    "url": f"https://en.wikipedia.org/wiki/{quote_plus(page.get('key', ''))}",
-                    "snippet": page.get("snippet", "")[:300]
-                }
-                _cache_set(key, res)
-                logger.info(f"Wikipedia: Found result via search API - {page.get('key', 'Unknown')}")
-                return res
-            else:
-                logger.warning(f"Wikipedia: No pages found in search API for query: {query[:50]}")
-        else:
-            logger.warning(f"Wikipedia: HTTP {r.status_code} in search API for query: {query[:50]}")
-    except requests.exceptions.Timeout:
-        logger.error(f"Wikipedia: Search API timeout for query: {query[:50]}")
-    except requests.exceptions.ConnectionError as e:
-        logger.error(f"Wikipedia: Search API connection error for query: {query[:50]} - {str(e)}")
-    except Exception as e:
-        logger.error(f"Wikipedia: Search API error for query: {query[:50]} - {str(e)}")
-    
-    return None
+    return fetch_source(SOURCES_BY_KEY["wiki"], query)
 
 
-def collect_trusted_sources(query):
-    """Collect all trusted sources in parallel for better performance"""
-    logger.info(f"Collecting trusted sources for query: {query[:100]}")
-    
-    # Run all searches (they're cached, so safe to call all)
-    sources = {
-        "wiki": wikipedia_search(query),
-        "google_news": google_news(query),
-        "altnews": altnews_search(query),
-        "boom": boomlive_search(query),
-        "reuters": reuters_search(query),
-        "bbc": bbc_search(query),
-        "snopes": snopes_search(query),
-        "factcheck": factcheck_search(query),
-        "politifact": politifact_search(query),
-    }
-    
+# ✅ Source fan-out
+# Shared across requests so a check never pays thread start-up; fetches that
+# miss the deadline keep running here and still warm the cache.
+_executor = ThreadPoolExecutor(max_workers=SOURCES_MAX_WORKERS, thread_name_prefix="satya-source")
+# Hedged attempts run here, not on _executor, whose threads are the ones waiting on them.
+_hedge_executor = ThreadPoolExecutor(max_workers=SOURCES_MAX_WORKERS, thread_name_prefix="satya-hedge")
+
+
+def _run_fetcher(app, adapter, query):
+    """Run one adapter, inside the caller's app context when there is one (the cache needs it)."""
+    return in_app(app, fetch_source, adapter, query)
+
+
+def _collect_plan(query, deadline):
+    """
+    The fan-out as a plan: the best claim query goes to every enabled source,
+    each later claim only to the sources that answered None in time. Each
+    round yields ("round", (adapters, claim, seconds left)) and is sent
+    {source key: (finished in time, result)}. Returns the per-source results.
+    """
+    claims = extract_claim_queries(query) or [query]
+    logger.debug(f"Collecting trusted sources for claims: {claims}")
+    end = time.monotonic() + deadline
+    adapters = [adapter for adapter in SOURCES if adapter.enabled]
+    sources = {adapter.key: None for adapter in adapters}
+    for claim in claims:
+        if not adapters or time.monotonic() >= end:
+            break
+        answers = yield "round", (adapters, claim, end - time.monotonic())
+        retry = []
+        for adapter in adapters:
+            finished, res = answers[adapter.key]
+            if res is not None:
+                sources[adapter.key] = res
+            elif finished:
+                retry.append(adapter)
+        adapters = retry
+
     # Count successful sources
     successful_sources = sum(1 for v in sources.values() if v is not None)
     logger.info(f"Source collection complete: {successful_sources}/{len(sources)} sources found")
@@ -414,8 +576,68 @@ def collect_trusted_sources(query):
     # Log which sources were found
     found_source_names = [k for k, v in sources.items() if v is not None]
     if found_source_names:
-        logger.info(f"Found sources: {', '.join(found_source_names)}")
+        logger.debug(f"Found sources: {', '.join(found_source_names)}")
     else:
         logger.warning(f"No sources found for query: {query[:100]}")
     
     return sources
+
+
+def _round_answers(futures, done, timeout):
+    """{source key: (finished in time, result)} of one fan-out round."""
+    answers = {}
+    for name, future in futures.items():
+        if future not in done:
+            if not isinstance(future, asyncio.Future):
+                future.cancel()  # drops it only if it never started
+            logger.warning(f"Source {name} missed the deadline ({timeout:.1f}s left)")
+            answers[name] = (False, None)
+            continue
+        try:
+            answers[name] = (True, future.result())
+        except Exception as e:
+            logger.error(f"Source {name} failed: {str(e)}")
+            answers[name] = (False, None)
+    return answers
+
+
+def collect_trusted_sources(query, deadline=None):
+    """
+    Collect all trusted sources in parallel for better performance.
+    The input is first reduced to a few short claim queries. Every source is
+    asked about the best one; a source that finds nothing is asked about the
+    next claim, so extra claims cost fetches only where they can help.
+    Whatever has not answered within `deadline` seconds (SOURCES_DEADLINE by
+    default) comes back as None.
+    """
+    app = current_app._get_current_object() if has_app_context() else None
+
+    def fan_out(adapters, claim, timeout):
+        # each fetch gets a copy of the caller's context so its span lands on the check's trace
+        futures = {
+            adapter.key: _executor.submit(contextvars.copy_context().run, _run_fetcher, app, adapter, claim)
+            for adapter in adapters
+        }
+        done, _ = wait(futures.values(), timeout=timeout)
+        return _round_answers(futures, done, timeout)
+
+    return drive(_collect_plan(query, SOURCES_DEADLINE if deadline is None else deadline), {"round": fan_out})
+
+
+async def collect_trusted_sources_async(query, deadline=None, app=None):
+    """
+    collect_trusted_sources() on the event loop. `app` is the Flask app whose
+    context the cache lookups run in. Fetches that miss the deadline keep
+    running on the loop and still warm the cache.
+    """
+    async def fan_out(adapters, claim, timeout):
+        tasks = {
+            adapter.key: asyncio.ensure_future(fetch_source_async(adapter, claim, app))
+            for adapter in adapters
+        }
+        done, _ = await asyncio.wait(tasks.values(), timeout=timeout)
+        return _round_answers(tasks, done, timeout)
+
+    return await drive_async(
+        _collect_plan(query, SOURCES_DEADLINE if deadline is None else deadline), {"round": fan_out},
+    )
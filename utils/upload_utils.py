@@ -0,0 +1,120 @@
+import hashlib
+import io
+import os
+import tempfile
+
+from flask import Request
+
+from config import UPLOAD_FOLDER, ALLOWED_EXTENSIONS, UPLOAD_MEMORY_MAX
+
+# Upload ingestion.
+# UploadRequest hooks Werkzeug's multipart parser so an /analyze upload is
+# written exactly once, in chunks, straight into its final place while being
+# hashed: images (up to UPLOAD_MEMORY_MAX) into memory, audio/video into
+# UPLOAD_FOLDER where ffmpeg & co. can open them by path. Spool files that
+# were not handed to a job (other form fields, rejected or aborted requests)
+# are removed when the request is closed.
+
+IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
+
+
+def file_extension(filename):
+    if not filename or "." not in filename:
+        return ""
+    return filename.rsplit(".", 1)[1].lower()
+
+
+class HashingFile:
+    """Wraps a writable file object and hashes (blake2b-128) everything written to it."""
+
+    def __init__(self, fh, ext):
+        self._fh = fh
+        self.ext = ext
+        self.accepted = False  # set once an Upload owns the file
+        self._hash = hashlib.blake2b(digest_size=16)
+
+    def write(self, data):
+        self._hash.update(data)
+        return self._fh.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def __getattr__(self, name):
+        return getattr(self._fh, name)
+
+
+class UploadRequest(Request):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._spools = []  # HashingFiles on disk, created for this request
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        ext = file_extension(filename)
+        if self.endpoint != "analyze" or ext not in ALLOWED_EXTENSIONS:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        size = content_length or total_content_length
+        if ext in IMAGE_EXTENSIONS and size is not None and size <= UPLOAD_MEMORY_MAX:
+            return HashingFile(io.BytesIO(), ext)
+        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+        fh = tempfile.NamedTemporaryFile(dir=UPLOAD_FOLDER, prefix="upload_", suffix=f".{ext}", delete=False)
+        spool = HashingFile(fh, ext)
+        self._spools.append(spool)
+        return spool
+
+    def close(self):
+        super().close()
+        for spool in self._spools:
+            if not spool.accepted:
+                _remove_spool(spool)
+        self._spools = []
+
+
+def _remove_spool(spool):
+    spool.close()
+    try:
+        os.remove(spool.name)
+    except OSError:
+        pass
+
+
+class Upload:
+    """An accepted upload: its bytes (in memory) or path (on disk), extension and content digest."""
+
+    def __init__(self, ext, digest, data=None, path=None):
+        self.ext = ext
+        self.digest = digest
+        self.data = data
+        self.path = path
+
+    def cleanup(self):
+        if self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+        self.data = None
+
+
+def accept_upload(file, chunk_size=1024 * 1024):
+    """Turn a FileStorage from /analyze into an Upload without copying it again."""
+    stream = file.stream
+    if isinstance(stream, HashingFile):
+        if isinstance(stream._fh, io.BytesIO):
+            return Upload(stream.ext, stream.hexdigest(), data=stream._fh.getvalue())
+        stream.flush()
+        stream.close()
+        stream.accepted = True
+        return Upload(stream.ext, stream.hexdigest(), path=stream.name)
+
+    # Not spooled by UploadRequest (e.g. a hand-built FileStorage): stream it to disk once.
+    ext = file_extension(file.filename)
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    h = hashlib.blake2b(digest_size=16)
+    with tempfile.NamedTemporaryFile(dir=UPLOAD_FOLDER, prefix="upload_", suffix=f".{ext}", delete=False) as out:
+        for chunk in iter(lambda: stream.read(chunk_size), b""):
+            h.update(chunk)
+            out.write(chunk)
+    return Upload(ext, h.hexdigest(), path=out.name)
+
@@ -0,0 +1,139 @@
+import codecs
+import re
+from html.parser import HTMLParser
+
+from config import URL_MAX_BYTES, URL_MAX_CHARS
+from utils import http_client
+
+TEXT_TYPES = {"text/html", "application/xhtml+xml", "text/plain"}
+
+_WS_RE = re.compile(r"\s+")
+
+
+class PageTextExtractor(HTMLParser):
+    """
+    Incremental HTML -> text.
+    Drops script/style-like elements entirely, keeps page chrome
+    (nav/header/footer/aside/form) only as a fallback, and prefers the text
+    inside <article>/<main> when the page has enough of it. Sets `done` once
+    max_chars of body text have been collected so callers can stop feeding.
+    """
+
+    SKIP = {"script", "style", "noscript", "template", "svg", "canvas", "iframe", "object"}
+    BOILERPLATE = {"nav", "header", "footer", "aside", "form", "menu", "button", "select"}
+    MAIN = {"article", "main"}
+    BLOCK = {"p", "div", "br", "li", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "section", "blockquote", "title"}
+    MIN_MAIN_CHARS = 200
+
+    def __init__(self, max_chars=URL_MAX_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.done = False
+        self._skip = 0
+        self._boilerplate = 0
+        self._main = 0
+        self._body = []
+        self._body_len = 0
+        self._main_parts = []
+        self._main_len = 0
+        self._chrome = []
+        self._chrome_len = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag in self.BOILERPLATE:
+            self._boilerplate += 1
+        elif tag in self.MAIN:
+            self._main += 1
+        if tag in self.BLOCK:
+            self._append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.BLOCK:
+            self._append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self._skip = max(self._skip - 1, 0)
+        elif tag in self.BOILERPLATE:
+            self._boilerplate = max(self._boilerplate - 1, 0)
+        elif tag in self.MAIN:
+            self._main = max(self._main - 1, 0)
+        if tag in self.BLOCK:
+            self._append("\n")
+
+    def handle_data(self, data):
+        if self._skip or not data.strip():
+            return
+        self._append(_WS_RE.sub(" ", data))
+
+    def _append(self, piece):
+        if self._skip:
+            return
+        if self._boilerplate:
+            if self._chrome_len < self.max_chars:
+                self._chrome.append(piece)
+                self._chrome_len += len(piece)
+            return
+        self._body.append(piece)
+        self._body_len += len(piece)
+        if self._main:
+            self._main_parts.append(piece)
+            self._main_len += len(piece)
+        if self._body_len >= self.max_chars or self._main_len >= self.max_chars:
+            self.done = True
+
+    @staticmethod
+    def _join(parts):
+        lines = (line.strip() for line in "".join(parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+    def text(self):
+        main = self._join(self._main_parts)
+        if len(main) >= self.MIN_MAIN_CHARS:
+            return main[:self.max_chars]
+        body = self._join(self._body) or self._join(self._chrome)
+        return body[:self.max_chars]
+
+
+def fetch_url_text(url, max_bytes=URL_MAX_BYTES, max_chars=URL_MAX_CHARS, timeout=12):
+    """
+    Stream a page and return up to max_chars of readable text.
+    Reads at most max_bytes of (decompressed) body and stops early once enough
+    text is collected. Raises ValueError for non-text responses.
+    """
+    with http_client.get(url, timeout=timeout, stream=True) as r:
+        r.raise_for_status()
+        content_type = r.headers.get("Content-Type", "")
+        mime = content_type.split(";")[0].strip().lower()
+        if mime and mime not in TEXT_TYPES:
+            raise ValueError(f"Unsupported content type: {mime}")
+
+        # requests assumes ISO-8859-1 for text/* without a charset; the web is mostly UTF-8
+        encoding = r.encoding if "charset" in content_type.lower() else "utf-8"
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        if mime == "text/plain":
+            parts, size, chars = [], 0, 0
+            for chunk in r.iter_content(chunk_size=16384):
+                piece = decoder.decode(chunk)
+                parts.append(piece)
+                size += len(chunk)
+                chars += len(piece)
+                if size >= max_bytes or chars >= max_chars:
+                    break
+            return "".join(parts)[:max_chars]
+
+        parser = PageTextExtractor(max_chars=max_chars)
+        size = 0
+        for chunk in r.iter_content(chunk_size=16384):
+            size += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.done or size >= max_bytes:
+                break
+        parser.close()
+        return parser.text()
@@ -1,43 +1,125 @@
-import os, tempfile, shutil
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 try:
     from moviepy.editor import VideoFileClip
+    from PIL import Image
+    import numpy as np
     MOVIEPY_OK = True
 except Exception:
     MOVIEPY_OK = False
 
-from .ocr_utils import ocr_from_path
+from config import (
+    VIDEO_SAMPLE_FPS, VIDEO_MAX_SAMPLES, VIDEO_MAX_FRAMES,
+    VIDEO_SCENE_THRESHOLD, VIDEO_DUP_DISTANCE,
+    VIDEO_AUDIO_TIMEOUT, VIDEO_FRAMES_TIMEOUT,
+)
+from .ocr_utils import submit_image
+from .image_hash import dhash, hamming
 from .ai_utils import transcribe_audio_path
+from .stt_utils import transcription_available
+
+logger = logging.getLogger(__name__)
+
+# audio and frame stages of concurrent video checks; both stop themselves at
+# their deadline, so a slow video does not hold a thread past it
+_stages = ThreadPoolExecutor(max_workers=8, thread_name_prefix="satya-video")
+# how long past a stage's deadline to wait for it to hand back partial text
+STAGE_GRACE = 2
+
+def sample_frames(clip, deadline=None):
+    """
+    Yield (t, frame) for frames worth OCR'ing.
+    Frames are decoded at VIDEO_SAMPLE_FPS (lowered so long videos decode at
+    most VIDEO_MAX_SAMPLES), kept on a scene change against the last kept
+    frame, and dropped when they are a near-duplicate of one already kept
+    (e.g. a slide that comes back): dHash within VIDEO_DUP_DISTANCE, confirmed
+    on the thumbnails since a 64-bit dHash only sees horizontal gradients.
+    With a deadline (time.monotonic()), decoding stops there, checked on every
+    decoded frame (skipped ones too).
+    """
+    duration = clip.duration or 1
+    fps = min(VIDEO_SAMPLE_FPS, VIDEO_MAX_SAMPLES / duration)
+    last_thumb = None
+    kept = []  # (dhash, thumb)
+    for t, frame in clip.iter_frames(fps=fps, with_times=True, dtype="uint8"):
+        if deadline is not None and time.monotonic() >= deadline:
+            return
+        img = Image.fromarray(frame)
+        thumb = np.asarray(img.convert("L").resize((32, 32)), dtype=np.float32)
+        if last_thumb is not None and np.abs(thumb - last_thumb).mean() < VIDEO_SCENE_THRESHOLD:
+            continue
+        last_thumb = thumb
+        h = dhash(img)
+        if any(
+            hamming(h, seen) <= VIDEO_DUP_DISTANCE
+            and np.abs(thumb - seen_thumb).mean() < VIDEO_SCENE_THRESHOLD
+            for seen, seen_thumb in kept
+        ):
+            continue
+        kept.append((h, thumb))
+        yield t, frame
+        if len(kept) >= VIDEO_MAX_FRAMES:
+            return
+
+def extract_frames_text(clip, deadline=None):
+    """
+    OCR the sampled frames on the OCR pool while decoding continues.
+    With a deadline (time.monotonic()), sampling stops there and only the
+    frames OCR'd by then are returned.
+    """
+    futures = []
+    for _, frame in sample_frames(clip, deadline):
+        futures.append(submit_image(frame))
+    texts = []
+    for f in futures:
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        try:
+            texts.append(f.result(timeout=timeout))
+        except FutureTimeout:
+            f.cancel()
+    return "\n".join(texts)
+
+def _audio_stage(fp, deadline):
+    # the STT engine decodes the container's audio track itself: no audio.mp3 temp file
+    if not transcription_available():
+        return ""
+    return transcribe_audio_path(fp, deadline) or ""
+
+def _frames_stage(fp, deadline):
+    clip = VideoFileClip(fp, audio=False)
+    try:
+        return extract_frames_text(clip, deadline)
+    finally:
+        clip.close()
+
+def _stage_result(future, deadline, name, timed_out):
+    try:
+        return future.result(timeout=max(deadline - time.monotonic(), 0))
+    except FutureTimeout:
+        timed_out.append(name)
+        logger.warning(f"Video {name} stage timed out")
+    except Exception as e:
+        logger.warning(f"Video {name} stage error: {str(e)}")
+    return ""
 
 def process_video_file(fp):
     """
-    Extract audio (mp3) and a few frames from the video file
-    Returns dictionary: { audio_text: "...", frames_text: "..." }
+    Extract text from the audio track and from the visually distinct frames.
+    The two stages run concurrently with their own timeouts
+    (VIDEO_AUDIO_TIMEOUT / VIDEO_FRAMES_TIMEOUT); a stage that fails or runs
+    out of time stops and contributes what it had by then.
+    Returns dictionary: { audio_text: "...", frames_text: "...", timed_out: [...] }
     If moviepy not available, return empty dict.
     """
     if not MOVIEPY_OK:
         return {}
-    tmpdir = tempfile.mkdtemp(prefix="satya_")
-    try:
-        clip = VideoFileClip(fp)
-        audio_path = os.path.join(tmpdir, "audio.mp3")
-        if clip.audio:
-            clip.audio.write_audiofile(audio_path, logger=None)
-            audio_text = transcribe_audio_path(audio_path) or ""
-        else:
-            audio_text = ""
-        frames_text = ""
-        duration = clip.duration or 1
-        times = [duration * i / 4.0 for i in range(1, 4)]
-        for i, t in enumerate(times):
-            frame_path = os.path.join(tmpdir, f"frame_{i}.jpg")
-            clip.save_frame(frame_path, t)
-            frames_text += ocr_from_path(frame_path) + "\n"
-        return { "audio_text": audio_text, "frames_text": frames_text }
-    except Exception as e:
-        print("Video processing error:", e)
-        return {}
-    finally:
-        try:
-            shutil.rmtree(tmpdir)
-        except Exception:
-            pass
+    start = time.monotonic()
+    timed_out = []
+    audio_deadline = start + VIDEO_AUDIO_TIMEOUT
+    frames_deadline = start + VIDEO_FRAMES_TIMEOUT
+    audio_future = _stages.submit(_audio_stage, fp, audio_deadline)
+    frames_future = _stages.submit(_frames_stage, fp, frames_deadline)
+    frames_text = _stage_result(frames_future, frames_deadline + STAGE_GRACE, "frames", timed_out)
+    audio_text = _stage_result(audio_future, audio_deadline + STAGE_GRACE, "audio", timed_out)
+    return { "audio_text": audio_text, "frames_text": frames_text, "timed_out": timed_out }